@@ -0,0 +1,255 @@
+import os
+import struct
+import logging
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+# 识别为音频文件的扩展名（目录扫描、批量分析与打开文件对话框共用）
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".aif", ".aiff")
+
+# WAVE_FORMAT 代码
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class MappedWav:
+    """
+    内存映射的 PCM / IEEE float WAV 文件
+
+    打开时只解析 RIFF/RF64 头，采样数据通过 np.memmap 按需由操作系统换页读取。
+    每个通道以 ChannelView 的形式懒加载，只有被访问的采样区间才会转换为 float32。
+
+    支持 8/16/24/32 bit PCM 与 32/64 bit float。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._parse_header()
+
+        if self.bits == 24:
+            # numpy 无 24 bit 类型，按字节映射，读取时再拼接
+            self._raw = np.memmap(path, dtype=np.uint8, mode="r", offset=self.data_offset,
+                                  shape=(self.frames, self.channels, 3))
+        else:
+            self._raw = np.memmap(path, dtype=self._dtype, mode="r", offset=self.data_offset,
+                                  shape=(self.frames, self.channels))
+        logger.info(f"内存映射 WAV: {path}, 采样率={self.samplerate}, 通道={self.channels}, "
+                    f"帧数={self.frames}, 位深={self.bits}")
+
+    # -----------------------------
+    # 解析文件头
+    def _parse_header(self):
+        file_size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff not in (b"RIFF", b"RF64") or wave != b"WAVE":
+                raise ValueError("不是 WAV 文件")
+
+            fmt = None
+            data_offset = data_size = None
+            ds64_data_size = None
+            pos = 12
+            while pos + 8 <= file_size:
+                f.seek(pos)
+                chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+                body = pos + 8
+                if chunk_id == b"ds64":
+                    # RF64: 真实的 data 大小保存在 ds64 块中
+                    _, ds64_data_size = struct.unpack("<QQ", f.read(16))
+                elif chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                elif chunk_id == b"data":
+                    data_offset = body
+                    data_size = chunk_size
+                    if riff == b"RF64" and chunk_size == 0xFFFFFFFF and ds64_data_size is not None:
+                        data_size = ds64_data_size
+                    # data 块可能未按头中长度写完（录音中断），以文件实际长度为准
+                    data_size = min(data_size, file_size - body)
+                    break
+                pos = body + chunk_size + (chunk_size & 1)
+
+        if fmt is None or data_offset is None:
+            raise ValueError("WAV 文件缺少 fmt 或 data 块")
+
+        audio_format, channels, samplerate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            audio_format = struct.unpack("<H", fmt[24:26])[0]
+
+        if audio_format == WAVE_FORMAT_PCM:
+            dtype = {8: np.uint8, 16: np.dtype("<i2"), 24: None, 32: np.dtype("<i4")}.get(bits, False)
+        elif audio_format == WAVE_FORMAT_IEEE_FLOAT:
+            dtype = {32: np.dtype("<f4"), 64: np.dtype("<f8")}.get(bits, False)
+        else:
+            dtype = False
+        if dtype is False or block_align != channels * bits // 8:
+            raise ValueError(f"不支持的 WAV 格式: format={audio_format}, bits={bits}")
+
+        self.samplerate = samplerate
+        self.channels = channels
+        self.bits = bits
+        self.is_float = audio_format == WAVE_FORMAT_IEEE_FLOAT
+        self.data_offset = data_offset
+        self.frames = data_size // block_align
+        self._dtype = dtype
+
+    def __reduce__(self):
+        # 传给子进程时只传路径，由子进程重新映射，避免复制数据
+        return MappedWav, (self.path,)
+
+    # -----------------------------
+    @property
+    def duration(self):
+        return self.frames / self.samplerate
+
+    def raw(self, channel, key=slice(None)):
+        """
+        返回原始采样
+
+        channel 为 int 时是零拷贝的 memmap 视图；为通道列表时只复制 key 指定的采样区间。
+        """
+        return self._raw[key, channel]
+
+    def to_float(self, raw):
+        """将原始采样转换为 float32，范围与 soundfile 读取结果一致"""
+        if self.is_float:
+            return np.asarray(raw, dtype=np.float32)
+        if self.bits == 8:
+            return (raw.astype(np.float32) - 128) / 128
+        if self.bits == 16:
+            return raw.astype(np.float32) / 32768
+        if self.bits == 24:
+            x = (raw[..., 0].astype(np.int32)
+                 | (raw[..., 1].astype(np.int32) << 8)
+                 | (raw[..., 2].astype(np.int8).astype(np.int32) << 16))
+            return x.astype(np.float32) / 8388608
+        return raw.astype(np.float32) / 2147483648
+
+    def channel(self, index):
+        """懒加载的通道视图，index 为 int（一维）或通道序号列表（二维）"""
+        for i in np.atleast_1d(index):
+            if not 0 <= i < self.channels:
+                raise ValueError(f"通道 {i} 超出范围 (共 {self.channels} 个通道)")
+        return ChannelView(self, index)
+
+    def close(self):
+        """释放内存映射"""
+        mm = getattr(self._raw, "_mmap", None)
+        self._raw = None
+        if mm is not None:
+            mm.close()
+
+
+class ChannelView:
+    """
+    MappedWav 中一个或多个通道的懒加载视图
+
+    index 为 int 时行为类似一维 float32 数组，为通道列表时类似 (n_samples, n_channels) 数组：
+    len()、按采样切片与 np.asarray() 均可用，但只有被切片的区间才会从文件读取并转换。
+    """
+
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, wav, index):
+        self.wav = wav
+        self.index = index if np.isscalar(index) else list(index)
+
+    def __len__(self):
+        return self.wav.frames
+
+    @property
+    def ndim(self):
+        return 1 if np.isscalar(self.index) else 2
+
+    @property
+    def shape(self):
+        if self.ndim == 1:
+            return (self.wav.frames,)
+        return (self.wav.frames, len(self.index))
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            raise IndexError("ChannelView 只支持按采样切片，选择通道请使用 select()")
+        return self.wav.to_float(self.wav.raw(self.index, key))
+
+    def select(self, channels):
+        """选取本视图中的部分通道（序号相对于本视图），返回新的懒加载视图"""
+        if self.ndim == 1:
+            raise IndexError("单通道视图无法再选择通道")
+        if np.isscalar(channels):
+            return ChannelView(self.wav, self.index[channels])
+        return ChannelView(self.wav, [self.index[c] for c in channels])
+
+    def iter_blocks(self, blocksize=65536):
+        """按块迭代整个通道，可直接用于 analysis.streaming 中的累加器"""
+        for start in range(0, len(self), blocksize):
+            yield self[start:start + blocksize]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+
+def open_audio(path):
+    """
+    打开音频文件
+
+    PCM / float WAV 使用内存映射（几乎瞬时完成），其它格式通过 soundfile 完整解码。
+
+    Returns
+    -------
+    source : MappedWav or np.ndarray
+        MappedWav，或形状为 (n_samples, n_channels) 的 float32 数组
+    sr : int
+        采样率
+    """
+    if path.lower().endswith(".wav"):
+        try:
+            wav = MappedWav(path)
+            return wav, wav.samplerate
+        except ValueError as e:
+            logger.info(f"无法内存映射，改为完整解码: {e}")
+    data, sr = sf.read(path, dtype="float32", always_2d=True)
+    return data, sr
+
+
+def source_channels(source):
+    """音频源的通道数"""
+    return source.channels if isinstance(source, MappedWav) else source.shape[1]
+
+
+def channel_data(source, index):
+    """
+    从音频源取出通道（MappedWav 返回懒加载视图，数组返回切片）
+
+    index 为 int 返回一维数据，为列表返回 (n_samples, len(index)) 数据。
+    """
+    if isinstance(source, MappedWav):
+        return source.channel(index)
+    return source[:, index]
+
+
+def all_channels(source):
+    """音频源的全部通道，形状为 (n_samples, n_channels)"""
+    return channel_data(source, list(range(source_channels(source))))
+
+
+def select_channels(data, channels):
+    """
+    从多通道数据 (n_samples, n_channels) 中选取部分通道
+
+    只选一个通道时返回一维数据；一维输入原样返回。
+    """
+    if data.ndim == 1:
+        return data
+    if len(channels) == 1:
+        channels = channels[0]
+    if isinstance(data, ChannelView):
+        return data.select(channels)
+    return data[:, channels]
@@ -0,0 +1,295 @@
+import os
+import hashlib
+import logging
+import threading
+import numpy as np
+import soundfile as sf
+from collections import OrderedDict
+
+from .audio_io import MappedWav, all_channels, source_channels
+
+logger = logging.getLogger(__name__)
+
+# 已解码音频的默认内存预算 (字节)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# 解码后超过该大小 (字节) 的文件不整体读入内存，改用流式分析
+STREAM_THRESHOLD_BYTES = 1 << 30
+# 被淘汰的解码结果转存为 .npy，再次打开时内存映射
+DEFAULT_SPILL_DIR = os.path.join(os.path.expanduser("~"), ".nvh_cache", "decoded")
+
+
+class AudioEntry:
+    """
+    存储中的一个音频文件
+
+    Attributes
+    ----------
+    path : str
+        绝对路径
+    source : MappedWav, np.ndarray or None
+        内存映射的 WAV、解码后的 (n_samples, n_channels) 数组（可能是 .npy 内存映射），
+        None 表示文件过大、只做流式分析
+    sr : int
+    duration : float
+    nbytes : int
+        占用的内存 (字节)；内存映射与流式为 0
+    """
+
+    def __init__(self, path, source, sr, duration, nbytes=0):
+        self.path = path
+        self.source = source
+        self.sr = sr
+        self.duration = duration
+        self.nbytes = nbytes
+        # 全部通道 (n_samples, n_channels)；数组直接使用（花式索引会复制整段数据）
+        self.y = source if source is None or isinstance(source, np.ndarray) else all_channels(source)
+
+    @property
+    def streaming(self):
+        return self.source is None
+
+    @property
+    def mapped(self):
+        return isinstance(self.source, (MappedWav, np.memmap))
+
+    def mode(self):
+        """供界面显示的通道 / 加载方式说明"""
+        if self.streaming:
+            return "流式（未载入内存）"
+        n_channels = source_channels(self.source)
+        return f"{n_channels}（内存映射）" if self.mapped else str(n_channels)
+
+
+class AudioStore:
+    """
+    多文件音频存储（按文件路径索引）
+
+    PCM WAV 直接内存映射，不占预算；其它格式解码为 float32 数组，
+    按 LRU 在内存预算内保留。被淘汰的解码结果转存到 spill_dir 的 .npy 文件，
+    再次打开时内存映射，不必重新解码。解码后超过 stream_threshold 的文件
+    只记录头信息，由调用方流式分析。转存文件只在本次运行中使用：移除文件或清空
+    存储时删除，上次运行遗留的转存文件在创建存储时删除。Windows 上仍被内存映射
+    （如界面仍持有数据）的文件无法删除，这些文件记下来，在之后的淘汰时重试。
+
+    所有方法线程安全；解码与写入转存文件在调用线程中进行（通常为后台加载线程），不持有锁。
+
+    Parameters
+    ----------
+    max_bytes : int
+        解码数组的内存预算 (字节)
+    stream_threshold : int
+        超过该解码大小 (字节) 的文件改为流式
+    spill_dir : str
+        转存目录；None 时被淘汰的文件下次重新解码
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, stream_threshold=STREAM_THRESHOLD_BYTES,
+                 spill_dir=DEFAULT_SPILL_DIR):
+        self.max_bytes = max_bytes
+        self.stream_threshold = stream_threshold
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()  # path -> AudioEntry
+        self._bytes = 0
+        self._spills = {}  # path -> 本次运行写入的转存文件
+        self._undeleted = set()  # 删除失败（仍被映射）、待重试的转存文件
+        self._lock = threading.RLock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for name in os.listdir(spill_dir):
+                if name.endswith(".npy"):  # 上次运行遗留（含写入中断的临时文件）
+                    _remove(os.path.join(spill_dir, name))
+
+    # -----------------------------
+    # 查询
+    def get(self, path):
+        """已在存储中的文件，不在时返回 None（不触发加载）"""
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def load(self, path):
+        """
+        取出文件，不在存储中（或已被淘汰）时透明地重新打开
+
+        Returns
+        -------
+        AudioEntry
+        """
+        entry = self.get(path)
+        if entry is not None:
+            return entry
+        entry = self._open(os.path.abspath(path))
+        with self._lock:
+            old = self._entries.pop(entry.path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[entry.path] = entry
+            self._bytes += entry.nbytes
+            evicted = self._evict()
+        # 写转存文件可能较慢，在锁外进行，不阻塞界面线程的 get()
+        for evicted_path, data in evicted:
+            self._spill(evicted_path, data)
+        if evicted:
+            self._retry_deletes()
+        return entry
+
+    def __contains__(self, path):
+        with self._lock:
+            return os.path.abspath(path) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    # -----------------------------
+    # 移除
+    def remove(self, path):
+        """移除文件，并删除它的转存文件"""
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+                _release(entry)
+            spill = self._spills.pop(path, None)
+        del entry
+        if spill:
+            self._delete_spill(spill)
+        self._retry_deletes()
+
+    def clear(self):
+        """清空存储，并删除全部转存文件"""
+        with self._lock:
+            for entry in self._entries.values():
+                _release(entry)
+            self._entries.clear()
+            self._bytes = 0
+            spills, self._spills = list(self._spills.values()), {}
+        for spill in spills:
+            self._delete_spill(spill)
+        self._retry_deletes()
+
+    # -----------------------------
+    # 打开
+    def _open(self, path):
+        if path.lower().endswith(".wav"):
+            # PCM WAV 直接内存映射，不解码
+            try:
+                wav = MappedWav(path)
+                return AudioEntry(path, wav, wav.samplerate, wav.duration)
+            except ValueError as e:
+                logger.info(f"无法内存映射，改为解码读取: {e}")
+
+        info = sf.info(path)
+        if info.frames * info.channels * 4 > self.stream_threshold:
+            # 大文件只读取头信息，分析时按块读取
+            return AudioEntry(path, None, info.samplerate, info.frames / info.samplerate)
+
+        spill = self._spill_path(path)
+        if spill and os.path.exists(spill):
+            with self._lock:
+                # 移除后未能删除的转存文件仍然有效，重新打开时收回，不再删除
+                self._undeleted.discard(spill)
+                self._spills[path] = spill
+            data = np.load(spill, mmap_mode="r")
+            logger.info(f"从转存文件内存映射: {path}")
+            return AudioEntry(path, data, info.samplerate, len(data) / info.samplerate)
+
+        data, sr = sf.read(path, dtype="float32", always_2d=True)
+        if data.nbytes > self.max_bytes and spill:
+            # 单个文件就超过预算：解码结果只保留在磁盘上
+            data = self._spill(path, data)
+            return AudioEntry(path, data, sr, len(data) / sr)
+        return AudioEntry(path, data, sr, len(data) / sr, nbytes=data.nbytes)
+
+    def _evict(self):
+        """
+        超出预算时从最久未使用的解码数组开始淘汰（最近使用的一项保留），调用方持有锁
+
+        Returns
+        -------
+        list of (path, np.ndarray)
+            需要写入转存文件的解码结果（由调用方在锁外写入）
+        """
+        evicted = []
+        for path in list(self._entries):
+            if self._bytes <= self.max_bytes or path == next(reversed(self._entries)):
+                break
+            entry = self._entries[path]
+            if entry.nbytes == 0:
+                continue
+            del self._entries[path]
+            self._bytes -= entry.nbytes
+            if self.spill_dir:
+                evicted.append((path, entry.source))
+            logger.info(f"音频存储超出预算，淘汰: {path}")
+        return evicted
+
+    # -----------------------------
+    # 转存
+    def _spill_path(self, path):
+        """转存文件路径（由 路径 + 修改时间 + 大小 确定，文件变化后自动失效）"""
+        if not self.spill_dir:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        ident = f"{path}|{st.st_mtime_ns}|{st.st_size}"
+        return os.path.join(self.spill_dir, hashlib.blake2b(ident.encode(), digest_size=16).hexdigest() + ".npy")
+
+    def _delete_spill(self, spill):
+        """删除转存文件；仍被映射而删除失败时记下，之后重试"""
+        if not _remove(spill):
+            with self._lock:
+                self._undeleted.add(spill)
+
+    def _retry_deletes(self):
+        with self._lock:
+            pending, self._undeleted = self._undeleted, set()
+        for spill in pending:
+            self._delete_spill(spill)
+
+    def _spill(self, path, data):
+        """把解码结果写入 .npy 并返回其内存映射；写入失败时返回原数组"""
+        spill = self._spill_path(path)
+        if spill is None:
+            return data
+        if not os.path.exists(spill):
+            tmp = f"{spill}.{threading.get_ident()}.tmp.npy"  # 各线程各自的临时文件
+            try:
+                np.save(tmp, data)
+                os.replace(tmp, spill)
+            except OSError as e:
+                logger.warning(f"写入转存文件失败: {e}")
+                _remove(tmp)
+                return data
+        with self._lock:
+            old = self._spills.get(path)
+            self._spills[path] = spill
+        if old and old != spill:
+            self._delete_spill(old)  # 文件已修改，旧的转存文件失效
+        return np.load(spill, mmap_mode="r")
+
+
+def _release(entry):
+    """丢弃存储对数据（内存映射）的引用，其它地方不再持有时映射随之关闭"""
+    entry.source = None
+    entry.y = None
+
+
+def _remove(path):
+    """删除文件，成功（或文件已不存在）时返回 True"""
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+        return True
+    except OSError as e:
+        logger.info(f"暂时无法删除转存文件，稍后重试: {e}")
+        return False
@@ -0,0 +1,198 @@
+"""
+无界面批量分析
+
+用法示例::
+
+    python -m analysis.batch recordings/ "eol/*.wav" -o results/ \
+        -a fft-average fft-peak level spectrogram --filter bandpass:20,8000 --workers 8
+
+每个输入文件生成一个压缩 npz 结果文件，结束时输出处理速度（文件/秒）与总耗时。
+"""
+import os
+import glob
+import time
+import logging
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .audio_io import AUDIO_EXTENSIONS, open_audio, all_channels, select_channels
+from .fft_processor import compute_fft
+from .filter import butter_filter
+from .level_vs_time import compute_level_vs_time, TIME_WEIGHTINGS
+from .octave import compute_octave_levels
+from .weighting import WEIGHTINGS
+from .fft_backend import WINDOWS
+from .spectrogram import compute_spectrogram
+
+logger = logging.getLogger(__name__)
+
+ANALYSES = ("fft-single", "fft-average", "fft-peak", "level", "spectrogram", "octave", "third-octave")
+
+
+def collect_files(inputs):
+    """展开目录（递归）与通配符，返回去重后的音频文件列表"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, "**", "*"), recursive=True)
+        else:
+            candidates = glob.glob(item, recursive=True) or [item]
+        files.extend(p for p in candidates if p.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(p))
+    return sorted(set(files))
+
+
+def parse_filter(spec):
+    """解析 'low:1000' / 'high:200' / 'bandpass:300,3000'"""
+    if not spec:
+        return None
+    btype, _, cutoff = spec.partition(":")
+    if btype not in ("low", "high", "bandpass") or not cutoff:
+        raise ValueError(f"无法解析滤波参数: {spec}")
+    values = [float(x) for x in cutoff.split(",")]
+    return btype, values if btype == "bandpass" else values[0]
+
+
+def output_path(path, out_dir, used):
+    """结果文件路径；不同目录下的同名文件追加父目录名避免覆盖"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = stem
+    if name in used:
+        name = f"{os.path.basename(os.path.dirname(os.path.abspath(path)))}_{stem}"
+    used.add(name)
+    return os.path.join(out_dir, name + ".npz")
+
+
+def process_file(path, out_path, analyses, filter_spec=None, channels=None,
+                 frame_size=4096, overlap=0.5, frame_length=0.125, time_weighting=None, hop_length=None,
+                 weighting=None, window="rectangular"):
+    """
+    对单个文件执行所选分析并写出 npz
+
+    Returns
+    -------
+    path : str
+    elapsed : float
+        耗时 (秒)
+    """
+    start = time.perf_counter()
+    source, sr = open_audio(path)
+    data = all_channels(source)
+    if channels is not None:
+        data = select_channels(data, channels)
+    data = np.asarray(data)
+
+    results = {"sr": np.array(sr)}
+    if filter_spec is not None:
+        btype, cutoff = filter_spec
+        data = butter_filter(data, sr, cutoff=cutoff, btype=btype).astype(np.float32)
+
+    for name in analyses:
+        if name.startswith("fft-"):
+            mode = name.split("-", 1)[1]
+            freqs, spectrum = compute_fft(data, sr, mode=mode, frame_size=frame_size, overlap=overlap,
+                                          weighting=weighting, window=window)
+            key = name.replace("-", "_")
+            results[f"{key}_freqs"] = freqs
+            results[f"{key}_spectrum"] = spectrum.astype(np.float32)
+        elif name == "level":
+            times, levels = compute_level_vs_time(data, sr, frame_length=frame_length,
+                                                  time_weighting=time_weighting, hop_length=hop_length,
+                                                  weighting=weighting)
+            results["level_times"] = times
+            results["level_db"] = levels.astype(np.float32)
+        elif name in ("octave", "third-octave"):
+            nominal, levels = compute_octave_levels(data, sr, fraction=1 if name == "octave" else 3)
+            key = name.replace("-", "_")
+            results[f"{key}_freqs"] = nominal
+            results[f"{key}_db"] = levels.astype(np.float32)
+        elif name == "spectrogram":
+            f, t, Sxx_db = compute_spectrogram(data, sr)
+            results["spectrogram_freqs"] = f
+            results["spectrogram_times"] = t
+            # dB 值用 float16 保存，精度约 0.01 dB，文件体积减半
+            results["spectrogram_db"] = Sxx_db.astype(np.float16)
+        else:
+            raise ValueError(f"未知分析类型: {name}")
+
+    np.savez_compressed(out_path, **results)
+    return path, time.perf_counter() - start
+
+
+def run_batch(files, out_dir, analyses, workers=None, **kwargs):
+    """
+    使用进程池并行处理文件
+
+    Returns
+    -------
+    n_ok : int
+    failures : list of (path, error)
+    wall : float
+        总耗时 (秒)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    used = set()
+    jobs = [(path, output_path(path, out_dir, used)) for path in files]
+
+    start = time.perf_counter()
+    n_ok = 0
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, path, out, analyses, **kwargs): path for path, out in jobs}
+        for i, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                _, elapsed = future.result()
+                n_ok += 1
+                logger.info(f"[{i}/{len(jobs)}] 完成 {path} ({elapsed:.2f}s)")
+            except Exception as e:
+                failures.append((path, str(e)))
+                logger.error(f"[{i}/{len(jobs)}] 失败 {path}: {e}")
+    return n_ok, failures, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NVH 音频批量分析（无界面）")
+    parser.add_argument("inputs", nargs="+", help="音频文件、目录或通配符")
+    parser.add_argument("-o", "--output", required=True, help="结果输出目录")
+    parser.add_argument("-a", "--analyses", nargs="+", choices=ANALYSES, default=["fft-average", "level"],
+                        help="分析类型")
+    parser.add_argument("--filter", help="滤波，如 low:1000、high:200、bandpass:300,3000")
+    parser.add_argument("--channels", help="通道序号（从 0 开始），如 0,2；默认全部通道")
+    parser.add_argument("--frame-size", type=int, default=4096, help="FFT 帧长")
+    parser.add_argument("--overlap", type=float, default=0.5, help="FFT 帧重叠比例")
+    parser.add_argument("--frame-length", type=float, default=0.125, help="Level vs Time 帧时长 (秒)")
+    parser.add_argument("--time-weighting", choices=TIME_WEIGHTINGS, help="Level vs Time 时间计权，默认分帧 RMS")
+    parser.add_argument("--hop-length", type=float, default=None, help="Level vs Time 输出间隔 (秒)，默认等于帧时长")
+    parser.add_argument("--weighting", choices=WEIGHTINGS, help="FFT 与 Level vs Time 的频率计权，默认不计权")
+    parser.add_argument("--window", choices=list(WINDOWS), default="rectangular", help="FFT 窗函数，默认不加窗")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("analysis").setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    files = collect_files(args.inputs)
+    if not files:
+        parser.error("没有找到音频文件")
+
+    channels = [int(c) for c in args.channels.split(",")] if args.channels else None
+    n_ok, failures, wall = run_batch(
+        files, args.output, args.analyses, workers=args.workers,
+        filter_spec=parse_filter(args.filter), channels=channels,
+        frame_size=args.frame_size, overlap=args.overlap, frame_length=args.frame_length,
+        time_weighting=args.time_weighting, hop_length=args.hop_length, weighting=args.weighting,
+        window=args.window,
+    )
+
+    rate = len(files) / wall if wall > 0 else float("inf")
+    print(f"处理 {len(files)} 个文件: 成功 {n_ok}, 失败 {len(failures)}, "
+          f"总耗时 {wall:.2f} s, {rate:.2f} 文件/秒")
+    for path, error in failures:
+        print(f"  失败: {path}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+import os
+import hashlib
+import logging
+import threading
+import weakref
+import numpy as np
+from collections import OrderedDict
+
+from .audio_io import ChannelView
+
+logger = logging.getLogger(__name__)
+
+# 磁盘缓存的默认容量 (字节)
+DEFAULT_DISK_MAX_BYTES = 2 * 1024 ** 3
+# 缓存格式 / 算法版本：分析算法的结果或缓存文件格式改变时加一，旧结果不再命中，
+# 磁盘上版本不符的缓存文件在打开时删除
+CACHE_VERSION = 2
+_VERSION_FILE = "cache_version"
+
+
+def _root_array(y):
+    """视图链最底层的数组（数据的真正持有者）"""
+    root = y
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    return root
+
+
+class ResultCache:
+    """
+    分析结果缓存（按内容寻址）
+
+    键为「缓存版本 + 信号内容哈希 + 分析函数 + 全部参数」。内存中是按字节预算淘汰的 LRU，
+    可选的磁盘层把结果保存为 npz，重新打开软件后同样命中；磁盘层同样有容量上限，
+    超出时按最近使用时间（命中时刷新文件修改时间）删除最旧的文件。
+
+    信号哈希按底层缓冲区记忆：同一数组（或其视图）重复分析时不会重新哈希。
+    缓存假定信号数组创建后不再被原地修改。所有方法线程安全。
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, disk_dir=None, disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # key -> (result, nbytes)
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._digests = {}  # (id(root), ptr, shape, strides, dtype) -> (weakref(root), digest)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            stale = self._read_disk_version() != CACHE_VERSION
+            for name in os.listdir(disk_dir):
+                # 上次异常退出遗留的临时文件；版本不符时删除全部缓存文件
+                if name.endswith(".tmp.npz") or (stale and name.endswith(".npz")):
+                    _remove(os.path.join(disk_dir, name))
+            if stale:
+                self._write_disk_version()
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            self._prune_disk()
+
+    # -----------------------------
+    # 键
+    def signal_digest(self, y):
+        """信号内容哈希"""
+        if isinstance(y, ChannelView):
+            # 内存映射文件：路径 + 修改时间 + 大小 + 通道即可唯一确定内容
+            st = os.stat(y.wav.path)
+            ident = f"{os.path.abspath(y.wav.path)}|{st.st_mtime_ns}|{st.st_size}|{y.index}"
+            return hashlib.blake2b(ident.encode(), digest_size=16).hexdigest()
+
+        y = np.asarray(y)
+        root = _root_array(y)
+        memo_key = (id(root), y.__array_interface__["data"][0], y.shape, y.strides, y.dtype.str)
+        with self._lock:
+            memo = self._digests.get(memo_key)
+        if memo is not None and memo[0]() is root:
+            return memo[1]
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{y.dtype.str}|{y.shape}".encode())
+        h.update(memoryview(np.ascontiguousarray(y)).cast("B"))
+        digest = h.hexdigest()
+
+        with self._lock:
+            self._digests = {k: v for k, v in self._digests.items() if v[0]() is not None}
+            self._digests[memo_key] = (weakref.ref(root), digest)
+        return digest
+
+    def make_key(self, func, y, sr, **params):
+        """缓存键：缓存版本 + 信号哈希 + 函数名 + 采样率 + 参数"""
+        param_text = repr(sorted(params.items()))
+        ident = f"v{CACHE_VERSION}|{func.__module__}.{func.__qualname__}|{sr}|{param_text}|{self.signal_digest(y)}"
+        return hashlib.blake2b(ident.encode(), digest_size=20).hexdigest()
+
+    # -----------------------------
+    # 读写
+    def lookup(self, key):
+        """查找结果，未命中返回 None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        result = self._load_disk(key)
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+                self._put_memory(key, result)
+                return result
+            self.misses += 1
+        return None
+
+    def store(self, key, result, disk=True):
+        """
+        保存结果
+
+        disk=False 时只放入内存（如滤波后的整段信号，不值得写盘）。
+        """
+        result = _freeze(result)
+        with self._lock:
+            self._put_memory(key, result)
+        if disk and self.disk_dir:
+            self._save_disk(key, result)
+        return result
+
+    def clear(self, disk=False):
+        """清空内存缓存；disk=True 时同时删除磁盘缓存文件"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.disk_dir:
+            for path, _, _ in self._disk_files():
+                _remove(path)
+            with self._lock:
+                self._disk_bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    # -----------------------------
+    # 内存层
+    def _put_memory(self, key, result):
+        size = _nbytes(result)
+        if size > self.max_bytes:
+            logger.debug(f"结果过大 ({size} 字节)，不放入内存缓存")
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    # -----------------------------
+    # 磁盘层
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _save_disk(self, key, result):
+        arrays = result if isinstance(result, tuple) else (result,)
+        tmp = self._disk_path(key) + ".tmp.npz"
+        try:
+            np.savez(tmp, *arrays, is_tuple=np.array(isinstance(result, tuple)))
+            size = os.path.getsize(tmp)
+            os.replace(tmp, self._disk_path(key))
+        except OSError as e:
+            logger.warning(f"写入磁盘缓存失败: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += size
+        self._prune_disk()
+
+    def _load_disk(self, key):
+        if not self.disk_dir or not os.path.exists(self._disk_path(key)):
+            return None
+        try:
+            with np.load(self._disk_path(key)) as data:
+                arrays = tuple(data[f"arr_{i}"] for i in range(len(data.files) - 1))
+                is_tuple = bool(data["is_tuple"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取磁盘缓存失败: {e}")
+            return None
+        try:
+            os.utime(self._disk_path(key))  # 刷新修改时间，作为最近使用时间
+        except OSError:
+            pass
+        logger.debug(f"磁盘缓存命中: {key}")
+        return _freeze(arrays if is_tuple else arrays[0])
+
+    def _read_disk_version(self):
+        try:
+            with open(os.path.join(self.disk_dir, _VERSION_FILE), encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk_version(self):
+        try:
+            with open(os.path.join(self.disk_dir, _VERSION_FILE), "w", encoding="utf-8") as f:
+                f.write(str(CACHE_VERSION))
+        except OSError as e:
+            logger.warning(f"写入磁盘缓存版本失败: {e}")
+
+    def _disk_files(self):
+        """磁盘缓存文件 [(路径, 大小, 修改时间)]，不含正在写入的临时文件"""
+        files = []
+        try:
+            names = os.listdir(self.disk_dir)
+        except OSError:
+            return files
+        for name in names:
+            if not name.endswith(".npz") or name.endswith(".tmp.npz"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _prune_disk(self):
+        """磁盘缓存超出容量时按修改时间从旧到新删除"""
+        with self._lock:
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            files = sorted(self._disk_files(), key=lambda f: f[2])
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for path, size, _ in files:
+                if total <= self.disk_max_bytes:
+                    break
+                if _remove(path):
+                    total -= size
+                    removed += 1
+            self._disk_bytes = total
+        logger.info(f"磁盘缓存超出容量，已删除 {removed} 个文件，剩余 {total} 字节")
+
+
+def _nbytes(result):
+    if isinstance(result, tuple):
+        return sum(np.asarray(r).nbytes for r in result)
+    return np.asarray(result).nbytes
+
+
+def _freeze(result):
+    """缓存中的数组设为只读，防止调用方原地修改污染缓存"""
+    items = result if isinstance(result, tuple) else (result,)
+    for item in items:
+        if isinstance(item, np.ndarray):
+            item.flags.writeable = False
+    return result
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError as e:
+        logger.warning(f"删除磁盘缓存文件失败: {e}")
+        return False
@@ -0,0 +1,124 @@
+import os
+import logging
+import warnings
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# 统计模式默认显示的分位数 (%)
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+
+def batch_compute(paths, load, compute, max_workers=None, progress=None):
+    """
+    对多个文件并行执行同一分析
+
+    numpy / scipy 的 FFT 与 libsndfile 读取都会释放 GIL，因此用线程池即可并行，
+    且各线程共享同一个 ResultCache，已缓存的文件直接命中。
+
+    Parameters
+    ----------
+    paths : list of str
+        文件路径
+    load : callable
+        load(path) -> (y, sr)，返回一维信号（或 None 表示跳过该文件）
+    compute : callable
+        compute(y, sr) -> (axis, values)
+    max_workers : int
+        线程数，默认为 CPU 核数
+    progress : callable
+        可选的进度回调 progress(fraction)，每完成一个文件调用一次
+
+    Returns
+    -------
+    dict
+        {path: (axis, values)}，按 paths 的顺序；读取或计算失败的文件不包含在内
+    """
+    def run(path):
+        loaded = load(path)
+        return None if loaded is None else compute(*loaded)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(run, path): path for path in paths}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"对比分析失败，已跳过: {path}: {e}")
+                else:
+                    if result is not None:
+                        results[path] = result
+                if progress is not None:
+                    progress(done / len(futures))
+        except BaseException:
+            # 进度回调抛出异常（如任务被取消）时放弃尚未开始的文件
+            for f in futures:
+                f.cancel()
+            raise
+    return {path: results[path] for path in paths if path in results}
+
+
+def align_results(results):
+    """
+    把各文件的 (axis, values) 对齐到同一坐标轴并堆叠
+
+    以点数最多的坐标轴为公共轴；坐标轴不同的结果（采样率或时长不同）线性插值，
+    超出其范围的部分为 NaN。
+
+    Returns
+    -------
+    axis : np.ndarray
+        公共坐标轴
+    stack : np.ndarray
+        (n_files, n_points)
+    """
+    results = list(results)
+    if not results:
+        raise ValueError("没有可对比的结果")
+    axis = max((np.asarray(a, dtype=np.float64) for a, _ in results), key=len)
+    stack = np.full((len(results), len(axis)), np.nan)
+    for i, (a, values) in enumerate(results):
+        a = np.asarray(a, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(a), -1)[:, 0]
+        if len(a) <= len(axis) and np.array_equal(a, axis[:len(a)]):
+            stack[i, :len(a)] = values
+        else:
+            stack[i] = np.interp(axis, a, values, left=np.nan, right=np.nan)
+    return axis, stack
+
+
+def compare_statistics(stack, percentiles=DEFAULT_PERCENTILES):
+    """
+    对多个文件的结果做一次向量化统计（沿文件轴，忽略 NaN）
+
+    Parameters
+    ----------
+    stack : np.ndarray
+        (n_files, n_points)，通常为 dB 值
+    percentiles : sequence of float
+        分位数 (%)
+
+    Returns
+    -------
+    dict
+        mean / min / max 为 (n_points,)，percentiles 为 (len(percentiles), n_points)
+    """
+    stack = np.asarray(stack, dtype=np.float64)
+    valid = ~np.isnan(stack)
+    count = valid.sum(axis=0)
+    total = np.where(valid, stack, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+    lo = np.where(count > 0, np.min(np.where(valid, stack, np.inf), axis=0), np.nan)
+    hi = np.where(count > 0, np.max(np.where(valid, stack, -np.inf), axis=0), np.nan)
+    if np.all(valid):
+        pct = np.percentile(stack, percentiles, axis=0)
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 全为 NaN 的列
+            pct = np.nanpercentile(stack, percentiles, axis=0)
+    return dict(mean=mean, min=lo, max=hi, percentiles=np.asarray(pct), levels=tuple(percentiles))
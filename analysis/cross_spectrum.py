@@ -0,0 +1,141 @@
+import numpy as np
+import logging
+
+from .fft_backend import FFTPlan
+from .fft_processor import frame_signal
+
+logger = logging.getLogger(__name__)
+
+FRF_ESTIMATORS = ("H1", "H2")
+
+
+def _density_scale(plan):
+    """单边功率谱密度的归一化系数（直流与奈奎斯特频点不加倍）"""
+    scale = np.full(len(plan.freqs), 2.0 / (plan.sr * plan.window_power))
+    scale[0] /= 2
+    if plan.n_fft % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+def welch_spectra(y, sr, reference=None, frame_size=4096, overlap=0.5, window="hann", backend="numpy",
+                  chunk_size=256, progress=None):
+    """
+    Welch 法自功率谱与互功率谱（全部通道共用一次分批 STFT）
+
+    每批帧对所有通道做一次批量 rfft，自谱累加 |X|²，互谱累加 conj(X_ref)·X，
+    运算量与通道数成线性关系。
+
+    Parameters
+    ----------
+    y : np.ndarray
+        一维或 (n_samples, n_channels) 信号
+    sr : int
+        采样率
+    reference : int
+        参考（输入）通道序号；None 时只计算自谱
+    frame_size : int
+        每帧大小
+    overlap : float
+        帧重叠比例 (0~1)
+    window : str
+        窗函数（见 fft_backend.WINDOWS）
+    backend : str
+        FFT 实现 "numpy" 或 "scipy"
+    chunk_size : int
+        每批 rfft 的帧数
+    progress : callable
+        可选的进度回调 progress(fraction)
+
+    Returns
+    -------
+    freqs : np.ndarray
+        频率轴
+    auto : np.ndarray
+        单边自功率谱密度 (单位²/Hz)，形状 (n_freqs,) 或 (n_freqs, n_channels)
+    cross : np.ndarray or None
+        参考通道与各通道的单边互功率谱密度 G_ref,c = E[conj(X_ref)·X_c]，
+        形状 (n_freqs, n_channels)，复数
+    """
+    y = np.asarray(y)
+    hop_size = int(frame_size * (1 - overlap))
+    frames = frame_signal(y, frame_size, hop_size)  # (n_frames, [n_channels,] frame_size)
+    if reference is not None and (y.ndim == 1 or not 0 <= reference < y.shape[1]):
+        raise ValueError("互谱需要多通道信号，且参考通道在范围内")
+    plan = FFTPlan(frame_size, sr, window=window, backend=backend)
+    n_frames = len(frames)
+    logger.info(f"Welch 谱: frame_size={frame_size}, overlap={overlap}, frames={n_frames}, window={window}")
+
+    auto = 0.0
+    cross = 0.0
+    for start in range(0, n_frames, chunk_size):
+        spectra = plan.transform(frames[start:start + chunk_size])
+        auto = auto + np.einsum("m...f,m...f->...f", spectra.real, spectra.real) \
+            + np.einsum("m...f,m...f->...f", spectra.imag, spectra.imag)
+        if reference is not None:
+            cross = cross + np.einsum("mf,mcf->cf", np.conj(spectra[:, reference]), spectra)
+        if progress is not None:
+            progress(min(start + chunk_size, n_frames) / n_frames)
+
+    scale = _density_scale(plan) / n_frames
+    auto = (auto * scale).T
+    cross = (cross * scale).T if reference is not None else None
+    return plan.freqs, auto, cross
+
+
+def compute_psd(y, sr, frame_size=4096, overlap=0.5, window="hann", backend="numpy", chunk_size=256,
+                progress=None):
+    """
+    Welch 法功率谱密度 (单位²/Hz)
+
+    Returns
+    -------
+    freqs : np.ndarray
+        频率轴
+    psd : np.ndarray
+        多通道时形状为 (n_freqs, n_channels)
+    """
+    freqs, auto, _ = welch_spectra(y, sr, None, frame_size, overlap, window, backend, chunk_size, progress)
+    return freqs, auto
+
+
+def compute_cross_spectra(y, sr, reference=0, frame_size=4096, overlap=0.5, window="hann", backend="numpy",
+                          chunk_size=256, progress=None):
+    """
+    参考通道对各通道的自谱与互谱，FRF 与相干函数都由它导出
+
+    Returns
+    -------
+    freqs : np.ndarray
+    auto : np.ndarray
+        (n_freqs, n_channels) 自功率谱密度
+    cross : np.ndarray
+        (n_freqs, n_channels) 互功率谱密度 G_ref,c（复数）
+    """
+    return welch_spectra(y, sr, reference, frame_size, overlap, window, backend, chunk_size, progress)
+
+
+def frequency_response(auto, cross, reference=0, estimator="H1"):
+    """
+    由自谱 / 互谱计算频响函数与相干函数（参考通道为输入）
+
+    H1 = G_xy / G_xx，适合输出端有噪声；H2 = G_yy / G_yx，适合输入端有噪声。
+
+    Returns
+    -------
+    frf : np.ndarray
+        (n_freqs, n_channels) 复数频响函数
+    coherence : np.ndarray
+        (n_freqs, n_channels) 常相干函数 |G_xy|² / (G_xx·G_yy)，取值 0~1
+    """
+    if estimator not in FRF_ESTIMATORS:
+        raise ValueError(f"未知频响估计方法: {estimator}")
+    g_xx = auto[:, reference:reference + 1]
+    tiny = np.finfo(np.float64).tiny
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if estimator == "H1":
+            frf = cross / np.maximum(g_xx, tiny)
+        else:
+            frf = auto / np.where(cross == 0, tiny, np.conj(cross))
+        coherence = np.abs(cross) ** 2 / np.maximum(g_xx * auto, tiny)
+    return frf, np.clip(coherence, 0.0, 1.0)
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class EnvelopePyramid:
+    """
+    信号的最小/最大值包络金字塔
+
+    第 0 层每 base_block 个采样取一次 min/max，之后每层把相邻两个块合并，
+    直到只剩一个块。绘图时按可见范围和像素宽度选择合适的层，
+    绘制开销只与屏幕宽度有关，与信号长度无关。
+
+    Parameters
+    ----------
+    y : np.ndarray or ChannelView
+        一维或 (n_samples, n_channels) 信号；按块读取，支持内存映射的懒加载视图
+    base_block : int
+        第 0 层每块的采样数
+    chunk_size : int
+        构建第 0 层时每次读取的采样数
+    progress : callable
+        可选的进度回调 progress(fraction)，每读取一块调用一次（长信号在后台线程中构建）
+    """
+
+    def __init__(self, y, base_block=64, chunk_size=1 << 20, progress=None):
+        self.y = y
+        self.base_block = base_block
+        self.n_samples = len(y)
+
+        chunk_size = max(base_block, chunk_size // base_block * base_block)
+        mins, maxs = [], []
+        for start in range(0, self.n_samples, chunk_size):
+            if progress is not None:
+                progress(start / self.n_samples)
+            seg = np.asarray(y[start:start + chunk_size])
+            idx = np.arange(0, len(seg), base_block)
+            mins.append(np.minimum.reduceat(seg, idx, axis=0))
+            maxs.append(np.maximum.reduceat(seg, idx, axis=0))
+
+        level_min = np.concatenate(mins) if mins else np.zeros((0,) + tuple(y.shape[1:]), np.float32)
+        level_max = np.concatenate(maxs) if maxs else level_min
+        self.levels = [(level_min, level_max)]
+        while len(level_min) > 1:
+            idx = np.arange(0, len(level_min), 2)
+            level_min = np.minimum.reduceat(level_min, idx, axis=0)
+            level_max = np.maximum.reduceat(level_max, idx, axis=0)
+            self.levels.append((level_min, level_max))
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes + M.nbytes for m, M in self.levels)
+
+    def block_size(self, level):
+        """第 level 层每块的采样数"""
+        return self.base_block << level
+
+    def global_range(self):
+        """整段信号的 (min, max)"""
+        top_min, top_max = self.levels[-1]
+        return float(np.min(top_min)), float(np.max(top_max))
+
+    def query(self, start, stop, max_points):
+        """
+        取 [start, stop) 区间用于绘图的数据
+
+        Parameters
+        ----------
+        start, stop : int
+            采样区间
+        max_points : int
+            最多需要的点数（通常为可见区域的像素宽度）
+
+        Returns
+        -------
+        positions : np.ndarray
+            每个点对应的起始采样序号
+        mins, maxs : np.ndarray
+            各点的最小值与最大值；区间足够短时返回原始采样，此时 mins 与 maxs 相同
+        """
+        start = max(0, int(start))
+        stop = min(self.n_samples, int(np.ceil(stop)))
+        if stop <= start:
+            empty = np.zeros((0,) + tuple(self.y.shape[1:]), np.float32)
+            return np.zeros(0, dtype=np.int64), empty, empty
+
+        span = stop - start
+        block = span // max_points
+        if block < self.base_block:
+            # 区间较短：直接读原始采样，必要时现场按更小的块求 min/max
+            raw = np.asarray(self.y[start:stop])
+            if block <= 1:
+                return np.arange(start, stop), raw, raw
+            idx = np.arange(0, span, block)
+            return (start + idx, np.minimum.reduceat(raw, idx, axis=0),
+                    np.maximum.reduceat(raw, idx, axis=0))
+
+        # 选块大小不超过 span / max_points 的最粗一层
+        level = min(int(np.log2(block // self.base_block)), len(self.levels) - 1)
+        block = self.block_size(level)
+        mins, maxs = self.levels[level]
+        first = start // block
+        last = min(-(-stop // block), len(mins))
+        return np.arange(first, last) * block, mins[first:last], maxs[first:last]
@@ -0,0 +1,136 @@
+import numpy as np
+import scipy.fft
+from functools import lru_cache
+from scipy.signal import get_window
+
+# 可选的 FFT 实现：numpy.fft 单线程；scipy.fft 支持 workers=-1 多线程批量变换
+BACKENDS = ("numpy", "scipy")
+# 窗函数名 -> scipy.signal.get_window 参数
+WINDOWS = {
+    "rectangular": "boxcar",
+    "hann": "hann",
+    "hamming": "hamming",
+    "blackman": "blackman",
+    "blackmanharris": "blackmanharris",
+    "flattop": "flattop",
+    "kaiser": ("kaiser", 8.6),
+}
+SCALINGS = ("amplitude", "energy")
+
+
+def make_window(name, n):
+    """
+    窗函数（周期窗，float32 只读）
+
+    Returns
+    -------
+    window : np.ndarray
+        窗函数
+    amplitude_correction : float
+        幅值修正系数 n / Σw，正弦信号的峰值幅度经修正后与矩形窗一致
+    energy_correction : float
+        能量修正系数 sqrt(n / Σw²)，宽带信号的 RMS 经修正后与矩形窗一致
+    """
+    if name not in WINDOWS:
+        raise ValueError(f"未知窗函数: {name}")
+    window = get_window(WINDOWS[name], n, fftbins=True)
+    amplitude = n / np.sum(window)
+    energy = np.sqrt(n / np.sum(window ** 2))
+    window = window.astype(np.float32)
+    window.flags.writeable = False
+    return window, float(amplitude), float(energy)
+
+
+@lru_cache(maxsize=64)
+def fft_window(name, n):
+    """按 (name, n) 缓存的 make_window，用于固定帧长的重复计算"""
+    return make_window(name, n)
+
+
+@lru_cache(maxsize=64)
+def rfft_freqs(n_fft, sr):
+    """rfft 频率轴（按 (n_fft, sr) 缓存，只读）"""
+    freqs = np.fft.rfftfreq(n_fft, 1 / sr)
+    freqs.flags.writeable = False
+    return freqs
+
+
+def fast_size(n):
+    """不小于 n 的快速 FFT 长度（因子只含 2、3、5 等小质数）"""
+    return scipy.fft.next_fast_len(int(n), real=True)
+
+
+def rfft(x, n=None, axis=-1, backend="numpy"):
+    """
+    实数 FFT
+
+    backend 为 "scipy" 时使用 scipy.fft 并以全部 CPU 核 (workers=-1) 做批量变换，
+    float32 输入按单精度计算。
+    """
+    if backend == "numpy":
+        return np.fft.rfft(x, n=n, axis=axis)
+    if backend == "scipy":
+        return scipy.fft.rfft(x, n=n, axis=axis, workers=-1)
+    raise ValueError(f"未知 FFT 后端: {backend}")
+
+
+class FFTPlan:
+    """
+    固定帧长的幅度谱计算方案
+
+    窗函数、修正系数与频率轴只在创建时计算一次，之后每批帧只做一次
+    加窗乘法与一次批量 rfft。
+
+    Parameters
+    ----------
+    frame_size : int
+        每帧大小
+    sr : int
+        采样率
+    window : str
+        窗函数名，见 WINDOWS；"rectangular" 不加窗
+    backend : str
+        "numpy" 或 "scipy"
+    pad : bool
+        True 时补零到不小于帧长的快速 FFT 长度
+    scaling : str
+        "amplitude"：正弦信号的谱峰为其幅值的一半（与不加窗的 |X|/N 一致）；
+        "energy"：按窗的能量归一化，适合宽带噪声
+    cache : bool
+        是否缓存窗函数与频率轴；单次 FFT 的帧长随信号长度变化，不缓存
+    """
+
+    def __init__(self, frame_size, sr, window="rectangular", backend="numpy", pad=False, scaling="amplitude",
+                 cache=True):
+        if backend not in BACKENDS:
+            raise ValueError(f"未知 FFT 后端: {backend}")
+        if scaling not in SCALINGS:
+            raise ValueError(f"未知幅值修正方式: {scaling}")
+        self.frame_size = frame_size
+        self.sr = sr
+        self.backend = backend
+        self.n_fft = fast_size(frame_size) if pad else frame_size
+        self.freqs = rfft_freqs(self.n_fft, sr) if cache else np.fft.rfftfreq(self.n_fft, 1 / sr)
+        if window == "rectangular":
+            self.window, amplitude, energy = None, 1.0, 1.0  # 不加窗，省去一次乘法
+        else:
+            self.window, amplitude, energy = (fft_window if cache else make_window)(window, frame_size)
+        correction = amplitude if scaling == "amplitude" else energy
+        self.scale = correction / frame_size
+        self.window_power = frame_size / energy ** 2  # Σw²，功率谱密度归一化用
+
+    def transform(self, frames):
+        """
+        加窗后的批量 rfft（复数谱，未归一化）
+
+        frames 形状为 (..., frame_size)，返回 (..., n_fft // 2 + 1)
+        """
+        if self.window is not None:
+            frames = frames * self.window
+        return rfft(frames, n=self.n_fft, axis=-1, backend=self.backend)
+
+    def magnitude(self, frames):
+        """批量计算幅度谱，形状同 transform"""
+        spectrum = np.abs(self.transform(frames))
+        spectrum *= self.scale
+        return spectrum
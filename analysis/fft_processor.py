@@ -1,17 +1,124 @@
 import numpy as np
 import logging
 
+from .fft_backend import FFTPlan
+from .weighting import frequency_weights, weighting_db
+
 logger = logging.getLogger(__name__)
 
 
-def compute_fft(y, sr, mode="single", frame_size=4096, overlap=0.5):
+def frame_signal(y, frame_size, hop_size):
+    """
+    将信号切分为重叠帧（零拷贝的 strided 视图）
+
+    Parameters
+    ----------
+    y : np.ndarray
+        音频信号，一维或形状为 (n_samples, n_channels)
+    frame_size : int
+        每帧大小
+    hop_size : int
+        帧移（相邻帧起点间隔）
+
+    Returns
+    -------
+    frames : np.ndarray
+        形状为 (n_frames, frame_size) 或 (n_frames, n_channels, frame_size) 的只读视图，
+        不复制原始数据
+    """
+    if hop_size <= 0:
+        raise ValueError("帧移必须大于 0，请检查 overlap 设置")
+    if len(y) < frame_size:
+        raise ValueError("音频过短，无法分帧计算")
+    return np.lib.stride_tricks.sliding_window_view(y, frame_size, axis=0)[::hop_size]
+
+
+def iter_frame_spectra(frames, chunk_size=256, plan=None):
+    """
+    分块批量计算各帧的幅度谱
+
+    每次只对 chunk_size 帧执行一次批量 rfft，内存占用与信号长度无关。
+
+    Parameters
+    ----------
+    frames : np.ndarray
+        形状为 (n_frames, ..., frame_size) 的帧矩阵（通常来自 frame_signal）
+    chunk_size : int
+        每批处理的帧数
+    plan : FFTPlan
+        可选的计算方案（窗函数、FFT 后端、补零），默认不加窗、numpy.fft
+
+    Yields
+    ------
+    spectra : np.ndarray
+        形状为 (<=chunk_size, ..., n_fft // 2 + 1) 的幅度谱
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size 必须大于 0")
+    frame_size = frames.shape[-1]
+    for start in range(0, len(frames), chunk_size):
+        chunk = frames[start:start + chunk_size]
+        if plan is None:
+            yield np.abs(np.fft.rfft(chunk, axis=-1)) / frame_size
+        else:
+            yield plan.magnitude(chunk)
+
+
+def reduce_spectra(spectra_iter, mode):
+    """
+    将分块幅度谱归约为平均谱或峰值保持谱
+
+    Parameters
+    ----------
+    spectra_iter : iterable of np.ndarray
+        iter_frame_spectra 的输出
+    mode : str
+        "average"（逐帧求和后平均）或 "peak"（逐帧取最大值）
+
+    Returns
+    -------
+    spectrum : np.ndarray
+        归约后的频谱
+    n_frames : int
+        参与归约的帧数
+    """
+    if mode not in ("average", "peak"):
+        raise ValueError(f"未知 FFT 模式: {mode}")
+
+    result = None
+    n_frames = 0
+    for spectra in spectra_iter:
+        n_frames += len(spectra)
+        if mode == "average":
+            block = spectra.sum(axis=0)
+            result = block if result is None else result + block
+        else:
+            block = spectra.max(axis=0)
+            result = block if result is None else np.maximum(result, block)
+
+    if mode == "average" and n_frames > 0:
+        result = result / n_frames
+    return result, n_frames
+
+
+def _with_progress(spectra_iter, n_frames, progress):
+    """在分块迭代过程中汇报进度 (0~1)"""
+    done = 0
+    for spectra in spectra_iter:
+        yield spectra
+        done += len(spectra)
+        progress(done / n_frames)
+
+
+def compute_fft(y, sr, mode="single", frame_size=4096, overlap=0.5, chunk_size=256, weighting=None,
+                window="rectangular", backend="numpy", pad=False, progress=None):
     """
     通用 FFT 分析函数
 
     Parameters
     ----------
     y : np.ndarray
-        音频信号
+        音频信号，一维或形状为 (n_samples, n_channels)（所有通道一次向量化计算）
     sr : int
         采样率
     mode : str
@@ -20,60 +127,58 @@ def compute_fft(y, sr, mode="single", frame_size=4096, overlap=0.5):
         每帧大小（仅 average/peak 有效）
     overlap : float
         帧重叠比例 (0~1)
+    chunk_size : int
+        每批 rfft 的帧数，用于限制内存占用（仅 average/peak 有效）
+    weighting : str
+        可选的频率计权 "A" / "C" / "Z"，频谱乘以预先计算的增益向量
+    window : str
+        窗函数（见 fft_backend.WINDOWS），按幅值修正
+    backend : str
+        FFT 实现 "numpy" 或 "scipy"（多线程）
+    pad : bool
+        是否补零到快速 FFT 长度（频率分辨率随之略微提高）
+    progress : callable
+        可选的进度回调 progress(fraction)，每处理完一批帧调用一次
 
     Returns
     -------
     freqs : np.ndarray
         频率轴
     spectrum : np.ndarray
-        频谱幅度
+        频谱幅度，多通道时形状为 (n_freqs, n_channels)
     """
+    y = np.asarray(y)
     n = len(y)
 
     # 单次 FFT
     if mode == "single":
-        freqs = np.fft.rfftfreq(n, 1 / sr)
-        fft_result = np.fft.rfft(y) / n
-        logger.info("执行单次 FFT")
-        return freqs, np.abs(fft_result)
+        # 单次 FFT 的长度随信号变化，窗函数与频率轴不缓存
+        plan = FFTPlan(n, sr, window=window, backend=backend, pad=pad, cache=False)
+        freqs = plan.freqs
+        logger.info(f"执行单次 FFT: n_fft={plan.n_fft}")
+        spectrum = np.moveaxis(plan.magnitude(np.moveaxis(y, 0, -1)), -1, 0)
+        if weighting is not None:
+            # 单次 FFT 的频点数随信号长度变化，增益向量不缓存
+            gain = 10 ** (weighting_db(freqs, weighting) / 20)
+            spectrum = spectrum * gain.reshape((-1,) + (1,) * (spectrum.ndim - 1))
+        return freqs, spectrum
+
+    if mode not in ("average", "peak"):
+        raise ValueError(f"未知 FFT 模式: {mode}")
 
     # 帧分割设置
     hop_size = int(frame_size * (1 - overlap))
-    n_frames = (len(y) - frame_size) // hop_size + 1
-    if n_frames <= 0:
-        raise ValueError("音频过短，无法分帧计算")
+    frames = frame_signal(y, frame_size, hop_size)
+    n_frames = len(frames)
 
     logger.info(f"执行 {mode} FFT: frame_size={frame_size}, overlap={overlap}, frames={n_frames}")
 
-    avg_spectrum = None
-    peak_spectrum = None
-    freqs = None
-
-    for i in range(n_frames):
-        start = i * hop_size
-        frame = y[start:start + frame_size]
-        if len(frame) < frame_size:
-            break
-
-        freqs = np.fft.rfftfreq(frame_size, 1 / sr)
-        fft_result = np.fft.rfft(frame) / frame_size
-        spectrum = np.abs(fft_result)
-
-        if mode == "average":
-            if avg_spectrum is None:
-                avg_spectrum = spectrum
-            else:
-                avg_spectrum += spectrum
-
-        elif mode == "peak":
-            if peak_spectrum is None:
-                peak_spectrum = spectrum
-            else:
-                peak_spectrum = np.maximum(peak_spectrum, spectrum)
-
-    if mode == "average":
-        return freqs, avg_spectrum / n_frames
-    elif mode == "peak":
-        return freqs, peak_spectrum
-    else:
-        raise ValueError(f"未知 FFT 模式: {mode}")
+    plan = FFTPlan(frame_size, sr, window=window, backend=backend, pad=pad)
+    spectra = iter_frame_spectra(frames, chunk_size, plan)
+    if progress is not None:
+        spectra = _with_progress(spectra, n_frames, progress)
+    spectrum, _ = reduce_spectra(spectra, mode)
+    if weighting is not None:
+        spectrum = spectrum * frequency_weights(plan.n_fft, sr, weighting)
+    # 多通道: (n_channels, n_freqs) -> (n_freqs, n_channels)，与输入的通道轴位置一致
+    return plan.freqs, spectrum.T
@@ -1,19 +1,19 @@
 import numpy as np
-from scipy.signal import butter, filtfilt
+from functools import lru_cache
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
 
-def butter_filter(y, sr, cutoff, btype='low', order=6):
+
+@lru_cache(maxsize=128)
+def design_butter(sr, cutoff, btype='low', order=6):
     """
-    通用 Butterworth 滤波器
+    设计 Butterworth 滤波器（二阶节 SOS 形式，按参数缓存）
     -------------------------
-    y      : numpy.array, 输入信号
     sr     : int, 采样率 (Hz)
-    cutoff : float or list, 截止频率
-             - 单值 float 用于低通或高通
-             - [f1, f2] list 用于带通
+    cutoff : float 或 (f1, f2) tuple, 截止频率（需可哈希）
     btype  : 'low', 'high', 'bandpass'
     order  : int, 滤波器阶数
     -------------------------
-    返回滤波后的信号 (numpy.array)
+    返回只读的 sos 系数 (numpy.array, 形状 (n_sections, 6))
     """
     nyq = 0.5 * sr  # 奈奎斯特频率
 
@@ -26,12 +26,96 @@ def butter_filter(y, sr, cutoff, btype='low', order=6):
     else:
         raise ValueError("btype 必须是 'low', 'high', 'bandpass'")
 
-    # 设计滤波器
-    b, a = butter(order, normal_cutoff, btype=btype, analog=False)
+    # SOS 形式在高阶、窄带或低截止频率时数值稳定，(b, a) 形式可能失稳
+    sos = butter(order, normal_cutoff, btype=btype, analog=False, output='sos')
+    sos.flags.writeable = False
+    return sos
+
+
+def butter_filter(y, sr, cutoff, btype='low', order=6, dtype=None):
+    """
+    通用 Butterworth 滤波器
+    -------------------------
+    y      : numpy.array, 输入信号（一维，或 (n_samples, n_channels) 多通道一次滤波）
+    sr     : int, 采样率 (Hz)
+    cutoff : float or list, 截止频率
+             - 单值 float 用于低通或高通
+             - [f1, f2] list 用于带通
+    btype  : 'low', 'high', 'bandpass'
+    order  : int, 滤波器阶数
+    dtype  : 计算精度，None 为 float64；np.float32 时不把整段信号提升为 float64，
+             内存减半、速度更快，但窄带或低截止频率时误差可达 1% 量级
+    -------------------------
+    返回滤波后的信号 (numpy.array)
+    """
+    if isinstance(cutoff, list):
+        cutoff = tuple(cutoff)
+    # 缓存的系数只读，scipy 需要可写数组，复制一份（只有几十个系数）
+    sos = design_butter(sr, cutoff, btype, order).astype(dtype or np.float64)
+
+    if dtype is not None:
+        y = np.asarray(y, dtype=dtype)
     # 零相位滤波，避免相位失真
-    y_filtered = filtfilt(b, a, y)
+    y_filtered = sosfiltfilt(sos, y, axis=0)
     return y_filtered
 
+class SosStreamingFilter:
+    """
+    有状态的分块 SOS 滤波器（因果）
+
+    块与块之间保存滤波器状态 zi，逐块处理的输出与对整段信号一次性 sosfilt 的结果完全一致。
+    子类只需设计好 sos 后调用本类的 __init__。
+    """
+
+    def __init__(self, sr, sos):
+        self.sr = sr
+        self.sos = np.array(sos, dtype=np.float64)
+        self._zi = None
+
+    def process(self, block):
+        """
+        滤波一块数据
+        -------------------------
+        block : numpy.array, 一维或 (n_samples, n_channels)，块之间通道数需一致
+        -------------------------
+        返回与 block 形状相同的滤波结果
+        """
+        block = np.asarray(block)
+        if self._zi is None:
+            # 零初始状态，等同于一次性 lfilter / sosfilt
+            self._zi = np.zeros((self.sos.shape[0], 2) + block.shape[1:])
+        y, self._zi = sosfilt(self.sos, block, axis=0, zi=self._zi)
+        return y.astype(block.dtype, copy=False)
+
+    def reset(self, initial=None):
+        """
+        清除滤波器状态
+        -------------------------
+        initial : 可选，下一块的首个采样值；给定时以稳态初始化，避免跳转 (seek) 后的瞬态
+        """
+        if initial is None:
+            self._zi = None
+        else:
+            x0 = np.asarray(initial, dtype=np.float64)
+            self._zi = sosfilt_zi(self.sos)[(...,) + (np.newaxis,) * x0.ndim] * x0
+
+
+class StreamingFilter(SosStreamingFilter):
+    """
+    有状态的分块 Butterworth 滤波器（因果）
+
+    与 butter_filter 使用同一套 SOS 设计，可用于长文件的流式分析、播放时的实时滤波等。
+    """
+
+    def __init__(self, sr, cutoff, btype='low', order=6):
+        if isinstance(cutoff, list):
+            cutoff = tuple(cutoff)
+        self.cutoff = cutoff
+        self.btype = btype
+        self.order = order
+        super().__init__(sr, design_butter(sr, cutoff, btype, order))
+
+
 # ===============================
 # 测试代码（直接运行 filter.py）
 if __name__ == "__main__":
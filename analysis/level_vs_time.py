@@ -1,27 +1,175 @@
 import numpy as np
+from scipy.signal import lfilter
 
-def compute_level_vs_time(y, sr, frame_length=0.125, p0=1.0):
+from .weighting import WeightingFilter
+
+# 声级计标准时间计权的时间常数 (秒)
+TIME_CONSTANTS = {"fast": 0.125, "slow": 1.0}
+# Impulse 计权：35 ms 上升，峰值按 1.5 s 时间常数衰减
+IMPULSE_RISE = 0.035
+IMPULSE_DECAY = 1.5
+TIME_WEIGHTINGS = ("fast", "slow", "impulse")
+
+
+def _to_db(mean_square, p0):
+    return 20 * np.log10(np.sqrt(mean_square) / p0 + 1e-12)  # 避免 log(0)
+
+
+class TimeWeightedLevel:
+    """
+    指数时间计权声级（声级计的 Fast / Slow / Impulse）
+
+    对信号平方做单极点递归平均（Fast τ=125 ms，Slow τ=1 s）；Impulse 为
+    τ=35 ms 的平均再接 1.5 s 衰减的峰值检波。峰值检波用累积最大值向量化：
+    p[n] = max_m x[m]·d^(n-m) = d^n · max_m (x[m]·d^-m)，按子块计算以免 d^-m 溢出。
+    滤波器与检波状态在块间保持，可逐块输入任意长的信号。
+
+    Parameters
+    ----------
+    sr : int
+        采样率
+    mode : str
+        "fast"、"slow" 或 "impulse"
+    hop_length : float
+        输出间隔 (秒)，每隔 hop_length 读取一次计权声级
+    p0 : float
+        参考值（1.0 表示 dBFS；20e-6 表示 dB SPL）
+    """
+
+    def __init__(self, sr, mode="fast", hop_length=0.125, p0=1.0):
+        mode = mode.lower()
+        if mode not in TIME_WEIGHTINGS:
+            raise ValueError(f"未知时间计权: {mode}")
+        self.sr = sr
+        self.mode = mode
+        self.p0 = p0
+        self.hop_size = max(1, int(round(hop_length * sr)))
+        tau = IMPULSE_RISE if mode == "impulse" else TIME_CONSTANTS[mode]
+        alpha = 1.0 - np.exp(-1.0 / (tau * sr))
+        self._b = np.array([alpha])
+        self._a = np.array([1.0, alpha - 1.0])
+        self._log_decay = -1.0 / (IMPULSE_DECAY * sr)
+        # 峰值检波子块内的衰减序列 d^m（m < 10·1.5 s，d^-m 不超过 e^10）
+        self._decay = None
+        if mode == "impulse":
+            self._decay = np.exp(np.arange(int(10 * IMPULSE_DECAY * sr)) * self._log_decay)
+        self.reset()
+
+    def reset(self):
+        """清除滤波器与检波状态"""
+        self._zi = None
+        self._peak = None  # 上一采样的峰值（均方值）
+        self._offset = 0  # 已处理的采样数
+
+    def process(self, block):
+        """
+        输入一块数据，返回这段时间内的读数
+
+        Returns
+        -------
+        times : np.ndarray
+            读数时刻 (秒)，即每个输出间隔的末尾
+        levels : np.ndarray
+            计权声级 (dB)，多通道时形状为 (n, n_channels)
+        """
+        x = np.asarray(block, dtype=np.float64)
+        if self._zi is None:
+            self._zi = np.zeros((1,) + x.shape[1:])
+        ms, self._zi = lfilter(self._b, self._a, x ** 2, axis=0, zi=self._zi)
+
+        if self.mode == "impulse":
+            for start in range(0, len(ms), len(self._decay)):
+                self._hold_peak(ms[start:start + len(self._decay)])
+
+        first = (self.hop_size - 1 - self._offset) % self.hop_size
+        idx = np.arange(first, len(ms), self.hop_size)
+        times = (self._offset + idx + 1) / self.sr
+        self._offset += len(ms)
+        return times, _to_db(ms[idx], self.p0)
+
+    def _hold_peak(self, ms):
+        """对一段均方值原地做指数衰减的峰值保持"""
+        decay = self._decay[:len(ms)].reshape((-1,) + (1,) * (ms.ndim - 1))
+        held = np.maximum.accumulate(ms / decay, axis=0)
+        if self._peak is not None:
+            np.maximum(held, self._peak * np.exp(self._log_decay), out=held)
+        np.multiply(held, decay, out=ms)
+        self._peak = ms[-1].copy()
+
+
+def _frame_mean_square(seg, frame_size, hop_size, n):
+    """seg 开头 n 帧的均方值；非重叠帧用 reshape，重叠帧用累积和"""
+    if hop_size == frame_size:
+        frames = seg[:n * frame_size].reshape(n, frame_size, *seg.shape[1:])
+        return np.einsum("ij...,ij...->i...", frames, frames, dtype=np.float64) / frame_size
+    seg = seg[:(n - 1) * hop_size + frame_size]
+    csum = np.concatenate([np.zeros((1,) + seg.shape[1:]), np.cumsum(np.square(seg, dtype=np.float64), axis=0)])
+    starts = np.arange(n) * hop_size
+    return np.maximum(csum[starts + frame_size] - csum[starts], 0.0) / frame_size
+
+
+def compute_level_vs_time(y, sr, frame_length=0.125, p0=1.0, time_weighting=None, hop_length=None,
+                          weighting=None, chunk_size=1 << 20, progress=None):
     """
     计算 Level vs Time 曲线
-    :param y: 音频信号 (numpy array)
+    :param y: 音频信号 (numpy array)，一维或 (n_samples, n_channels)
     :param sr: 采样率
-    :param frame_length: 每帧时长 (秒)
+    :param frame_length: 每帧时长 (秒)，仅用于不计权的分帧 RMS
     :param p0: 参考值 (默认=1.0, 表示 dBFS；设为 20e-6 表示 dB SPL)
-    :return: times, levels (numpy arrays)
+    :param time_weighting: None 为分帧 RMS（等效声级）；"fast" / "slow" / "impulse" 为声级计时间计权
+    :param hop_length: 输出间隔 (秒)，默认等于 frame_length；小于帧长时帧之间重叠
+    :param weighting: 可选的频率计权 "A" / "C" / "Z"，先做时域计权滤波再求声级
+    :param chunk_size: 每次处理的采样数，内存占用与信号长度无关
+    :param progress: 可选的进度回调 progress(fraction)
+    :return: times, levels (numpy arrays)，多通道时 levels 形状为 (n_frames, n_channels)
     """
+    hop_length = frame_length if hop_length is None else hop_length
+    n_samples = len(y)
+    weighting_filter = None if weighting is None else WeightingFilter(sr, weighting)
+
+    def blocks(size):
+        for start in range(0, n_samples, size):
+            if progress is not None:
+                progress(start / n_samples)
+            block = np.asarray(y[start:start + size])
+            if weighting_filter is not None:
+                block = weighting_filter.process(block.astype(np.float64))
+            yield block
+
+    if time_weighting is not None:
+        meter = TimeWeightedLevel(sr, time_weighting, hop_length=hop_length, p0=p0)
+        times, levels = [], []
+        for block in blocks(chunk_size):
+            t, level = meter.process(block)
+            times.append(t)
+            levels.append(level)
+        if not levels:
+            return np.zeros(0), np.zeros((0,) + tuple(y.shape[1:]))
+        return np.concatenate(times), np.concatenate(levels)
+
     frame_size = int(frame_length * sr)
-    num_frames = len(y) // frame_size
+    hop_size = int(hop_length * sr)
+    if frame_size <= 0 or hop_size <= 0:
+        raise ValueError("frame_length / hop_length 过短")
+    num_frames = (n_samples - frame_size) // hop_size + 1 if n_samples >= frame_size else 0
 
+    # 按顺序读入数据块，buf 保存从 buf_start 开始尚未用完的采样；
+    # 块长取帧移的整数倍，非重叠帧时块之间没有剩余，不需要拼接
     levels = []
-    times = []
-
-    for i in range(num_frames):
-        frame = y[i*frame_size:(i+1)*frame_size]
-        if len(frame) == 0:
-            continue
-        rms = np.sqrt(np.mean(frame**2))
-        level = 20 * np.log10(rms / p0 + 1e-12)  # 避免 log(0)
-        levels.append(level)
-        times.append(i * frame_length)
-
-    return np.array(times), np.array(levels)
+    buf, buf_start, end, done = None, 0, 0, 0
+    for block in blocks(max(hop_size, chunk_size // hop_size * hop_size)):
+        buf = block if buf is None or len(buf) == 0 else np.concatenate([buf, block])
+        end += len(block)
+        if end >= frame_size:
+            n = min(num_frames, (end - frame_size) // hop_size + 1) - done
+            if n > 0:
+                seg = buf[done * hop_size - buf_start:]
+                levels.append(_to_db(_frame_mean_square(seg, frame_size, hop_size, n), p0))
+                done += n
+        # 丢弃下一帧起点之前的数据
+        next_start = min(done * hop_size, end)
+        buf = buf[next_start - buf_start:]
+        buf_start = next_start
+
+    times = np.arange(num_frames) * hop_length
+    return times, np.concatenate(levels) if levels else np.zeros((0,) + tuple(y.shape[1:]))
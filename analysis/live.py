@@ -0,0 +1,368 @@
+import numpy as np
+import soundfile as sf
+import threading
+import time
+import logging
+
+from .streaming import StreamingSpectrum, StreamingLevel
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """
+    单生产者 / 单消费者的无锁环形缓冲区
+
+    生产者（音频回调线程）写数据前先发布将要写到的位置 writing，写完后再更新累计写入数 written；
+    消费者按自己的读取位置取出新数据，复制后根据 writing 判断哪些采样在复制期间可能已被覆盖
+    （包括正在写入的一块），两边不共享锁，回调不会因界面线程阻塞。
+    消费者落后超过容量时，被覆盖的采样计入 dropped。
+
+    Parameters
+    ----------
+    capacity : int
+        容量 (采样数)
+    channels : int
+        通道数
+    """
+
+    def __init__(self, capacity, channels=1):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._data = np.zeros((self.capacity, channels), dtype=np.float32)
+        self.written = 0  # 累计写完的采样数（只由生产者修改）
+        self.writing = 0  # 正在写入的块的结束位置，写入前发布（只由生产者修改）
+
+    def write(self, block):
+        """写入一块 (n, channels) 数据（生产者调用）"""
+        n = len(block)
+        if n > self.capacity:
+            block = block[-self.capacity:]
+        self.writing = self.written + n  # 先发布，消费者据此排除正在被覆盖的区间
+        start = (self.written + n - len(block)) % self.capacity
+        first = min(len(block), self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        self._data[:len(block) - first] = block[first:]
+        self.written += n  # 数据写完后才发布
+
+    def read(self, position):
+        """
+        读取 position 之后写入的全部数据（消费者调用）
+
+        Returns
+        -------
+        data : np.ndarray
+            (n, channels) 新数据的副本
+        position : int
+            新的读取位置
+        dropped : int
+            因消费者落后被覆盖、未能读到的采样数
+        """
+        end = self.written
+        dropped = max(0, end - position - self.capacity)
+        start = position + dropped
+        idx = np.arange(start, end) % self.capacity
+        data = self._data[idx]
+        # 复制期间生产者可能已经绕回覆盖（或正在覆盖）开头的数据
+        overwritten = min(self.writing - start - self.capacity, len(data))
+        if overwritten > 0:
+            data = data[overwritten:]
+            dropped += overwritten
+        return data, end, dropped
+
+
+class _PacedStream:
+    """按实时速率调用回调的模拟输入流（接口与 sd.InputStream 相同的子集）"""
+
+    def __init__(self, samplerate, channels=1, blocksize=1024, callback=None, dtype="float32", **kwargs):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.active = False
+        self._thread = None
+
+    @property
+    def time(self):
+        return time.monotonic()
+
+    def start(self):
+        self.active = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    abort = stop
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        period = self.blocksize / self.samplerate
+        next_time = time.monotonic()
+        while self.active:
+            self.callback(self._next_block(), self.blocksize, None, None)
+            next_time += period
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def _next_block(self):
+        raise NotImplementedError
+
+
+class SyntheticInputStream(_PacedStream):
+    """
+    合成信号输入（无声卡时代替 sd.InputStream）
+
+    每个通道是若干正弦与白噪声之和，第 c 个通道的频率乘以 (c + 1)。
+    """
+
+    def __init__(self, samplerate, channels=1, blocksize=1024, callback=None, freqs=(100.0, 1000.0),
+                 amplitude=0.3, noise=0.01, **kwargs):
+        super().__init__(samplerate, channels, blocksize, callback)
+        self.freqs = np.asarray(freqs, dtype=np.float64)
+        self.amplitude = amplitude
+        self.noise = noise
+        self._n = 0
+        self._rng = np.random.default_rng()
+
+    def _next_block(self):
+        t = (self._n + np.arange(self.blocksize)) / self.samplerate
+        self._n += self.blocksize
+        scale = np.arange(1, self.channels + 1)
+        phase = 2 * np.pi * t[:, None, None] * self.freqs[None, None, :] * scale[None, :, None]
+        block = self.amplitude * np.sin(phase).sum(axis=-1) / len(self.freqs)
+        block += self.noise * self._rng.standard_normal(block.shape)
+        return block.astype(np.float32)
+
+
+def _fit_channels(block, channels):
+    """通道数多于数据时补零，少于数据时只取前几个通道"""
+    block = block.reshape(len(block), -1)
+    out = np.zeros((len(block), channels), dtype=np.float32)
+    n_ch = min(channels, block.shape[1])
+    out[:, :n_ch] = block[:, :n_ch]
+    return out
+
+
+class FileInputStream(_PacedStream):
+    """以文件回放代替声卡输入（按实时速率按块读取，读到结尾后从头循环）"""
+
+    def __init__(self, path, samplerate=None, channels=1, blocksize=1024, callback=None, **kwargs):
+        self._file = sf.SoundFile(path)
+        super().__init__(samplerate or self._file.samplerate, channels, blocksize, callback)
+
+    def _next_block(self):
+        block = self._file.read(self.blocksize, dtype="float32", always_2d=True)
+        if len(block) < self.blocksize:
+            self._file.seek(0)
+            block = np.concatenate([block, self._file.read(self.blocksize - len(block), dtype="float32",
+                                                           always_2d=True)])
+        return _fit_channels(block, self.channels)
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class ArrayInputStream(_PacedStream):
+    """以已加载的信号（数组或懒加载视图）循环回放代替声卡输入"""
+
+    def __init__(self, data, samplerate, channels=1, blocksize=1024, callback=None, **kwargs):
+        super().__init__(samplerate, channels, blocksize, callback)
+        if len(data) == 0:
+            raise ValueError("回放信号为空")
+        self.data = data
+        self._pos = 0
+
+    def _next_block(self):
+        parts = []
+        remaining = self.blocksize
+        while remaining:
+            part = np.asarray(self.data[self._pos:self._pos + remaining], dtype=np.float32)
+            parts.append(part)
+            remaining -= len(part)
+            self._pos = (self._pos + len(part)) % len(self.data)
+        return _fit_channels(np.concatenate(parts), self.channels)
+
+
+class LiveMonitor:
+    """
+    实时输入监测
+
+    输入流回调只把数据块写入 RingBuffer；界面定时调用 poll() 取出新数据，
+    用 StreamingSpectrum（与 compute_fft 分帧一致）与 StreamingLevel（与
+    compute_level_vs_time 一致）增量计算，维护滚动平均谱、峰值保持谱、
+    Level vs Time 曲线与滚动声谱图。
+
+    Parameters
+    ----------
+    sr : int
+        采样率
+    channels : int
+        通道数
+    stream_factory : callable
+        创建输入流的工厂，默认 sd.InputStream；可用 SyntheticInputStream、FileInputStream、
+        ArrayInputStream（functools.partial 绑定数据源）代替
+    blocksize : int
+        每次回调的采样数
+    buffer_seconds : float
+        环形缓冲区时长，界面卡顿不超过该时长时不丢数据
+    frame_size : int
+        FFT 帧长
+    overlap : float
+        帧重叠比例
+    window : str
+        窗函数（见 fft_backend.WINDOWS）
+    average_frames : int
+        滚动平均谱的帧数
+    frame_length : float
+        Level vs Time 帧时长 (秒)
+    history_seconds : float
+        Level vs Time 与声谱图显示的时长
+    """
+
+    def __init__(self, sr, channels=1, stream_factory=None, blocksize=1024, buffer_seconds=10.0, frame_size=4096,
+                 overlap=0.5, window="hann", average_frames=16, frame_length=0.125, history_seconds=30.0):
+        self.sr = sr
+        self.channels = channels
+        self.stream_factory = stream_factory
+        self.blocksize = blocksize
+        self.frame_length = frame_length
+        self.buffer = RingBuffer(int(buffer_seconds * sr), channels)
+        self._spectrum = StreamingSpectrum(sr, mode="peak", frame_size=frame_size, overlap=overlap, window=window)
+        self._level = StreamingLevel(sr, frame_length=frame_length, accumulate=False)  # 历史由 _levels 滚动保存
+        self.freqs = self._spectrum.freqs
+        self.hop_size = self._spectrum.hop_size
+        n_freqs = len(self.freqs)
+
+        # 滚动平均：最近 average_frames 帧的幅度谱
+        self._recent = np.zeros((average_frames, channels, n_freqs), dtype=np.float32)
+        self._n_recent = 0
+        # 声谱图：第一个通道最近 history_seconds 的各帧 (dB)
+        self.spectrogram_columns = max(1, int(history_seconds * sr / self.hop_size))
+        self._columns = np.full((self.spectrogram_columns, n_freqs), -120.0, dtype=np.float32)
+        self._n_columns = 0
+        # Level vs Time：最近 history_seconds 的声级
+        self._levels = np.full((max(1, int(history_seconds / frame_length)), channels), np.nan)
+        self._n_levels = 0
+
+        self._stream = None
+        self._read_pos = 0
+        self.dropped = 0  # 界面来不及读取而被覆盖的采样数
+        self.overflows = 0  # 输入流报告的溢出次数
+
+    # -----------------------------
+    # 输入流
+    def start(self):
+        factory = self.stream_factory
+        if factory is None:
+            import sounddevice as sd  # 只有使用声卡时才需要
+            factory = sd.InputStream
+        self._read_pos = self.buffer.written
+        self._stream = factory(samplerate=self.sr, channels=self.channels, blocksize=self.blocksize,
+                               dtype="float32", callback=self._callback)
+        self._stream.start()
+        logger.info(f"开始实时监测: 采样率={self.sr}, 通道={self.channels}")
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+            logger.info(f"停止实时监测: 丢失 {self.dropped} 个采样, 溢出 {self.overflows} 次")
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def _callback(self, indata, frames, time_info, status):
+        # 音频线程：只复制数据块，不做任何计算
+        if status:
+            self.overflows += 1
+        self.buffer.write(indata)
+
+    # -----------------------------
+    # 分析（界面线程定时调用）
+    def poll(self):
+        """
+        处理自上次调用以来的新数据
+
+        Returns
+        -------
+        int
+            新处理的采样数
+        """
+        data, self._read_pos, dropped = self.buffer.read(self._read_pos)
+        if dropped:
+            self.dropped += dropped
+            logger.warning(f"实时监测处理不及时，丢失 {dropped} 个采样")
+        if len(data) == 0:
+            return 0
+
+        spectra = self._spectrum.update(data)  # (n_new, channels, n_freqs)
+        if len(spectra):
+            self._push_spectra(spectra)
+        levels = self._level.update(data)
+        if len(levels):
+            self._push_rows("_levels", "_n_levels", levels)
+        return len(data)
+
+    def _push_spectra(self, spectra):
+        k = len(self._recent)
+        recent = spectra[-k:]
+        slots = (self._n_recent + np.arange(len(recent))) % k
+        self._recent[slots] = recent
+        self._n_recent += len(recent)
+        columns = 20 * np.log10(spectra[:, 0] + 1e-12)
+        self._push_rows("_columns", "_n_columns", columns)
+
+    def _push_rows(self, name, count_name, rows):
+        """把新行写入按时间滚动的环形数组"""
+        history = getattr(self, name)
+        rows = rows[-len(history):]
+        count = getattr(self, count_name)
+        history[(count + np.arange(len(rows))) % len(history)] = rows
+        setattr(self, count_name, count + len(rows))
+
+    def _ordered(self, history, count):
+        """环形数组按时间顺序排列（最新的在最后）"""
+        return np.roll(history, -(count % len(history)), axis=0)
+
+    # -----------------------------
+    # 显示数据
+    def average_spectrum(self):
+        """滚动平均谱 (n_freqs, channels)"""
+        n = min(self._n_recent, len(self._recent))
+        if n == 0:
+            return np.zeros((len(self.freqs), self.channels))
+        return self._recent[:n].mean(axis=0).T
+
+    def peak_spectrum(self):
+        """开始（或 reset_peak）以来的峰值保持谱 (n_freqs, channels)"""
+        if self._spectrum.n_frames == 0:
+            return np.zeros((len(self.freqs), self.channels))
+        return self._spectrum.result()[1]
+
+    def reset_peak(self):
+        self._spectrum.reset()
+
+    def level_history(self):
+        """
+        Returns
+        -------
+        times : np.ndarray
+            相对于当前时刻的时间 (秒，≤ 0)
+        levels : np.ndarray
+            (n, channels) 声级 (dBFS)，尚无数据的位置为 NaN
+        """
+        levels = self._ordered(self._levels, self._n_levels)
+        times = (np.arange(len(levels)) - len(levels) + 1) * self.frame_length
+        return times, levels
+
+    def spectrogram(self):
+        """第一个通道的滚动声谱图 (n_columns, n_freqs)，最新的一帧在最后"""
+        return self._ordered(self._columns, self._n_columns)
@@ -0,0 +1,312 @@
+import os
+import sqlite3
+import logging
+import threading
+import numpy as np
+import soundfile as sf
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .audio_io import AUDIO_EXTENSIONS, MappedWav, all_channels
+
+logger = logging.getLogger(__name__)
+
+# 概览包络的点数（每点为一段采样的 min/max）
+OVERVIEW_POINTS = 1024
+# 元数据库默认位置（与分析结果磁盘缓存同一目录）
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".nvh_cache", "metadata.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    samplerate INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    format TEXT,
+    subtype TEXT,
+    overview_min BLOB,
+    overview_max BLOB,
+    rms BLOB,
+    peak BLOB
+)
+"""
+_COLUMNS = ("path", "mtime_ns", "size", "samplerate", "channels", "frames", "format", "subtype",
+            "overview_min", "overview_max", "rms", "peak")
+
+
+class AudioMetadata:
+    """
+    音频文件的头信息与概览
+
+    头信息只需读取文件头 (sf.info)；概览（min/max 包络、各通道 RMS 与峰值）
+    需要读一遍数据，计算一次后与头信息一起保存在 MetadataIndex 中。
+
+    Attributes
+    ----------
+    path : str
+        绝对路径
+    mtime_ns, size : int
+        文件修改时间与大小，用于判断缓存是否过期
+    samplerate, channels, frames : int
+    format, subtype : str
+        容器格式与编码（如 WAV / PCM_16）
+    overview_min, overview_max : np.ndarray or None
+        (n_points, channels) 概览包络
+    rms, peak : np.ndarray or None
+        (channels,) 整段信号的 RMS 与峰值绝对值
+    """
+
+    def __init__(self, path, mtime_ns, size, samplerate, channels, frames, format=None, subtype=None,
+                 overview_min=None, overview_max=None, rms=None, peak=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = frames
+        self.format = format
+        self.subtype = subtype
+        self.overview_min = overview_min
+        self.overview_max = overview_max
+        self.rms = rms
+        self.peak = peak
+
+    @property
+    def duration(self):
+        return self.frames / self.samplerate if self.samplerate else 0.0
+
+    @property
+    def has_overview(self):
+        return self.rms is not None
+
+    @property
+    def decoded_bytes(self):
+        """整体解码为 float32 后的大小"""
+        return self.frames * self.channels * 4
+
+    def summary(self):
+        """供文件列表显示的多行文字"""
+        lines = [f"采样率：{self.samplerate} Hz", f"时长：{self.duration:.2f} 秒", f"通道：{self.channels}",
+                 f"格式：{self.format} / {self.subtype}"]
+        if self.has_overview:
+            rms_db = 20 * np.log10(np.max(self.rms) + 1e-12)
+            peak_db = 20 * np.log10(np.max(self.peak) + 1e-12)
+            lines.append(f"RMS：{rms_db:.1f} dBFS，峰值：{peak_db:.1f} dBFS")
+        return "\n".join(lines)
+
+
+def read_header(path):
+    """只读取文件头，得到不含概览的 AudioMetadata"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    info = sf.info(path)
+    return AudioMetadata(path, st.st_mtime_ns, st.st_size, info.samplerate, info.channels, info.frames,
+                         info.format, info.subtype)
+
+
+def _iter_blocks(path, blocksize):
+    """按块读取全部通道：PCM WAV 走内存映射，其它格式由 soundfile 逐块解码"""
+    if path.lower().endswith(".wav"):
+        try:
+            wav = MappedWav(path)
+        except ValueError:
+            wav = None
+        if wav is not None:
+            try:
+                yield from all_channels(wav).iter_blocks(blocksize)
+            finally:
+                wav.close()
+            return
+    with sf.SoundFile(path) as f:
+        yield from f.blocks(blocksize=blocksize, dtype="float32", always_2d=True)
+
+
+def compute_overview(path, frames, channels, n_points=OVERVIEW_POINTS, blocksize=1 << 20):
+    """
+    一次顺序读取计算概览包络、RMS 与峰值
+
+    Returns
+    -------
+    overview_min, overview_max : np.ndarray
+        (n_points, channels) 包络（文件较短时点数更少）
+    rms, peak : np.ndarray
+        (channels,)
+    """
+    bin_size = max(1, -(-frames // n_points))
+    blocksize = max(bin_size, blocksize // bin_size * bin_size)  # 块边界与包络分段对齐
+    mins, maxs = [], []
+    sum_sq = np.zeros(channels)
+    peak = np.zeros(channels)
+    n = 0
+    for block in _iter_blocks(path, blocksize):
+        if len(block) == 0:
+            continue
+        idx = np.arange(0, len(block), bin_size)
+        mins.append(np.minimum.reduceat(block, idx, axis=0))
+        maxs.append(np.maximum.reduceat(block, idx, axis=0))
+        sum_sq += np.einsum("ij,ij->j", block, block, dtype=np.float64)
+        peak = np.maximum(peak, np.max(np.abs(block), axis=0))
+        n += len(block)
+    if n == 0:
+        empty = np.zeros((0, channels), dtype=np.float32)
+        return empty, empty, np.zeros(channels), peak
+    return (np.concatenate(mins).astype(np.float32), np.concatenate(maxs).astype(np.float32),
+            np.sqrt(sum_sq / n), peak.astype(np.float64))
+
+
+def find_audio_files(directory, recursive=True):
+    """目录下的音频文件（按路径排序）"""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in files if name.lower().endswith(AUDIO_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(found)
+
+
+class MetadataIndex:
+    """
+    音频文件元数据索引（本地 SQLite 数据库）
+
+    以「路径 + 修改时间 + 大小」判断缓存是否有效：文件未变化时直接返回保存的
+    头信息与概览，不打开音频；变化或新文件才重新读取。目录扫描用线程池并行，
+    libsndfile 读取时释放 GIL。所有方法线程安全。
+
+    Parameters
+    ----------
+    db_path : str
+        数据库文件路径；":memory:" 为不落盘的临时索引
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------
+    # 查询
+    def cached(self, path):
+        """数据库中与文件当前状态一致的记录，没有或已过期时返回 None"""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None or row[1] != st.st_mtime_ns or row[2] != st.st_size:
+            return None
+        return _from_row(row)
+
+    def get(self, path, overview=False):
+        """
+        文件的元数据（优先使用缓存）
+
+        overview=True 时保证结果包含概览，缺少时读取整个文件计算一次。
+        """
+        meta = self.cached(path)
+        if meta is None:
+            meta = read_header(path)
+        elif not overview or meta.has_overview:
+            return meta
+        if overview and not meta.has_overview:
+            meta.overview_min, meta.overview_max, meta.rms, meta.peak = compute_overview(
+                meta.path, meta.frames, meta.channels)
+        self._store(meta)
+        return meta
+
+    def iter_scan(self, paths, overview=False, max_workers=None):
+        """
+        并行获取多个文件的元数据，按完成顺序产出 (path, metadata 或 Exception)
+
+        已缓存的文件不进入线程池，立即产出。
+        """
+        pending = []
+        for path in paths:
+            meta = self.cached(path)
+            if meta is not None and (not overview or meta.has_overview):
+                yield path, meta
+            else:
+                pending.append(path)
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            futures = {pool.submit(self.get, path, overview): path for path in pending}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result()
+                    except Exception as e:
+                        logger.warning(f"读取元数据失败: {futures[future]}: {e}")
+                        yield futures[future], e
+            finally:
+                for f in futures:
+                    f.cancel()
+
+    def scan(self, paths, overview=False, max_workers=None):
+        """并行获取多个文件的元数据，返回 {path: metadata}（读取失败的文件不包含在内）"""
+        return {path: meta for path, meta in self.iter_scan(paths, overview, max_workers)
+                if isinstance(meta, AudioMetadata)}
+
+    def scan_directory(self, directory, recursive=True, overview=False, max_workers=None):
+        """扫描目录下的全部音频文件"""
+        paths = find_audio_files(directory, recursive)
+        logger.info(f"扫描目录: {directory}, 文件数={len(paths)}")
+        return self.scan(paths, overview, max_workers)
+
+    # -----------------------------
+    # 维护
+    def forget(self, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(path),))
+            self._conn.commit()
+
+    def prune(self):
+        """删除已不存在的文件的记录，返回删除条数"""
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM files")]
+            missing = [(p,) for p in paths if not os.path.exists(p)]
+            self._conn.executemany("DELETE FROM files WHERE path = ?", missing)
+            self._conn.commit()
+        return len(missing)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _store(self, meta):
+        row = (meta.path, meta.mtime_ns, meta.size, meta.samplerate, meta.channels, meta.frames, meta.format,
+               meta.subtype, _to_blob(meta.overview_min, np.float32), _to_blob(meta.overview_max, np.float32),
+               _to_blob(meta.rms, np.float64), _to_blob(meta.peak, np.float64))
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO files ({', '.join(_COLUMNS)}) "
+                               f"VALUES ({', '.join('?' * len(_COLUMNS))})", row)
+            self._conn.commit()
+
+
+def _to_blob(array, dtype):
+    return None if array is None else np.ascontiguousarray(array, dtype=dtype).tobytes()
+
+
+def _from_blob(blob, dtype, channels):
+    return None if blob is None else np.frombuffer(blob, dtype=dtype).reshape(-1, channels)
+
+
+def _from_row(row):
+    values = dict(zip(_COLUMNS, row))
+    channels = values["channels"]
+    for name, dtype in (("overview_min", np.float32), ("overview_max", np.float32)):
+        values[name] = _from_blob(values[name], dtype, channels)
+    for name in ("rms", "peak"):
+        blob = _from_blob(values[name], np.float64, channels)
+        values[name] = None if blob is None else blob[0]
+    return AudioMetadata(**values)
@@ -0,0 +1,233 @@
+import numpy as np
+from scipy.signal import sosfilt
+
+from .filter import design_butter
+
+# 以 10 为底的倍频程比 (IEC 61260)
+OCTAVE_RATIO = 10 ** 0.3
+# R10 优先数，用于标称中心频率
+_R10 = (1.0, 1.25, 1.6, 2.0, 2.5, 3.15, 4.0, 5.0, 6.3, 8.0)
+# 降采样级只处理上限频率不超过该级采样率 1/8 的频带，抗混叠滤波截止在 0.2 倍采样率
+_STAGE_BAND_LIMIT = 1 / 8
+_ANTIALIAS_CUTOFF = 0.2
+_ANTIALIAS_ORDER = 10
+
+
+def octave_bands(fraction=3, fmin=20.0, fmax=20000.0, sr=None):
+    """
+    倍频程 / 1/3 倍频程频带
+
+    Parameters
+    ----------
+    fraction : int
+        1 为倍频程，3 为 1/3 倍频程
+    fmin, fmax : float
+        标称中心频率范围
+    sr : int
+        可选的采样率，上限频率超过奈奎斯特频率的频带被去掉
+
+    Returns
+    -------
+    nominal, lower, upper : np.ndarray
+        标称中心频率与上下限频率
+    """
+    if fraction not in (1, 3):
+        raise ValueError("fraction 必须为 1 (倍频程) 或 3 (1/3 倍频程)")
+    step = 3 // fraction  # 以 1/3 倍频程为单位的间隔
+    lo = int(np.floor(10 * np.log10(fmin) - 30))
+    hi = int(np.ceil(10 * np.log10(fmax) - 30))
+    index = np.arange(lo - lo % step, hi + 1, step)  # 以 1 kHz 为 0 的 1/3 倍频程序号
+
+    nominal = np.array([_R10[i % 10] * 10.0 ** (3 + i // 10) for i in index])
+    exact = 1000.0 * OCTAVE_RATIO ** (index / 3)
+    half = OCTAVE_RATIO ** (1 / (2 * fraction))
+    lower, upper = exact / half, exact * half
+
+    keep = (nominal >= fmin * 0.999) & (nominal <= fmax * 1.001)
+    if sr is not None:
+        keep &= upper < sr / 2
+    return nominal[keep], lower[keep], upper[keep]
+
+
+def band_label(freq):
+    """标称频率的简写，如 31.5、500、1k、12.5k"""
+    if freq >= 1000:
+        return f"{freq / 1000:g}k"
+    return f"{freq:g}"
+
+
+class OctaveFilterBank:
+    """
+    分数倍频程滤波器组（多速率，因果，可逐块处理）
+
+    每个频带是 filter.design_butter 设计的 SOS 带通滤波器。信号逐级低通后
+    2 倍降采样，低频频带在降采样后的信号上滤波，总运算量约为单次全速率
+    滤波的常数倍，与频带数基本无关。块与块之间保存全部滤波器状态。
+
+    Parameters
+    ----------
+    sr : int
+        采样率
+    fraction : int
+        1 为倍频程，3 为 1/3 倍频程
+    fmin, fmax : float
+        标称中心频率范围
+    order : int
+        带通滤波器阶数（design_butter 的 order，带通实际为 2*order 阶）
+    max_stage : int
+        最多降采样的级数，None 为不限
+    """
+
+    def __init__(self, sr, fraction=3, fmin=20.0, fmax=20000.0, order=3, max_stage=None):
+        self.sr = sr
+        self.fraction = fraction
+        self.nominal, self.lower, self.upper = octave_bands(fraction, fmin, fmax, sr)
+        if len(self.nominal) == 0:
+            raise ValueError("频率范围内没有可用的频带")
+
+        # 每个频带所在的降采样级：上限频率不超过该级采样率 1/8 的最深一级
+        stages = np.zeros(len(self.nominal), dtype=int)
+        for i, f2 in enumerate(self.upper):
+            while f2 <= _STAGE_BAND_LIMIT * sr / 2 ** (stages[i] + 1):
+                if max_stage is not None and stages[i] >= max_stage:
+                    break
+                stages[i] += 1
+        self.stages = stages
+        self.n_stages = int(stages.max()) + 1
+
+        self._band_sos = [
+            design_butter(sr / 2 ** k, (float(f1), float(f2)), 'bandpass', order).copy()
+            for f1, f2, k in zip(self.lower, self.upper, stages)
+        ]
+        self._aa_sos = [
+            design_butter(sr / 2 ** k, _ANTIALIAS_CUTOFF * sr / 2 ** k, 'low', _ANTIALIAS_ORDER).copy()
+            for k in range(self.n_stages - 1)
+        ]
+        self.reset()
+
+    def stage_rate(self, stage):
+        """第 stage 级的采样率"""
+        return self.sr / 2 ** stage
+
+    def reset(self):
+        """清除全部滤波器状态"""
+        self._band_zi = [None] * len(self._band_sos)
+        self._aa_zi = [None] * len(self._aa_sos)
+        self._phase = [0] * len(self._aa_sos)  # 各级降采样时下一个保留采样的位置
+
+    def process(self, block):
+        """
+        输入一块数据
+
+        Returns
+        -------
+        list of np.ndarray
+            每个频带的滤波输出，采样率为 stage_rate(stages[i])
+        """
+        x = np.asarray(block, dtype=np.float64)
+        outputs = [None] * len(self._band_sos)
+        for k in range(self.n_stages):
+            for i in np.flatnonzero(self.stages == k):
+                outputs[i], self._band_zi[i] = _sosfilt_state(self._band_sos[i], x, self._band_zi[i])
+            if k < self.n_stages - 1:
+                x, self._aa_zi[k] = _sosfilt_state(self._aa_sos[k], x, self._aa_zi[k])
+                phase = self._phase[k]
+                kept = x[phase::2]
+                self._phase[k] = (phase - len(x)) % 2
+                x = kept
+        return outputs
+
+
+def _sosfilt_state(sos, x, zi):
+    if zi is None:
+        zi = np.zeros((sos.shape[0], 2) + x.shape[1:])
+    return sosfilt(sos, x, axis=0, zi=zi)
+
+
+def compute_octave_levels(y, sr, fraction=3, fmin=20.0, fmax=20000.0, p0=1.0, chunk_size=1 << 20,
+                          progress=None):
+    """
+    计算倍频程 / 1/3 倍频程频带声级（整段信号的等效声级）
+
+    Parameters
+    ----------
+    y : np.ndarray or ChannelView
+        一维或 (n_samples, n_channels) 信号，按块读取
+    sr : int
+        采样率
+    fraction : int
+        1 为倍频程，3 为 1/3 倍频程
+    fmin, fmax : float
+        标称中心频率范围
+    p0 : float
+        参考值（1.0 表示 dBFS；20e-6 表示 dB SPL）
+    chunk_size : int
+        每次处理的采样数
+    progress : callable
+        可选的进度回调 progress(fraction)
+
+    Returns
+    -------
+    nominal : np.ndarray
+        标称中心频率
+    levels : np.ndarray
+        频带声级 (dB)，多通道时形状为 (n_bands, n_channels)
+    """
+    bank = OctaveFilterBank(sr, fraction, fmin, fmax)
+    energy = np.zeros((len(bank.nominal),) + tuple(y.shape[1:]))
+    counts = np.zeros(len(bank.nominal))
+    n_samples = len(y)
+    for start in range(0, n_samples, chunk_size):
+        if progress is not None:
+            progress(start / n_samples)
+        for i, band in enumerate(bank.process(y[start:start + chunk_size])):
+            energy[i] += np.sum(band ** 2, axis=0)
+            counts[i] += len(band)
+
+    counts = np.maximum(counts, 1).reshape((-1,) + (1,) * (energy.ndim - 1))
+    return bank.nominal, 10 * np.log10(energy / counts / p0 ** 2 + 1e-24)
+
+
+def compute_octave_level_vs_time(y, sr, fraction=3, fmin=20.0, fmax=20000.0, frame_length=0.125, p0=1.0,
+                                 chunk_size=1 << 20, progress=None):
+    """
+    计算频带声级随时间的变化（每个频带按 frame_length 分帧求等效声级）
+
+    降采样级数受帧长限制（帧长采样数需能被降采样倍数整除），
+    保证所有频带的帧边界对齐。
+
+    Returns
+    -------
+    times : np.ndarray
+        各帧起始时刻 (秒)
+    nominal : np.ndarray
+        标称中心频率
+    levels : np.ndarray
+        (n_frames, n_bands) 声级 (dB)；多通道时为 (n_frames, n_bands, n_channels)
+    """
+    frame_size = int(frame_length * sr)
+    if frame_size <= 0:
+        raise ValueError("frame_length 过短")
+    max_stage = (frame_size & -frame_size).bit_length() - 1  # 帧长中因子 2 的个数
+    bank = OctaveFilterBank(sr, fraction, fmin, fmax, max_stage=max_stage)
+    band_frames = [frame_size >> k for k in bank.stages]
+    tails = [None] * len(band_frames)
+    frames = [[] for _ in band_frames]
+
+    n_samples = len(y)
+    for start in range(0, n_samples, chunk_size):
+        if progress is not None:
+            progress(start / n_samples)
+        for i, band in enumerate(bank.process(y[start:start + chunk_size])):
+            buf = band if tails[i] is None else np.concatenate([tails[i], band])
+            n_full = len(buf) // band_frames[i]
+            if n_full:
+                blocks = buf[:n_full * band_frames[i]].reshape(n_full, band_frames[i], *buf.shape[1:])
+                frames[i].append(np.mean(blocks ** 2, axis=1))
+            tails[i] = buf[n_full * band_frames[i]:]
+
+    n_frames = n_samples // frame_size
+    ms = np.stack([np.concatenate(f)[:n_frames] if f else np.zeros((0,) + tuple(y.shape[1:])) for f in frames],
+                  axis=1)
+    times = np.arange(n_frames) * frame_size / sr
+    return times, bank.nominal, 10 * np.log10(ms / p0 ** 2 + 1e-24)
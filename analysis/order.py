@@ -0,0 +1,273 @@
+import hashlib
+import numpy as np
+import logging
+
+from scipy.signal import firwin
+
+from .fft_processor import compute_fft, frame_signal, iter_frame_spectra
+
+logger = logging.getLogger(__name__)
+
+# 角度域输出采样：每转采样数不低于最高阶次的 2.56 倍（与常见分析仪一致）
+ORDER_OVERSAMPLING = 2.56
+# 角度重采样时的最大上采样倍数，限制极低转速段的计算量
+MAX_ANGLE_UPSAMPLING = 1024
+
+
+class RpmProfile:
+    """
+    转速曲线 (时间, rpm)
+
+    相邻点之间转速按线性变化，因此转数是时间的分段二次函数，
+    转数 ↔ 时间的换算都有解析解，可一次向量化计算任意多个点。
+
+    Parameters
+    ----------
+    times : array_like
+        时刻 (秒)，严格递增
+    rpm : array_like
+        对应的转速 (rpm)，负值按 0 处理
+    """
+
+    def __init__(self, times, rpm):
+        times = np.asarray(times, dtype=np.float64)
+        rpm = np.maximum(np.asarray(rpm, dtype=np.float64), 0.0)
+        if times.ndim != 1 or times.shape != rpm.shape or len(times) < 2:
+            raise ValueError("转速曲线至少需要两个 (时间, rpm) 点")
+        if np.any(np.diff(times) <= 0):
+            raise ValueError("转速曲线的时间必须严格递增")
+        self.times = times
+        self.rpm = rpm
+        # 每段起点的转速 (转/秒)、转速变化率与累计转数
+        self._rate = rpm / 60.0
+        self._slope = np.diff(self._rate) / np.diff(times)
+        seg_revs = np.diff(times) * (self._rate[:-1] + self._rate[1:]) / 2
+        self._revs = np.concatenate([[0.0], np.cumsum(seg_revs)])
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        从 CSV 读取转速曲线
+
+        两列：时间 (秒), 转速 (rpm)；逗号、分号或空白分隔，可带一行表头。
+        """
+        with open(path, encoding="utf-8-sig") as f:
+            lines = [line.replace(";", ",").strip() for line in f if line.strip()]
+        try:
+            float(lines[0].replace(",", " ").split()[0])
+        except (ValueError, IndexError):
+            lines = lines[1:]  # 表头
+        data = np.array([[float(v) for v in line.replace(",", " ").split()[:2]] for line in lines])
+        if data.ndim != 2 or data.shape[1] < 2:
+            raise ValueError(f"无法解析转速曲线: {path}")
+        return cls(data[:, 0], data[:, 1])
+
+    @classmethod
+    def from_pulse_times(cls, pulse_times, pulses_per_rev=1):
+        """
+        由转速脉冲的时刻计算转速曲线
+
+        相邻脉冲之间按平均转速计，时间取两个脉冲的中点。
+        """
+        pulse_times = np.asarray(pulse_times, dtype=np.float64)
+        if len(pulse_times) < 3:
+            raise ValueError("转速脉冲过少，无法计算转速")
+        periods = np.diff(pulse_times) * pulses_per_rev
+        return cls((pulse_times[:-1] + pulse_times[1:]) / 2, 60.0 / periods)
+
+    def __repr__(self):
+        # 按内容生成，作为分析结果缓存键的一部分
+        digest = hashlib.blake2b(self.times.tobytes() + self.rpm.tobytes(), digest_size=8).hexdigest()
+        return f"RpmProfile({len(self.times)} 点, {digest})"
+
+    @property
+    def start(self):
+        return self.times[0]
+
+    @property
+    def end(self):
+        return self.times[-1]
+
+    def rpm_at(self, t):
+        """任意时刻的转速（线性插值，超出范围取端点值）"""
+        return np.interp(t, self.times, self.rpm)
+
+    def revolutions(self, t):
+        """从 start 起到时刻 t 的累计转数"""
+        t = np.clip(np.asarray(t, dtype=np.float64), self.start, self.end)
+        i = np.clip(np.searchsorted(self.times, t, side="right") - 1, 0, len(self._slope) - 1)
+        tau = t - self.times[i]
+        return self._revs[i] + self._rate[i] * tau + 0.5 * self._slope[i] * tau ** 2
+
+    def time_at(self, revs):
+        """累计转数 revs 对应的时刻（revolutions 的反函数）"""
+        revs = np.clip(np.asarray(revs, dtype=np.float64), 0.0, self._revs[-1])
+        i = np.clip(np.searchsorted(self._revs, revs, side="right") - 1, 0, len(self._slope) - 1)
+        d = revs - self._revs[i]
+        rate, slope = self._rate[i], self._slope[i]
+        # 0.5·slope·τ² + rate·τ = d 的数值稳定解（slope = 0 时退化为 d / rate）
+        disc = np.sqrt(np.maximum(rate ** 2 + 2 * slope * d, 0.0))
+        tau = 2 * d / np.maximum(rate + disc, 1e-12)
+        return self.times[i] + tau
+
+
+def _cubic_interp(y, positions):
+    """按小数采样位置做 4 点三次 (Catmull-Rom) 插值，positions 单调递增"""
+    base = np.floor(positions).astype(np.int64)
+    lo, hi = int(base[0]) - 1, int(base[-1]) + 3
+    seg = np.asarray(y[max(lo, 0):min(hi, len(y))], dtype=np.float32)
+    # 超出信号两端的部分按边界值延拓，取相邻 4 点时无需裁剪下标
+    if lo < 0 or hi > len(y):
+        pad = ((max(-lo, 0), max(hi - len(y), 0)),) + ((0, 0),) * (seg.ndim - 1)
+        seg = np.pad(seg, pad, mode="edge")
+    idx = base - lo
+    frac = (positions - base).astype(np.float32)
+    if seg.ndim > 1:
+        frac = frac[:, np.newaxis]
+    p0, p1, p2, p3 = seg[idx - 1], seg[idx], seg[idx + 1], seg[idx + 2]
+    return p1 + 0.5 * frac * (p2 - p0 + frac * (2 * p0 - 5 * p1 + 4 * p2 - p3 + frac * (3 * (p1 - p2) + p3 - p0)))
+
+
+def angle_resample(y, sr, profile, max_order=64, chunk_size=1 << 14, progress=None):
+    """
+    等角度重采样
+
+    先以足够高的每转采样数（保证在最低转速下也不低于原采样率，不产生混叠）
+    对信号做三次插值，再用线性相位 FIR 在角度域低通并抽取到 2.56 × max_order 每转。
+    FIR 只在抽取后的输出点上计算，且无相位延迟，输出与转角严格对齐。
+    按块处理，内存占用与信号长度无关。
+
+    Parameters
+    ----------
+    y : np.ndarray or ChannelView
+        一维或 (n_samples, n_channels) 信号
+    sr : int
+        采样率
+    profile : RpmProfile
+        转速曲线（时间与信号对齐，0 为信号开头）
+    max_order : float
+        需要分析的最高阶次
+    chunk_size : int
+        每块输出的角度采样数
+    progress : callable
+        可选的进度回调 progress(fraction)
+
+    Returns
+    -------
+    revs : np.ndarray
+        每个输出采样对应的累计转数
+    y_angle : np.ndarray
+        等角度采样的信号
+    samples_per_rev : int
+        每转采样数
+    """
+    t0 = max(profile.start, 0.0)
+    t1 = min(profile.end, (len(y) - 3) / sr)
+    if t1 <= t0:
+        raise ValueError("转速曲线与信号的时间范围不重叠")
+    rev0, rev1 = profile.revolutions([t0, t1])
+    rpm_min = max(float(np.min(profile.rpm_at(np.linspace(t0, t1, 1024)))), 1e-6)
+
+    samples_per_rev = 2 ** int(np.ceil(np.log2(ORDER_OVERSAMPLING * max_order)))
+    upsample = 2 ** int(np.ceil(np.log2(max(sr * 60.0 / rpm_min / samples_per_rev, 1.0))))
+    if upsample > MAX_ANGLE_UPSAMPLING:
+        logger.warning(f"最低转速 {rpm_min:.0f} rpm 过低，角度重采样可能有混叠")
+        upsample = MAX_ANGLE_UPSAMPLING
+    spr_hi = samples_per_rev * upsample
+    if upsample > 1:
+        # 角度域抗混叠低通：截止在输出奈奎斯特阶次的 80%，每个输出点 32 个周期的 sinc
+        taps = firwin(32 * upsample + 1, 0.4 * samples_per_rev, fs=spr_hi)
+    else:
+        taps = np.ones(1)
+    half = len(taps) // 2
+
+    # 输出点 m 需要高速率采样 [m·upsample - half, m·upsample + half]
+    first = int(np.ceil((rev0 * spr_hi + half) / upsample))
+    last = int(np.floor((rev1 * spr_hi - half) / upsample))
+    if last < first:
+        raise ValueError("转速曲线覆盖的转数过少")
+    logger.info(f"等角度重采样: {rev1 - rev0:.1f} 转, 每转 {samples_per_rev} 点 (上采样 {upsample} 倍)")
+
+    out = []
+    for start in range(first, last + 1, chunk_size):
+        if progress is not None:
+            progress((start - first) / max(last - first, 1))
+        stop = min(start + chunk_size, last + 1)
+        k = np.arange(start * upsample - half, (stop - 1) * upsample + half + 1)
+        hi = _cubic_interp(y, profile.time_at(k / spr_hi) * sr)
+        windows = np.lib.stride_tricks.sliding_window_view(hi, len(taps), axis=0)[::upsample]
+        out.append(windows @ taps)
+
+    revs = np.arange(first, last + 1) / samples_per_rev
+    return revs, np.concatenate(out), samples_per_rev
+
+
+def order_frames(revs, y_angle, samples_per_rev, profile, revs_per_frame=8, overlap=0.5, chunk_size=256):
+    """
+    角度域分帧的阶次谱
+
+    Returns
+    -------
+    orders : np.ndarray
+        阶次轴，分辨率为 1 / revs_per_frame
+    frame_rpm : np.ndarray
+        每帧的平均转速
+    spectra : np.ndarray
+        (n_frames, n_orders) 或 (n_frames, n_channels, n_orders) 的幅度谱 (float32)
+    """
+    frame_size = int(revs_per_frame * samples_per_rev)
+    hop_size = int(frame_size * (1 - overlap))
+    frames = frame_signal(y_angle, frame_size, hop_size)
+    spectra = np.concatenate([s.astype(np.float32) for s in iter_frame_spectra(frames, chunk_size)])
+
+    start_revs = revs[0] + np.arange(len(frames)) * hop_size / samples_per_rev
+    durations = profile.time_at(start_revs + revs_per_frame) - profile.time_at(start_revs)
+    frame_rpm = 60.0 * revs_per_frame / np.maximum(durations, 1e-12)
+    orders = np.fft.rfftfreq(frame_size, 1 / samples_per_rev)
+    return orders, frame_rpm, spectra
+
+
+def order_cuts(orders, spectra, targets, bandwidth=0.5):
+    """
+    阶次切片：各帧中目标阶次 ±bandwidth/2 范围内谱线的能量和 (RMS 幅值)
+
+    Returns
+    -------
+    np.ndarray
+        (n_frames, len(targets)) 或 (n_frames, n_channels, len(targets))
+    """
+    power = spectra.astype(np.float64) ** 2
+    cuts = [np.sqrt(np.sum(power[..., np.abs(orders - o) <= bandwidth / 2], axis=-1)) for o in targets]
+    return np.stack(cuts, axis=-1)
+
+
+def compute_order_spectrum(y, sr, profile, max_order=64, revs_per_frame=8, overlap=0.5, mode="average",
+                           progress=None):
+    """
+    阶次谱：等角度重采样后，以每转采样数为「采样率」调用 compute_fft，频率轴即阶次
+
+    Returns
+    -------
+    orders, spectrum : np.ndarray
+    """
+    revs, y_angle, spr = angle_resample(y, sr, profile, max_order=max_order, progress=progress)
+    orders, spectrum = compute_fft(y_angle, spr, mode=mode, frame_size=int(revs_per_frame * spr), overlap=overlap)
+    keep = orders <= max_order
+    return orders[keep], spectrum[keep]
+
+
+def compute_order_cuts(y, sr, profile, targets=(1, 2, 4), max_order=64, revs_per_frame=8, overlap=0.5,
+                       bandwidth=0.5, progress=None):
+    """
+    阶次切片 (order cut)：目标阶次幅值随转速的变化
+
+    Returns
+    -------
+    frame_rpm : np.ndarray
+        每帧的平均转速
+    cuts : np.ndarray
+        (n_frames, len(targets))；多通道时为 (n_frames, n_channels, len(targets))
+    """
+    revs, y_angle, spr = angle_resample(y, sr, profile, max_order=max(max_order, max(targets)), progress=progress)
+    orders, frame_rpm, spectra = order_frames(revs, y_angle, spr, profile, revs_per_frame, overlap)
+    return frame_rpm, order_cuts(orders, spectra, targets, bandwidth)
@@ -0,0 +1,115 @@
+import os
+import atexit
+import inspect
+import logging
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .audio_io import select_channels
+
+logger = logging.getLogger(__name__)
+
+# 多通道数据超过该大小 (字节) 时按通道分组交给进程池，否则一次向量化计算
+PARALLEL_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+# 进程池在首次使用时创建并在各次调用间复用。子进程用 spawn 启动：
+# 在有 Qt 线程的进程中 fork 可能死锁，且 Windows 上每次新建进程池都要重新启动解释器并导入模块
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = max_workers
+            logger.info(f"创建进程池: 进程={max_workers}")
+        return _pool
+
+
+def shutdown_pool(wait=True):
+    """关闭共享进程池（程序退出时调用；之后再次使用会重新创建）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _call(func, data, sr, kwargs):
+    return func(np.asarray(data), sr, **kwargs)
+
+
+def _merge(results):
+    """按通道轴拼接各组结果；(axis, values) 元组的坐标轴取第一组"""
+    first = results[0]
+    if isinstance(first, tuple):
+        return first[:-1] + (_merge([r[-1] for r in results]),)
+    return np.column_stack([np.asarray(r).reshape(len(r), -1) for r in results])
+
+
+def run_multichannel(func, y, sr, max_workers=None, threshold=PARALLEL_THRESHOLD_BYTES, progress=None, **kwargs):
+    """
+    对多通道数据执行分析函数
+
+    数据较小时直接一次向量化调用 func；数据超过 threshold 时按通道分组，
+    在共享的进程池中并行计算后按通道拼接。内存映射的 WAV 视图只把文件路径传给子进程。
+
+    Parameters
+    ----------
+    func : callable
+        形如 func(y, sr, **kwargs) 的分析函数（compute_fft、butter_filter、
+        compute_level_vs_time 等），需能处理 (n_samples, n_channels) 输入
+    y : np.ndarray or ChannelView
+        一维或 (n_samples, n_channels) 音频数据
+    sr : int
+        采样率
+    max_workers : int
+        进程池的进程数，默认为 CPU 核数
+    threshold : int
+        触发进程池的数据大小 (字节)
+    progress : callable
+        可选的进度回调 progress(fraction)；直接调用时转交给支持该参数的 func，
+        进程池模式下每完成一组通道汇报一次
+
+    Returns
+    -------
+    与 func 相同；多通道结果的最后一维为通道
+    """
+    n_channels = 1 if y.ndim == 1 else y.shape[1]
+    if n_channels == 1 or y.nbytes <= threshold:
+        if progress is not None and "progress" in inspect.signature(func).parameters:
+            kwargs = dict(kwargs, progress=progress)
+        return _call(func, y, sr, kwargs)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    groups = [g.tolist() for g in np.array_split(np.arange(n_channels), min(max_workers, n_channels))]
+    logger.info(f"多通道并行计算: {func.__name__}, 通道={n_channels}, 进程={len(groups)}")
+
+    pool = _get_pool(max_workers)
+    futures = [pool.submit(_call, func, select_channels(y, g), sr, kwargs) for g in groups]
+    try:
+        for done, _ in enumerate(as_completed(futures), 1):
+            if progress is not None:
+                progress(done / len(futures))
+        results = [f.result() for f in futures]
+    except BrokenProcessPool:
+        # 子进程异常退出后进程池不可再用，下次调用重新创建
+        shutdown_pool(wait=False)
+        raise
+    except BaseException:
+        # 进度回调抛出异常（如任务被取消）时放弃尚未开始的分组
+        for f in futures:
+            f.cancel()
+        raise
+    return _merge(results)
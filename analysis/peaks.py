@@ -0,0 +1,205 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 频谱数值的含义：幅值（20·log10）、功率 / PSD（10·log10）或已经是 dB
+SPECTRUM_SCALES = ("amplitude", "power", "db")
+# 峰值表的列
+PEAK_FIELDS = ("time", "channel", "frequency", "level", "tnr")
+
+
+def to_db(spectrum, scale="amplitude"):
+    """把幅值 / 功率谱换算为 dB"""
+    if scale not in SPECTRUM_SCALES:
+        raise ValueError(f"未知频谱类型: {scale}")
+    spectrum = np.asarray(spectrum)
+    if scale == "db":
+        return spectrum.astype(np.float64, copy=False)
+    tiny = 1e-30 if scale == "power" else 1e-15
+    return (10.0 if scale == "power" else 20.0) * np.log10(np.abs(spectrum).astype(np.float64) + tiny)
+
+
+def detect_peaks(levels, freqs, min_level=None, min_tnr=6.0, noise_bins=20, guard_bins=2, max_peaks=None,
+                 chunk_rows=4096):
+    """
+    对一批 dB 频谱（每行一条）向量化检测音调峰值
+
+    局部最大值经抛物线插值得到精确频率与峰值；背景噪声取峰两侧各 noise_bins 个频点
+    （去掉中心 ±guard_bins 个主瓣频点）的平均功率，音调噪声比 TNR = 峰值 − 噪声 (dB)。
+    窗口功率和由沿频率轴的累加和得到，整批频谱一次计算，不在 Python 中逐行循环；
+    chunk_rows 只用于限制超长声谱图的临时内存。
+
+    Parameters
+    ----------
+    levels : np.ndarray
+        (n_rows, n_freqs) dB 频谱
+    freqs : np.ndarray
+        频率轴 (n_freqs,)，等间隔
+    min_level : float
+        峰值下限 (dB)，None 为不限
+    min_tnr : float
+        TNR 下限 (dB)
+    noise_bins : int
+        估计背景噪声时峰两侧各取的频点数
+    guard_bins : int
+        噪声估计时排除的峰中心两侧频点数（窗函数主瓣）
+    max_peaks : int
+        每行最多保留的峰数（按 TNR 从大到小），None 为不限
+
+    Returns
+    -------
+    rows : np.ndarray
+        峰所在的行号
+    frequency, level, tnr : np.ndarray
+        插值后的频率 (Hz)、峰值 (dB) 与音调噪声比 (dB)，按 (行, 频率) 排序
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    freqs = np.asarray(freqs, dtype=np.float64)
+    n_rows, n_freqs = levels.shape
+    df = freqs[1] - freqs[0] if n_freqs > 1 else 1.0
+    out = [], [], [], []
+    for start in range(0, n_rows, chunk_rows):
+        L = levels[start:start + chunk_rows]
+        # 局部最大值（不含两端频点）
+        a, b, c = L[:, :-2], L[:, 1:-1], L[:, 2:]
+        candidate = (b > a) & (b >= c)
+        if min_level is not None:
+            candidate &= b >= min_level
+        rows, k = np.nonzero(candidate)
+        k = k + 1
+
+        # 抛物线插值（dB 域）
+        alpha, beta, gamma = L[rows, k - 1], L[rows, k], L[rows, k + 1]
+        denom = alpha - 2 * beta + gamma
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = np.where(denom < 0, 0.5 * (alpha - gamma) / denom, 0.0)
+        level = beta - 0.25 * (alpha - gamma) * p
+        frequency = freqs[k] + p * df
+
+        # 背景噪声：窗口功率和减去保护带功率和
+        csum = np.zeros((len(L), n_freqs + 1))
+        np.cumsum(10 ** (L / 10), axis=1, out=csum[:, 1:])
+        lo, hi = np.maximum(k - noise_bins, 0), np.minimum(k + noise_bins + 1, n_freqs)
+        glo, ghi = np.maximum(k - guard_bins, 0), np.minimum(k + guard_bins + 1, n_freqs)
+        noise_sum = (csum[rows, hi] - csum[rows, lo]) - (csum[rows, ghi] - csum[rows, glo])
+        count = (hi - lo) - (ghi - glo)
+        noise_db = 10 * np.log10(np.maximum(noise_sum, 0) / np.maximum(count, 1) + 1e-30)
+        tnr = level - noise_db
+
+        keep = tnr >= min_tnr
+        rows, frequency, level, tnr = rows[keep], frequency[keep], level[keep], tnr[keep]
+        if max_peaks is not None and len(rows):
+            # 每行按 TNR 排名，保留前 max_peaks 个
+            order = np.lexsort((-tnr, rows))
+            sorted_rows = rows[order]
+            rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows, side="left")
+            selected = np.sort(order[rank < max_peaks])
+            rows, frequency, level, tnr = rows[selected], frequency[selected], level[selected], tnr[selected]
+        for acc, values in zip(out, (rows + start, frequency, level, tnr)):
+            acc.append(values)
+    return tuple(np.concatenate(acc) if acc else np.zeros(0) for acc in out)
+
+
+class PeakIndex:
+    """
+    音调峰值索引（时间, 通道, 频率, 峰值, TNR）
+
+    由单条 / 平均 / 峰值保持频谱或整幅声谱图构建，支持按频率、时间、
+    峰值与 TNR 向量化筛选，以及导出 CSV。
+
+    Parameters
+    ----------
+    time, channel, frequency, level, tnr : array_like
+        各峰的时刻 (秒)、通道序号、频率 (Hz)、峰值 (dB) 与音调噪声比 (dB)
+    """
+
+    def __init__(self, time, channel, frequency, level, tnr):
+        self.time = np.asarray(time, dtype=np.float64)
+        self.channel = np.asarray(channel, dtype=np.int64)
+        self.frequency = np.asarray(frequency, dtype=np.float64)
+        self.level = np.asarray(level, dtype=np.float64)
+        self.tnr = np.asarray(tnr, dtype=np.float64)
+
+    @classmethod
+    def from_spectrum(cls, freqs, spectrum, scale="amplitude", time=0.0, **kwargs):
+        """
+        从 compute_fft / compute_psd 的结果构建
+
+        spectrum 为 (n_freqs,) 或 (n_freqs, n_channels)；其余关键字参数见 detect_peaks。
+        """
+        spectrum = to_db(spectrum, scale)
+        levels = spectrum.reshape(len(freqs), -1).T  # (n_channels, n_freqs)
+        rows, frequency, level, tnr = detect_peaks(levels, freqs, **kwargs)
+        return cls(np.full(len(rows), time), rows, frequency, level, tnr)
+
+    @classmethod
+    def from_spectrogram(cls, freqs, times, spectrogram, scale="db", **kwargs):
+        """
+        从 compute_spectrogram 的结果构建（全部帧一次检测）
+
+        spectrogram 为 (n_freqs, n_times) 或 (n_channels, n_freqs, n_times)。
+        """
+        spectrogram = to_db(spectrogram, scale)
+        if spectrogram.ndim == 2:
+            spectrogram = spectrogram[None]
+        n_channels, n_freqs, n_times = spectrogram.shape
+        levels = np.swapaxes(spectrogram, 1, 2).reshape(n_channels * n_times, n_freqs)
+        rows, frequency, level, tnr = detect_peaks(levels, freqs, **kwargs)
+        index = cls(np.asarray(times)[rows % n_times], rows // n_times, frequency, level, tnr)
+        logger.debug(f"声谱图峰值检测: 帧={n_times}, 通道={n_channels}, 峰={len(index)}")
+        return index
+
+    @classmethod
+    def concatenate(cls, indexes):
+        """按顺序合并多个 PeakIndex（如分块检测的结果）"""
+        indexes = list(indexes)
+        if not indexes:
+            return cls(*np.zeros((5, 0)))
+        return cls(*(np.concatenate([getattr(index, name) for index in indexes]) for name in PEAK_FIELDS))
+
+    def __len__(self):
+        return len(self.frequency)
+
+    def _subset(self, mask):
+        return PeakIndex(*(getattr(self, name)[mask] for name in PEAK_FIELDS))
+
+    # -----------------------------
+    # 查询
+    def query(self, fmin=None, fmax=None, tmin=None, tmax=None, min_level=None, min_tnr=None, channel=None):
+        """按范围筛选，返回新的 PeakIndex（条件为 None 时不限）"""
+        mask = np.ones(len(self), dtype=bool)
+        for values, lower, upper in ((self.frequency, fmin, fmax), (self.time, tmin, tmax),
+                                     (self.level, min_level, None), (self.tnr, min_tnr, None)):
+            if lower is not None:
+                mask &= values >= lower
+            if upper is not None:
+                mask &= values <= upper
+        if channel is not None:
+            mask &= self.channel == channel
+        return self._subset(mask)
+
+    def near(self, frequency, tolerance):
+        """频率在 frequency ± tolerance 内的峰"""
+        return self.query(fmin=frequency - tolerance, fmax=frequency + tolerance)
+
+    def strongest(self, n, by="tnr"):
+        """按 TNR（或 "level"）从大到小取前 n 个峰"""
+        order = np.argsort(-getattr(self, by), kind="stable")[:n]
+        return self._subset(order)
+
+    # -----------------------------
+    # 导出
+    def to_array(self):
+        """(n_peaks, 5) 数组，列顺序见 PEAK_FIELDS"""
+        return np.column_stack([getattr(self, name) for name in PEAK_FIELDS])
+
+    def to_csv(self, path):
+        np.savetxt(path, self.to_array(), delimiter=",", fmt=("%.6f", "%d", "%.4f", "%.2f", "%.2f"),
+                   header="time_s,channel,frequency_hz,level_db,tnr_db", comments="", encoding="utf-8")
+        logger.info(f"已导出峰值表: {path}, 共 {len(self)} 个峰")
+
+    @classmethod
+    def from_csv(cls, path):
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        return cls(*data.T) if len(data) else cls(*np.zeros((5, 0)))
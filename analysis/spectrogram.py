@@ -0,0 +1,208 @@
+import numpy as np
+from collections import OrderedDict
+from scipy.signal import spectrogram, get_window
+
+from .fft_processor import frame_signal
+
+
+def compute_spectrogram(y, sr, nperseg=1024):
+    """
+    计算声谱图（功率谱密度，dB）
+
+    Parameters
+    ----------
+    y : np.ndarray
+        音频信号，一维或 (n_samples, n_channels)
+    sr : int
+        采样率
+    nperseg : int
+        每段长度
+
+    Returns
+    -------
+    f : np.ndarray
+        频率轴
+    t : np.ndarray
+        时间轴
+    Sxx_db : np.ndarray
+        功率 (dB)，形状为 (n_freqs, n_times)，多通道时为 (n_channels, n_freqs, n_times)
+    """
+    y = np.asarray(y)
+    f, t, Sxx = spectrogram(y.T, fs=sr, nperseg=nperseg)
+    return f, t, 10 * np.log10(Sxx + 1e-10)
+
+
+def iter_spectrogram_blocks(y, sr, nperseg=1024, block_frames=4096):
+    """
+    按帧分块计算声谱图，拼接后与 compute_spectrogram 的结果一致
+
+    每块只读取覆盖 block_frames 帧的信号片段，内存占用与信号长度无关，
+    y 可以是内存映射的懒加载视图。
+
+    Yields
+    ------
+    f, t, Sxx_db : np.ndarray
+        与 compute_spectrogram 相同，t 为整段信号中的时刻
+    """
+    hop = nperseg - nperseg // 8  # scipy.signal.spectrogram 默认的重叠 nperseg // 8
+    n_frames = (len(y) - nperseg) // hop + 1 if len(y) >= nperseg else 0
+    for first in range(0, n_frames, block_frames):
+        start = first * hop
+        stop = start + (min(block_frames, n_frames - first) - 1) * hop + nperseg
+        f, t, sxx_db = compute_spectrogram(y[start:stop], sr, nperseg=nperseg)
+        yield f, t + start / sr, sxx_db
+
+
+class TiledSpectrogram:
+    """
+    分块、多分辨率的声谱图引擎
+
+    第 level 层的帧移为 base_hop * 2**level，每层按 tile_frames 帧划分为块（tile），
+    块只在被显示时才计算，并保存在 LRU 缓存中。绘图时根据可见时间范围和像素宽度
+    选择合适的层，只计算覆盖可见区域的块，因此任意缩放级别的开销都与屏幕大小有关，
+    与录音长度无关。频率方向在渲染时按像素高度取最大值合并。
+
+    粗层的帧移大于帧长时只取等间隔的帧（不做平均），用于概览。
+
+    Parameters
+    ----------
+    y : np.ndarray or ChannelView
+        一维信号，支持内存映射的懒加载视图
+    sr : int
+        采样率
+    nperseg : int
+        每帧长度
+    base_hop : int
+        第 0 层的帧移，默认 nperseg // 4
+    tile_frames : int
+        每块的帧数
+    max_tiles : int
+        缓存的最大块数
+    """
+
+    def __init__(self, y, sr, nperseg=1024, base_hop=None, tile_frames=256, max_tiles=256):
+        if len(y) < nperseg:
+            raise ValueError("音频过短，无法计算声谱图")
+        self.y = y
+        self.sr = sr
+        self.nperseg = nperseg
+        self.base_hop = base_hop or nperseg // 4
+        self.tile_frames = tile_frames
+        self.max_tiles = max_tiles
+        self.n_samples = len(y)
+
+        self.window = get_window("hann", nperseg).astype(np.float32)
+        # 功率谱密度（单边）缩放
+        self._scale = np.full(nperseg // 2 + 1, 2.0 / (sr * np.sum(self.window.astype(np.float64) ** 2)))
+        self._scale[0] /= 2
+        if nperseg % 2 == 0:
+            self._scale[-1] /= 2
+        self._scale = self._scale.astype(np.float32)
+        self.freqs = np.fft.rfftfreq(nperseg, 1 / sr)
+
+        self.n_levels = 1
+        while self.n_frames(self.n_levels) >= 2:
+            self.n_levels += 1
+        self._tiles = OrderedDict()
+
+    def hop(self, level):
+        return self.base_hop << level
+
+    def n_frames(self, level):
+        return (self.n_samples - self.nperseg) // self.hop(level) + 1
+
+    def frame_time(self, level, index):
+        """第 index 帧中心的时间 (s)"""
+        return (np.asarray(index) * self.hop(level) + self.nperseg / 2) / self.sr
+
+    def choose_level(self, t0, t1, width):
+        """可见帧数不少于 width 的最粗一层"""
+        span = max(t1 - t0, 0) * self.sr
+        if span <= 0:
+            return 0
+        level = int(np.floor(np.log2(max(span / (width * self.base_hop), 1.0))))
+        return min(level, self.n_levels - 1)
+
+    # -----------------------------
+    # 块计算
+    def tile(self, level, k):
+        """第 level 层第 k 块的功率 (dB)，形状为 (n_freqs, n_frames_in_tile)"""
+        key = (level, k)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        hop = self.hop(level)
+        j0 = k * self.tile_frames
+        j1 = min(j0 + self.tile_frames, self.n_frames(level))
+        starts = np.arange(j0, j1) * hop
+        if hop < self.nperseg:
+            # 帧相互重叠：读取连续区间后按步长取帧视图
+            seg = np.asarray(self.y[starts[0]:starts[-1] + self.nperseg], dtype=np.float32)
+            frames = frame_signal(seg, self.nperseg, hop)
+        else:
+            # 帧彼此分离：只读取各帧所在的采样
+            frames = np.asarray(self.y[starts[:, None] + np.arange(self.nperseg)], dtype=np.float32)
+
+        spec = np.abs(np.fft.rfft(frames * self.window, axis=-1)) ** 2 * self._scale
+        db = (10 * np.log10(spec + 1e-10)).T.astype(np.float32)
+
+        self._tiles[key] = db
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return db
+
+    # -----------------------------
+    # 渲染
+    def render(self, t0, t1, width, f0=None, f1=None, height=None):
+        """
+        生成覆盖可见区域的图像
+
+        Parameters
+        ----------
+        t0, t1 : float
+            可见时间范围 (s)
+        width : int
+            可见区域像素宽度
+        f0, f1 : float
+            可见频率范围 (Hz)，默认全部
+        height : int
+            可见区域像素高度，频率点数多于高度时按最大值合并
+
+        Returns
+        -------
+        image : np.ndarray
+            功率 (dB)，形状为 (n_freqs, n_times)
+        extent : tuple
+            (t_left, t_right, f_bottom, f_top)，可直接用于 imshow
+        """
+        level = self.choose_level(t0, t1, width)
+        hop = self.hop(level)
+        n_frames = self.n_frames(level)
+        j0 = int(np.clip(np.floor((t0 * self.sr - self.nperseg / 2) / hop), 0, n_frames - 1))
+        j1 = int(np.clip(np.ceil((t1 * self.sr - self.nperseg / 2) / hop) + 1, j0 + 1, n_frames))
+
+        k0, k1 = j0 // self.tile_frames, (j1 - 1) // self.tile_frames
+        image = np.concatenate([self.tile(level, k) for k in range(k0, k1 + 1)], axis=1)
+        offset = k0 * self.tile_frames
+        image = image[:, j0 - offset:j1 - offset]
+
+        # 频率裁剪与合并
+        df = self.freqs[1]
+        i0 = 0 if f0 is None else int(np.clip(np.floor(f0 / df), 0, len(self.freqs) - 1))
+        i1 = len(self.freqs) if f1 is None else int(np.clip(np.ceil(f1 / df) + 1, i0 + 1, len(self.freqs)))
+        image = image[i0:i1]
+        factor = 1
+        if height and len(image) > 2 * height:
+            factor = len(image) // height
+            n = len(image) // factor * factor
+            image = image[:n].reshape(n // factor, factor, -1).max(axis=1)
+
+        half = hop / 2 / self.sr
+        extent = (
+            float(self.frame_time(level, j0)) - half,
+            float(self.frame_time(level, j1 - 1)) + half,
+            float(self.freqs[i0] - df / 2),
+            float(self.freqs[i0] + (len(image) * factor - 0.5) * df),
+        )
+        return image, extent
@@ -0,0 +1,234 @@
+import numpy as np
+import soundfile as sf
+import logging
+
+from .fft_backend import FFTPlan
+from .fft_processor import frame_signal, iter_frame_spectra
+from .weighting import frequency_weights, WeightingFilter
+from .level_vs_time import TimeWeightedLevel
+
+logger = logging.getLogger(__name__)
+
+
+def iter_file_blocks(path, blocksize=65536, channel=0, start=0):
+    """
+    按块读取音频文件的单个通道
+
+    Parameters
+    ----------
+    path : str
+        音频文件路径
+    blocksize : int
+        每块采样点数
+    channel : int
+        通道序号
+    start : int
+        起始采样点（通过 SoundFile.seek 跳转，不解码前面的数据）
+
+    Yields
+    ------
+    block : np.ndarray
+        float32 一维数据块
+    """
+    with sf.SoundFile(path) as f:
+        if not 0 <= channel < f.channels:
+            raise ValueError(f"通道 {channel} 超出范围 (共 {f.channels} 个通道)")
+        if start:
+            f.seek(start)
+        for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            yield block[:, channel]
+
+
+class StreamingSpectrum:
+    """
+    增量式平均 / 峰值保持频谱
+
+    逐块输入信号，块之间保留不足一帧的尾部样本，保证分帧结果与
+    对完整信号调用 compute_fft 一致。
+    """
+
+    def __init__(self, sr, mode="average", frame_size=4096, overlap=0.5, chunk_size=256, weighting=None,
+                 window="rectangular", backend="numpy", pad=False):
+        if mode not in ("average", "peak"):
+            raise ValueError(f"未知 FFT 模式: {mode}")
+        self.sr = sr
+        self.mode = mode
+        self.frame_size = frame_size
+        self.hop_size = int(frame_size * (1 - overlap))
+        if self.hop_size <= 0:
+            raise ValueError("帧移必须大于 0，请检查 overlap 设置")
+        self.chunk_size = chunk_size
+        self.weighting = weighting
+        self.plan = FFTPlan(frame_size, sr, window=window, backend=backend, pad=pad)
+        self.freqs = self.plan.freqs
+        self.n_frames = 0
+        self._acc = None
+        self._tail = None
+
+    def update(self, block):
+        """
+        输入一块新数据
+
+        Returns
+        -------
+        np.ndarray
+            本块新增各帧的幅度谱，形状 (n_new, [n_channels,] n_freqs)，供滚动显示使用
+        """
+        buf = np.asarray(block) if self._tail is None else np.concatenate([self._tail, block])
+        if len(buf) < self.frame_size:
+            self._tail = buf.copy()
+            return np.zeros((0,) + buf.shape[1:] + self.freqs.shape, dtype=np.float32)
+
+        frames = frame_signal(buf, self.frame_size, self.hop_size)
+        new_spectra = []
+        for spectra in iter_frame_spectra(frames, self.chunk_size, self.plan):
+            if self.mode == "average":
+                block_acc = spectra.sum(axis=0)
+                self._acc = block_acc if self._acc is None else self._acc + block_acc
+            else:
+                block_acc = spectra.max(axis=0)
+                self._acc = block_acc if self._acc is None else np.maximum(self._acc, block_acc)
+            new_spectra.append(spectra)
+        self.n_frames += len(frames)
+        # 下一帧起点之后的数据留到下一块
+        self._tail = buf[len(frames) * self.hop_size:].copy()
+        return np.concatenate(new_spectra)
+
+    def reset(self):
+        """清除累计结果（保留未成帧的尾部数据）"""
+        self.n_frames = 0
+        self._acc = None
+
+    def result(self):
+        """
+        Returns
+        -------
+        freqs : np.ndarray
+            频率轴
+        spectrum : np.ndarray
+            当前累计的频谱幅度
+        """
+        if self.n_frames == 0:
+            raise ValueError("音频过短，无法分帧计算")
+        spectrum = self._acc / self.n_frames if self.mode == "average" else self._acc.copy()
+        if self.weighting is not None:
+            spectrum = spectrum * frequency_weights(self.plan.n_fft, self.sr, self.weighting)
+        return self.freqs, spectrum.T
+
+
+class StreamingLevel:
+    """
+    增量式 Level vs Time（非重叠帧 RMS 或 Fast/Slow/Impulse 时间计权），
+    结果与 compute_level_vs_time 一致
+
+    accumulate=False 时不保存历史，只由 update() 返回新增的声级（用于长时间运行的
+    实时监测，内存不随时间增长），此时不能调用 result()。
+    """
+
+    def __init__(self, sr, frame_length=0.125, p0=1.0, time_weighting=None, weighting=None, accumulate=True):
+        self.sr = sr
+        self.frame_length = frame_length
+        self.frame_size = int(frame_length * sr)
+        if self.frame_size <= 0:
+            raise ValueError("frame_length 过短")
+        self.p0 = p0
+        self._weighting = None if weighting is None else WeightingFilter(sr, weighting)
+        self._meter = None
+        if time_weighting is not None:
+            self._meter = TimeWeightedLevel(sr, time_weighting, hop_length=frame_length, p0=p0)
+        self.accumulate = accumulate
+        self._times = []
+        self._levels = []
+        self._tail = None
+
+    def update(self, block):
+        """
+        输入一块新数据
+
+        Returns
+        -------
+        np.ndarray
+            本块新增的声级 (dB)，形状 (n_new,) 或 (n_new, n_channels)
+        """
+        if self._weighting is not None:
+            block = self._weighting.process(np.asarray(block, dtype=np.float64))
+        if self._meter is not None:
+            times, levels = self._meter.process(block)
+            if self.accumulate:
+                self._times.append(times)
+                self._levels.append(levels)
+            return levels
+        buf = np.asarray(block) if self._tail is None else np.concatenate([self._tail, block])
+        n_full = len(buf) // self.frame_size
+        levels = np.zeros((0,) + buf.shape[1:])
+        if n_full:
+            frames = buf[:n_full * self.frame_size].reshape(n_full, self.frame_size, *buf.shape[1:])
+            rms = np.sqrt(np.mean(frames ** 2, axis=1))
+            levels = 20 * np.log10(rms / self.p0 + 1e-12)
+            if self.accumulate:
+                self._levels.append(levels)
+        self._tail = buf[n_full * self.frame_size:].copy()
+        return levels
+
+    def result(self):
+        """
+        Returns
+        -------
+        times, levels : np.ndarray
+        """
+        if not self.accumulate:
+            raise ValueError("accumulate=False 时不保存声级历史")
+        levels = np.concatenate(self._levels) if self._levels else np.zeros(0)
+        if self._meter is not None:
+            return (np.concatenate(self._times) if self._times else np.zeros(0)), levels
+        times = np.arange(len(levels)) * self.frame_length
+        return times, levels
+
+
+def stream_fft(path, mode="average", frame_size=4096, overlap=0.5, channel=0, blocksize=65536,
+               audio_filter=None, weighting=None, window="rectangular", backend="numpy", pad=False, progress=None):
+    """
+    流式 FFT 分析（平均 / 峰值保持），内存占用与文件长度无关
+
+    audio_filter 为可选的 StreamingFilter，每块数据先滤波再分析；
+    window / backend / pad 与 compute_fft 相同；
+    progress 为可选的进度回调 progress(fraction)。
+
+    Returns
+    -------
+    freqs, spectrum : np.ndarray
+    """
+    info = sf.info(path)
+    acc = StreamingSpectrum(info.samplerate, mode=mode, frame_size=frame_size, overlap=overlap, weighting=weighting,
+                            window=window, backend=backend, pad=pad)
+    for i, block in enumerate(iter_file_blocks(path, blocksize=blocksize, channel=channel), 1):
+        acc.update(block if audio_filter is None else audio_filter.process(block))
+        if progress is not None:
+            progress(min(i * blocksize / max(info.frames, 1), 1.0))
+    logger.info(f"流式 {mode} FFT 完成: {path}, frames={acc.n_frames}")
+    return acc.result()
+
+
+def stream_level_vs_time(path, frame_length=0.125, p0=1.0, channel=0, blocksize=65536,
+                         audio_filter=None, time_weighting=None, weighting=None, progress=None):
+    """
+    流式 Level vs Time 分析
+
+    time_weighting 为 None（分帧 RMS）或 "fast" / "slow" / "impulse"，
+    计权时每隔 frame_length 输出一次读数；weighting 为可选的频率计权 "A" / "C" / "Z"。
+    audio_filter 为可选的 StreamingFilter，每块数据先滤波再分析；
+    progress 为可选的进度回调 progress(fraction)。
+
+    Returns
+    -------
+    times, levels : np.ndarray
+    """
+    info = sf.info(path)
+    acc = StreamingLevel(info.samplerate, frame_length=frame_length, p0=p0, time_weighting=time_weighting,
+                         weighting=weighting)
+    for i, block in enumerate(iter_file_blocks(path, blocksize=blocksize, channel=channel), 1):
+        acc.update(block if audio_filter is None else audio_filter.process(block))
+        if progress is not None:
+            progress(min(i * blocksize / max(info.frames, 1), 1.0))
+    logger.info(f"流式 Level vs Time 完成: {path}")
+    return acc.result()
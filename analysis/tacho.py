@@ -0,0 +1,194 @@
+import numpy as np
+import logging
+from scipy.signal import medfilt
+
+from .audio_io import open_audio, channel_data
+from .order import RpmProfile
+
+logger = logging.getLogger(__name__)
+
+# 自动阈值估计时最多使用的采样点数
+_LEVEL_SAMPLES = 1 << 20
+
+
+def estimate_level(x, hysteresis=0.1):
+    """
+    估计脉冲信号的触发阈值
+
+    取信号 1% / 99% 分位数的中点为阈值，回差为两者之差的 hysteresis 倍。
+    长信号只抽取约一百万个点估计。
+
+    Returns
+    -------
+    level, low, high : float
+        阈值与施密特触发的下限 / 上限
+    """
+    step = max(1, len(x) // _LEVEL_SAMPLES)
+    sample = np.asarray(x[::step], dtype=np.float32)
+    p_low, p_high = np.percentile(sample, [1, 99])
+    if p_high <= p_low:
+        raise ValueError("转速脉冲通道没有有效的脉冲")
+    level = (p_low + p_high) / 2
+    band = hysteresis * (p_high - p_low) / 2
+    return level, level - band, level + band
+
+
+def detect_edges(x, sr, level=None, hysteresis=0.1, falling=False, chunk_size=1 << 18):
+    """
+    检测脉冲边沿的时刻（向量化施密特触发 + 亚采样插值）
+
+    施密特触发：信号高于上限记为高电平，低于下限记为低电平，两者之间保持原状态，
+    抑制噪声引起的重复触发。只需找出「超过上限」与「低于下限」两类事件的位置，
+    按位置合并后保留由低变高的事件，运算量与脉冲数成正比，与采样数无关的部分只有几次比较。
+    边沿时刻取触发前最后一次穿越阈值处的线性插值；该穿越可能位于上一块，
+    因此跨块保存最后一次穿越的时刻，结果与 chunk_size 无关。
+
+    Parameters
+    ----------
+    x : np.ndarray or ChannelView
+        一维脉冲信号，按块读取
+    sr : int
+        采样率
+    level : float
+        触发阈值，None 为自动估计
+    hysteresis : float
+        回差占脉冲幅度的比例
+    falling : bool
+        True 时检测下降沿
+    chunk_size : int
+        每次读取的采样数
+
+    Returns
+    -------
+    np.ndarray
+        边沿时刻 (秒)
+    """
+    if level is None:
+        level, low, high = estimate_level(x, hysteresis)
+    else:
+        low, high = level, level
+    sign = 1.0
+    if falling:
+        # 下降沿按反相信号的上升沿检测
+        sign, level, low, high = -1.0, -level, -high, -low
+
+    def crossing_times(seg, lo, c):
+        x0, x1 = seg[c - 1].astype(np.float64), seg[c].astype(np.float64)
+        frac = np.clip((level - x0) / np.where(x1 != x0, x1 - x0, 1.0), 0.0, 1.0)
+        return (lo + c - 1 + frac) / sr
+
+    edges = []
+    state = None  # 上一块结束时的触发状态：True 高电平，False 低电平，None 未知
+    last_cross = None  # 此前最后一次向上穿越阈值的时刻 (秒)
+    n = len(x)
+    for start in range(0, n, chunk_size):
+        # 与上一块重叠一个采样，块边界处的跳变也能检测到
+        lo = max(start - 1, 0)
+        seg = sign * np.asarray(x[lo:start + chunk_size], dtype=np.float32)
+
+        above = seg > high
+        below = seg < low
+        rise_high = np.flatnonzero(above[1:] & ~above[:-1]) + 1  # 开始高于上限
+        fall_low = np.flatnonzero(below[1:] & ~below[:-1]) + 1  # 开始低于下限
+        if start == 0:
+            # 信号开头的状态
+            if above[0]:
+                state = True
+            elif below[0]:
+                state = False
+
+        # 合并两类事件，保留状态由低变高的「高于上限」事件
+        pos = np.concatenate([rise_high, fall_low])
+        kind = np.concatenate([np.ones(len(rise_high), bool), np.zeros(len(fall_low), bool)])
+        order = np.argsort(pos, kind="stable")
+        pos, kind = pos[order], kind[order]
+        prev = np.concatenate([[state if state is not None else True], kind[:-1]])
+        trig = pos[kind & ~prev]
+        if len(kind):
+            state = bool(kind[-1])
+
+        # 亚采样插值：触发前最后一次向上穿越阈值的时刻，本块中没有时沿用上一块的最后一次穿越
+        cross = np.flatnonzero((seg[:-1] < level) & (seg[1:] >= level)) + 1
+        cross_t = crossing_times(seg, lo, cross)
+        if len(trig):
+            i = np.searchsorted(cross, trig, side="right") - 1
+            before = crossing_times(seg, lo, trig) if last_cross is None else np.full(len(trig), last_cross)
+            edges.append(np.where(i >= 0, cross_t[np.maximum(i, 0)] if len(cross) else 0.0, before))
+        if len(cross):
+            last_cross = float(cross_t[-1])
+
+    return np.concatenate(edges) if edges else np.zeros(0)
+
+
+def rpm_from_edges(edge_times, pulses_per_rev=1, average_pulses=None, outlier_ratio=0.4):
+    """
+    由边沿时刻计算平滑的转速曲线
+
+    Parameters
+    ----------
+    edge_times : np.ndarray
+        脉冲边沿时刻 (秒)
+    pulses_per_rev : int
+        每转脉冲数
+    average_pulses : int
+        滑动平均的脉冲间隔数，默认等于每转脉冲数（按整转平均，消除齿距误差）；
+        输出点的间隔为半个平均窗口
+    outlier_ratio : float
+        与局部中值相差超过该比例的脉冲间隔视为漏检 / 误检，不参与计算
+
+    Returns
+    -------
+    RpmProfile
+    """
+    edge_times = np.asarray(edge_times, dtype=np.float64)
+    if len(edge_times) < 3:
+        raise ValueError("检测到的转速脉冲过少，请检查通道与触发阈值")
+    periods = np.diff(edge_times)
+    mids = (edge_times[:-1] + edge_times[1:]) / 2
+
+    if outlier_ratio is not None and len(periods) >= 9:
+        local = medfilt(periods, 9)
+        keep = np.abs(periods / local - 1) <= outlier_ratio
+        if np.count_nonzero(keep) >= 2:
+            periods, mids = periods[keep], mids[keep]
+
+    k = max(1, min(average_pulses or pulses_per_rev, len(periods)))
+    # 滑动平均：每 k 个相邻间隔的总时长，窗口每次移动半个窗长，点数约为每转两个
+    csum = np.concatenate([[0.0], np.cumsum(periods)])
+    cmid = np.concatenate([[0.0], np.cumsum(mids)])
+    starts = np.arange(0, len(periods) - k + 1, max(1, k // 2))
+    rpm = 60.0 * k / (pulses_per_rev * (csum[starts + k] - csum[starts]))
+    times = (cmid[starts + k] - cmid[starts]) / k
+    return RpmProfile(times, rpm)
+
+
+def extract_rpm(x, sr, pulses_per_rev=1, level=None, hysteresis=0.1, falling=False, average_pulses=None):
+    """
+    从转速脉冲通道提取转速曲线
+
+    Parameters
+    ----------
+    x : np.ndarray or ChannelView
+        一维脉冲信号
+    sr : int
+        采样率
+    pulses_per_rev : int
+        每转脉冲数
+
+    Returns
+    -------
+    RpmProfile
+    """
+    edges = detect_edges(x, sr, level=level, hysteresis=hysteresis, falling=falling)
+    logger.info(f"检测到 {len(edges)} 个转速脉冲")
+    return rpm_from_edges(edges, pulses_per_rev=pulses_per_rev, average_pulses=average_pulses)
+
+
+def extract_rpm_from_file(path, channel, pulses_per_rev=1, **kwargs):
+    """
+    从音频文件的转速脉冲通道提取转速曲线
+
+    与界面加载音频使用同一个读取入口 (open_audio)，WAV 文件按内存映射分块读取。
+    """
+    source, sr = open_audio(path)
+    return extract_rpm(channel_data(source, channel), sr, pulses_per_rev=pulses_per_rev, **kwargs)
@@ -0,0 +1,199 @@
+import numpy as np
+import threading
+from collections import OrderedDict
+
+
+class Waterfall:
+    """
+    按时间或转速台阶索引的瀑布图（增量计算）
+
+    每条谱线是以该台阶对应时刻为中心的一帧幅度谱。已计算的谱线按帧起点缓存
+    （按字节预算淘汰的 LRU），修改显示范围或颜色范围时直接复用；扩大台阶范围
+    或加密步长时只计算缺少的帧，缺少的帧分批读取后对整批做一次 rfft。
+
+    Parameters
+    ----------
+    y : np.ndarray or ChannelView
+        一维或 (n_samples, n_channels) 信号，只读取被选中的帧
+    sr : int
+        采样率
+    frame_size : int
+        每帧大小
+    profile : RpmProfile
+        转速曲线，按转速索引时需要
+    hop_size : int
+        按转速索引时候选帧的间隔，默认半帧
+    max_bytes : int
+        谱线缓存的字节预算
+    """
+
+    def __init__(self, y, sr, frame_size=4096, profile=None, hop_size=None, max_bytes=256 * 1024 * 1024):
+        if len(y) < frame_size:
+            raise ValueError("音频过短，无法分帧计算")
+        self.y = y
+        self.sr = sr
+        self.frame_size = frame_size
+        self.profile = profile
+        self.hop_size = hop_size or frame_size // 2
+        self.max_bytes = max_bytes
+        self.freqs = np.fft.rfftfreq(frame_size, 1 / sr)
+        self._spectra = OrderedDict()  # 帧起点 -> 幅度谱 (float32)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._candidates = None
+        self.computed = 0  # 累计计算的帧数
+
+    @property
+    def duration(self):
+        return len(self.y) / self.sr
+
+    # -----------------------------
+    # 台阶 -> 帧
+    def frames_at_times(self, times):
+        """以各时刻为中心的帧起点（超出信号范围的时刻贴靠首尾帧）"""
+        starts = np.round(np.asarray(times, dtype=np.float64) * self.sr - self.frame_size / 2)
+        return np.clip(starts, 0, len(self.y) - self.frame_size).astype(np.int64)
+
+    def frames_at_rpm(self, rpm):
+        """
+        各转速台阶对应的帧起点
+
+        在转速曲线覆盖范围内按 hop_size 取候选帧，每个台阶取中心转速最接近的一帧。
+
+        Returns
+        -------
+        starts : np.ndarray
+            帧起点
+        frame_rpm : np.ndarray
+            所选帧中心的实际转速
+        """
+        candidates, cand_rpm = self._rpm_candidates()
+        order = np.argsort(cand_rpm, kind="stable")
+        sorted_rpm = cand_rpm[order]
+        rpm = np.asarray(rpm, dtype=np.float64)
+        pos = np.clip(np.searchsorted(sorted_rpm, rpm), 0, len(sorted_rpm) - 1)
+        left = np.maximum(pos - 1, 0)
+        pos = np.where(np.abs(sorted_rpm[left] - rpm) <= np.abs(sorted_rpm[pos] - rpm), left, pos)
+        chosen = candidates[order[pos]]
+        return chosen * self.hop_size, cand_rpm[order[pos]]
+
+    def _rpm_candidates(self):
+        """转速曲线覆盖范围内的候选帧序号及其中心转速"""
+        if self.profile is None:
+            raise ValueError("按转速索引需要转速曲线")
+        if self._candidates is None:
+            n_frames = (len(self.y) - self.frame_size) // self.hop_size + 1
+            centres = (np.arange(n_frames) * self.hop_size + self.frame_size / 2) / self.sr
+            candidates = np.flatnonzero((centres >= self.profile.start) & (centres <= self.profile.end))
+            if len(candidates) == 0:
+                raise ValueError("转速曲线与信号的时间范围不重叠")
+            self._candidates = (candidates, self.profile.rpm_at(centres[candidates]))
+        return self._candidates
+
+    def rpm_range(self):
+        """候选帧的转速范围"""
+        _, cand_rpm = self._rpm_candidates()
+        return float(cand_rpm.min()), float(cand_rpm.max())
+
+    # -----------------------------
+    # 谱线
+    def spectra(self, starts, chunk_size=256, progress=None):
+        """
+        各帧起点的幅度谱，缺少的帧分批计算并缓存
+
+        Returns
+        -------
+        np.ndarray
+            (n, n_freqs) 或 (n, n_channels, n_freqs) 的幅度谱 (float32)
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        with self._lock:
+            # 本次请求的谱线先取出来，计算新谱线时的淘汰不影响返回结果
+            found = {}
+            unique = [int(s) for s in np.unique(starts)]
+            for s in unique:
+                if s in self._spectra:
+                    found[s] = self._spectra[s]
+                    self._spectra.move_to_end(s)
+            missing = np.array([s for s in unique if s not in found], dtype=np.int64)
+            for i in range(0, len(missing), chunk_size):
+                if progress is not None:
+                    progress(i / len(missing))
+                batch = missing[i:i + chunk_size]
+                frames = np.stack([np.asarray(self.y[s:s + self.frame_size]) for s in batch])
+                block = (np.abs(np.fft.rfft(np.moveaxis(frames, 1, -1), axis=-1)) / self.frame_size).astype(np.float32)
+                for s, spectrum in zip(map(int, batch), block):
+                    found[s] = spectrum
+                    self._store(s, spectrum)
+            self.computed += len(missing)
+        return np.stack([found[int(s)] for s in starts])
+
+    def _store(self, start, spectrum):
+        self._spectra[start] = spectrum
+        self._bytes += spectrum.nbytes
+        # 淘汰最久未使用的谱线（至少保留刚存入的一条）
+        while self._bytes > self.max_bytes and len(self._spectra) > 1:
+            _, old = self._spectra.popitem(last=False)
+            self._bytes -= old.nbytes
+
+    def time_slices(self, start=None, stop=None, step=None, progress=None):
+        """
+        按时间台阶取谱线
+
+        Parameters
+        ----------
+        start, stop : float
+            时间范围 (秒)，默认整段信号
+        step : float
+            时间步长，默认分为约 200 条谱线
+
+        Returns
+        -------
+        times : np.ndarray
+            各谱线的中心时刻
+        spectra : np.ndarray
+            幅度谱
+        """
+        half = self.frame_size / 2 / self.sr
+        start = half if start is None else max(start, half)
+        stop = self.duration - half if stop is None else min(stop, self.duration - half)
+        step = step or max((stop - start) / 200, self.frame_size / self.sr / 4)
+        times = _steps(start, stop, step)
+        starts = self.frames_at_times(times)
+        return (starts + self.frame_size / 2) / self.sr, self.spectra(starts, progress=progress)
+
+    def rpm_slices(self, start=None, stop=None, step=50.0, chunk_size=256, progress=None):
+        """
+        按转速台阶取谱线
+
+        Parameters
+        ----------
+        start, stop : float
+            转速范围 (rpm)，默认转速曲线在信号范围内的全部转速
+        step : float
+            转速步长 (rpm)
+
+        Returns
+        -------
+        rpm : np.ndarray
+            各谱线所在帧的实际中心转速（递增，相邻台阶选中同一帧时只保留一条）
+        spectra : np.ndarray
+            幅度谱
+        """
+        lo, hi = self.rpm_range()
+        start = lo if start is None else max(start, lo)
+        stop = hi if stop is None else min(stop, hi)
+        starts, frame_rpm = self.frames_at_rpm(_steps(start, stop, step))
+        starts, first = np.unique(starts, return_index=True)
+        order = np.argsort(frame_rpm[first], kind="stable")
+        return frame_rpm[first][order], self.spectra(starts[order], chunk_size=chunk_size, progress=progress)
+
+
+def _steps(start, stop, step):
+    """start 起按 step 递增、不超过 stop 的台阶（对齐到 step 的整数倍，便于复用缓存）"""
+    if step <= 0:
+        raise ValueError("步长必须大于 0")
+    first = np.ceil(start / step - 1e-9)
+    last = np.floor(stop / step + 1e-9)
+    steps = np.arange(first, last + 1) * step
+    return steps if len(steps) else np.array([start])
@@ -0,0 +1,112 @@
+import numpy as np
+from functools import lru_cache
+from scipy.optimize import least_squares
+from scipy.signal import bilinear_zpk, zpk2sos, sosfreqz
+
+from .filter import SosStreamingFilter
+
+# IEC 61672-1 频率计权的极点频率 (Hz)
+_F1, _F2, _F3, _F4 = 20.598997, 107.65265, 737.86223, 12194.217
+# 1 kHz 处归一化为 0 dB 的修正量
+_A1000 = 1.9997
+_C1000 = 0.0619
+WEIGHTINGS = ("A", "C", "Z")
+
+
+def _check(curve):
+    curve = curve.upper()
+    if curve not in WEIGHTINGS:
+        raise ValueError(f"未知频率计权: {curve}")
+    return curve
+
+
+def weighting_db(freqs, curve="A"):
+    """
+    频率计权的理论值 (dB)
+
+    Parameters
+    ----------
+    freqs : np.ndarray
+        频率 (Hz)
+    curve : str
+        "A"、"C" 或 "Z"（不计权）
+    """
+    curve = _check(curve)
+    f2 = np.asarray(freqs, dtype=np.float64) ** 2
+    if curve == "Z":
+        return np.zeros_like(f2)
+    with np.errstate(divide="ignore"):
+        if curve == "A":
+            r = (_F4 ** 2 * f2 ** 2) / ((f2 + _F1 ** 2) * np.sqrt((f2 + _F2 ** 2) * (f2 + _F3 ** 2)) * (f2 + _F4 ** 2))
+            return 20 * np.log10(r) + _A1000
+        r = (_F4 ** 2 * f2) / ((f2 + _F1 ** 2) * (f2 + _F4 ** 2))
+        return 20 * np.log10(r) + _C1000
+
+
+@lru_cache(maxsize=64)
+def frequency_weights(n_fft, sr, curve="A"):
+    """
+    rfft 频率轴上的线性计权增益（按 (n_fft, sr, curve) 缓存）
+
+    幅度谱乘以该向量即为计权谱；返回只读数组，形状 (n_fft // 2 + 1,)。
+    """
+    gain = 10 ** (weighting_db(np.fft.rfftfreq(n_fft, 1 / sr), curve) / 20)
+    gain.flags.writeable = False
+    return gain
+
+
+@lru_cache(maxsize=32)
+def design_weighting(sr, curve="A"):
+    """
+    时域计权滤波器（二阶节 SOS 形式，按采样率缓存）
+
+    模拟原型的零极点经双线性变换得到，并在 1 kHz 处归一化为 0 dB。
+    双线性变换使接近奈奎斯特频率的高频段偏低（48 kHz 下 16 kHz 约 -6 dB），
+    末尾追加一节按最小二乘拟合的校正二阶节，1 kHz 以上误差约 ±0.5 dB。
+    Z 计权返回 None。
+    """
+    curve = _check(curve)
+    if curve == "Z":
+        return None
+    w = 2 * np.pi * np.array([_F1, _F1, _F4, _F4] + ([_F2, _F3] if curve == "A" else []))
+    n_zeros = 4 if curve == "A" else 2
+    z, p, k = bilinear_zpk(np.zeros(n_zeros), -w, 1.0, sr)
+    sos = zpk2sos(z, p, k)
+    sos = np.vstack([sos, _high_frequency_correction(sos, sr, curve)])
+    _, h = sosfreqz(sos, worN=[1000.0], fs=sr)
+    sos[0, :3] /= np.abs(h[0])
+    sos.flags.writeable = False
+    return sos
+
+
+def _high_frequency_correction(sos, sr, curve):
+    """拟合一节二阶节（共轭零点对 / 极点对），补偿双线性变换在高频的偏差"""
+    f = np.geomspace(1000.0, min(20000.0, 0.47 * sr), 200)
+    _, h = sosfreqz(sos, worN=f, fs=sr)
+    target = weighting_db(f, curve) - 20 * np.log10(np.abs(h))
+    target -= target[0]
+
+    def section(params):
+        rz, tz, rp, tp = params
+        return np.array([1.0, -2 * rz * np.cos(tz), rz * rz, 1.0, -2 * rp * np.cos(tp), rp * rp])
+
+    def error(params):
+        _, hc = sosfreqz(section(params)[np.newaxis], worN=f, fs=sr)
+        gain = 20 * np.log10(np.abs(hc))
+        return gain - gain[0] - target
+
+    fit = least_squares(error, [0.5, 2.5, 0.5, 2.0], bounds=([0, 0, 0, 0], [0.99, np.pi, 0.99, np.pi]))
+    return section(fit.x)
+
+
+class WeightingFilter(SosStreamingFilter):
+    """
+    有状态的分块频率计权滤波器（因果，与声级计一致），接口与 StreamingFilter 相同，
+    可作为流式分析与播放的 audio_filter
+    """
+
+    def __init__(self, sr, curve="A"):
+        self.curve = _check(curve)
+        sos = design_weighting(sr, self.curve)
+        # Z 计权用单位增益的一节直通滤波器
+        super().__init__(sr, [[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]] if sos is None else sos)
@@ -0,0 +1,147 @@
+"""
+流式播放：用模拟输出流逐块驱动回调，检查暂停、跳转、循环与更换滤波器
+
+运行: python -m pytest tests
+"""
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError) as e:  # 没有 PortAudio 的环境
+    pytest.skip(f"sounddevice 不可用: {e}", allow_module_level=True)
+from PyQt6.QtCore import QCoreApplication
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from analysis.filter import StreamingFilter  # noqa: E402
+from ui.analysis_panel.audio_player import AudioPlayer  # noqa: E402
+
+SR = 8000
+BLOCK = 256
+LATENCY = 2 * BLOCK / SR  # 输出缓冲区中尚未播放的时长
+
+
+class FakeProgressBar:
+    def setRange(self, *args):
+        pass
+
+    def setValue(self, value):
+        self.value = value
+
+    def setFormat(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """模拟 sd.OutputStream：run() 逐块调用回调，流时钟按块前进"""
+
+    def __init__(self, samplerate, channels, dtype, blocksize, callback):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.time = 0.0
+        self.active = False
+
+    def start(self):
+        self.active = True
+
+    def abort(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+    def run(self, n_blocks):
+        out = []
+        for _ in range(n_blocks):
+            if not self.active:
+                break
+            outdata = np.zeros((self.blocksize, 1), dtype=np.float32)
+            time_info = SimpleNamespace(outputBufferDacTime=self.time + LATENCY)
+            try:
+                self.callback(outdata, self.blocksize, time_info, None)
+            except sd.CallbackStop:
+                self.active = False
+            out.append(outdata[:, 0].copy())
+            self.time += self.blocksize / self.samplerate
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def qt_app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def player():
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeStream(**kwargs))
+        return streams[-1]
+
+    p = AudioPlayer(FakeProgressBar(), stream_factory=factory, blocksize=BLOCK)
+    p.streams = streams
+    yield p
+    p.stop()
+
+
+def ramp(n):
+    return (np.arange(n) / n).astype(np.float32)
+
+
+def test_plays_blocks_in_order_and_finishes(player):
+    data = ramp(BLOCK * 5 + 100)
+    player.play(data, SR)
+    out = player.streams[-1].run(10)
+    np.testing.assert_array_equal(out[:len(data)], data)
+    assert not np.any(out[len(data):])
+    player.update_progress()
+    assert player.finished_flag
+
+
+def test_pause_resumes_from_heard_position(player):
+    data = ramp(BLOCK * 20)
+    player.play(data, SR)
+    stream = player.streams[-1]
+    stream.run(4)
+    # 已送出 4 块，其中 2 块仍在输出缓冲区中
+    assert player.position() == 2 * BLOCK
+    player.pause()
+    assert player.is_paused and player.position() == 2 * BLOCK
+    player.pause()
+    np.testing.assert_array_equal(stream.run(1), data[2 * BLOCK:3 * BLOCK])
+
+
+def test_seek(player):
+    data = ramp(SR * 3)
+    player.play(data, SR)
+    stream = player.streams[-1]
+    stream.run(2)
+    player.seek(1.5)
+    assert player.position() == int(1.5 * SR)
+    np.testing.assert_array_equal(stream.run(1), data[int(1.5 * SR):int(1.5 * SR) + BLOCK])
+
+
+def test_loop_wraps_to_start(player):
+    data = ramp(BLOCK * 2 + 100)
+    player.loop = True
+    player.play(data, SR)
+    out = player.streams[-1].run(4)
+    np.testing.assert_array_equal(out, np.tile(data, 3)[:4 * BLOCK])
+    assert player.streams[-1].active
+
+
+def test_set_filter_keeps_position(player):
+    data = ramp(SR * 2)
+    player.play(data, SR)
+    stream = player.streams[-1]
+    stream.run(6)
+    before = player.position()
+    player.set_filter(StreamingFilter(SR, 1000.0))
+    assert player.position() == before
+    stream.run(1)
+    assert player.position() == before + BLOCK
@@ -0,0 +1,86 @@
+"""
+向量化 FFT 与原逐帧循环实现的一致性
+
+运行: python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from analysis.fft_processor import compute_fft  # noqa: E402
+
+
+def baseline_fft(y, sr, mode="single", frame_size=4096, overlap=0.5):
+    """原实现（逐帧循环）的副本，作为对照"""
+    n = len(y)
+    if mode == "single":
+        return np.fft.rfftfreq(n, 1 / sr), np.abs(np.fft.rfft(y) / n)
+
+    hop_size = int(frame_size * (1 - overlap))
+    n_frames = (len(y) - frame_size) // hop_size + 1
+    if n_frames <= 0:
+        raise ValueError("音频过短，无法分帧计算")
+    avg_spectrum = None
+    peak_spectrum = None
+    freqs = None
+    for i in range(n_frames):
+        start = i * hop_size
+        frame = y[start:start + frame_size]
+        if len(frame) < frame_size:
+            break
+        freqs = np.fft.rfftfreq(frame_size, 1 / sr)
+        spectrum = np.abs(np.fft.rfft(frame) / frame_size)
+        if mode == "average":
+            avg_spectrum = spectrum if avg_spectrum is None else avg_spectrum + spectrum
+        elif mode == "peak":
+            peak_spectrum = spectrum if peak_spectrum is None else np.maximum(peak_spectrum, spectrum)
+    if mode == "average":
+        return freqs, avg_spectrum / n_frames
+    return freqs, peak_spectrum
+
+
+@pytest.fixture(scope="module")
+def signal():
+    sr = 48000
+    t = np.arange(sr * 3) / sr
+    rng = np.random.default_rng(0)
+    y = 0.5 * np.sin(2 * np.pi * 1000 * t) + 0.1 * rng.standard_normal(len(t))
+    return y.astype(np.float32), sr
+
+
+def assert_matches(result, expected):
+    freqs, spectrum = result
+    np.testing.assert_array_equal(freqs, expected[0])
+    np.testing.assert_allclose(spectrum, expected[1], rtol=1e-5, atol=1e-8)  # float32 累加顺序不同
+
+
+def test_single(signal):
+    y, sr = signal
+    assert_matches(compute_fft(y, sr, mode="single"), baseline_fft(y, sr, mode="single"))
+
+
+@pytest.mark.parametrize("mode", ["average", "peak"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+@pytest.mark.parametrize("frame_size, overlap", [(4096, 0.5), (1000, 0.75), (2048, 0.0)])
+def test_framed(signal, mode, chunk_size, frame_size, overlap):
+    y, sr = signal
+    expected = baseline_fft(y, sr, mode, frame_size, overlap)
+    assert_matches(compute_fft(y, sr, mode, frame_size, overlap, chunk_size=chunk_size), expected)
+
+
+@pytest.mark.parametrize("mode", ["single", "average", "peak"])
+def test_multichannel(signal, mode):
+    y, sr = signal
+    stereo = np.column_stack([y, np.roll(y, 1234) * 0.5])
+    freqs, spectrum = compute_fft(stereo, sr, mode, frame_size=2048, chunk_size=16)
+    assert spectrum.shape == (len(freqs), 2)
+    for c in range(2):
+        assert_matches((freqs, spectrum[:, c]), baseline_fft(stereo[:, c], sr, mode, frame_size=2048))
+
+
+def test_too_short(signal):
+    y, sr = signal
+    with pytest.raises(ValueError):
+        compute_fft(y[:100], sr, mode="average", frame_size=4096)
@@ -0,0 +1,30 @@
+"""
+多通道进程池：结果与直接计算一致，进程池在多次调用间复用
+
+运行: python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import analysis.parallel as parallel  # noqa: E402
+from analysis.fft_processor import compute_fft  # noqa: E402
+
+
+def test_pool_is_reused_and_matches_direct_call():
+    y = np.random.default_rng(0).standard_normal((48000 * 2, 4)).astype(np.float32)
+    freqs, expected = compute_fft(y, 48000, mode="average", frame_size=2048)
+    try:
+        pools = []
+        for _ in range(2):
+            f, spectrum = parallel.run_multichannel(compute_fft, y, 48000, max_workers=2, threshold=0,
+                                                    mode="average", frame_size=2048)
+            np.testing.assert_array_equal(f, freqs)
+            np.testing.assert_allclose(spectrum, expected, rtol=1e-6, atol=1e-9)
+            pools.append(parallel._pool)
+        assert pools[0] is not None and pools[0] is pools[1]
+        assert pools[0]._mp_context.get_start_method() == "spawn"
+    finally:
+        parallel.shutdown_pool()
+    assert parallel._pool is None
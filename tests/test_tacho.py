@@ -0,0 +1,44 @@
+"""
+转速脉冲边沿检测
+
+运行: python -m pytest tests
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from analysis.order import RpmProfile  # noqa: E402
+from analysis.tacho import detect_edges  # noqa: E402
+
+
+def pulse_signal(sr=51200, duration=20.0, pulses_per_rev=60, seed=0):
+    """升速过程的正弦转速脉冲（带噪声）及各上升沿的理论时刻
+
+    正弦波从阈值上升到施密特上限需要若干采样，块边界常落在两者之间。
+    """
+    profile = RpmProfile(np.array([0.0, duration]), np.array([600.0, 6000.0]))
+    t = np.arange(int(sr * duration)) / sr
+    phase = profile.revolutions(t) * pulses_per_rev
+    noise = np.random.default_rng(seed).standard_normal(len(t)).astype(np.float32)
+    x = np.sin(2 * np.pi * phase).astype(np.float32) + np.float32(0.01) * noise
+    edges = profile.time_at(np.arange(1, profile.revolutions(duration) * pulses_per_rev) / pulses_per_rev)
+    return x, sr, edges
+
+
+@pytest.mark.parametrize("chunk_size", [997, 12345, 1 << 16])
+def test_edges_independent_of_chunk_size(chunk_size):
+    x, sr, _ = pulse_signal()
+    reference = detect_edges(x, sr, chunk_size=len(x))
+    edges = detect_edges(x, sr, chunk_size=chunk_size)
+    assert len(edges) == len(reference)
+    np.testing.assert_allclose(edges, reference, rtol=0, atol=1e-12)
+
+
+def test_edges_match_pulse_times():
+    x, sr, expected = pulse_signal()
+    edges = detect_edges(x, sr, chunk_size=4096)
+    assert len(edges) == len(expected)
+    assert np.all(np.diff(edges) > 0)
+    assert np.max(np.abs(edges - expected)) * sr < 1.0
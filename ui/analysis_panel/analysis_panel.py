@@ -1,21 +1,75 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QProgressBar, QMessageBox
-from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QProgressBar, QMessageBox, QListWidget, QListWidgetItem, QFileDialog, QInputDialog, QCheckBox
+from PyQt6.QtCore import QTimer, Qt, pyqtSignal
+import os
+import functools
 import logging
 import numpy as np
 # 引入同一包内的模块，用相对导入
 from .audio_player import AudioPlayer
 from .filter_widget import FilterWidget
 from .plot_widget import PlotWidget
+from .analysis_worker import AnalysisWorker
+from .live_view import LiveView
 
 # 引入算法模块
 from analysis.fft_processor import compute_fft
-from analysis.filter import butter_filter
+from analysis.filter import butter_filter, StreamingFilter
 from analysis.level_vs_time import compute_level_vs_time
+from analysis.octave import compute_octave_levels, compute_octave_level_vs_time
+from analysis.order import RpmProfile, compute_order_spectrum, compute_order_cuts
+from analysis.streaming import stream_fft, stream_level_vs_time
+from analysis.audio_io import select_channels
+from analysis.tacho import extract_rpm, extract_rpm_from_file
+from analysis.waterfall import Waterfall
+from analysis.envelope import EnvelopePyramid
+from analysis.cross_spectrum import compute_psd, compute_cross_spectra, frequency_response
+from analysis.live import LiveMonitor, SyntheticInputStream, FileInputStream, ArrayInputStream
+from analysis.compare import batch_compute, align_results, compare_statistics
+from analysis.peaks import PeakIndex
+from analysis.spectrogram import iter_spectrogram_blocks
+from analysis.parallel import run_multichannel
+from analysis.cache import ResultCache
 
 
 logger = logging.getLogger(__name__)
 
+# 分析结果磁盘缓存目录
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".nvh_cache")
+# Level vs Time 的时间计权选项
+TIME_WEIGHTING_OPTIONS = {"分帧 RMS": None, "Fast": "fast", "Slow": "slow", "Impulse": "impulse"}
+# FFT 与 Level vs Time 的频率计权选项，Z 即不计权
+FREQ_WEIGHTING_OPTIONS = {"Z (不计权)": None, "A": "A", "C": "C"}
+# FFT 窗函数与计算后端
+FFT_WINDOW_OPTIONS = {"矩形 (不加窗)": "rectangular", "Hann": "hann", "Hamming": "hamming", "Blackman": "blackman",
+                      "Blackman-Harris": "blackmanharris", "Flat top": "flattop", "Kaiser": "kaiser"}
+FFT_BACKEND_OPTIONS = {"numpy.fft": "numpy", "scipy.fft (多线程)": "scipy"}
+# 阶次分析参数
+MAX_ORDER = 32
+REVS_PER_FRAME = 8
+ORDER_ANALYSES = ("阶次谱", "阶次切片", "转速瀑布图")
+WATERFALL_FRAME = 4096
+# 功率谱密度与双通道分析（第一个所选通道为参考 / 输入通道）
+CROSS_ANALYSES = ("互功率谱 (CSD)", "频响函数 H1", "频响函数 H2", "相干函数")
+RPM_STEP = 50.0
+# 实时监测的输入来源
+LIVE_SOURCES = ("声卡输入", "模拟信号", "当前音频回放")
+LIVE_SAMPLE_RATE = 48000
+# 多文件对比的显示方式
+COMPARE_MODES = ("叠加曲线", "统计 (均值 / 包络 / 分位数)")
+# 音调峰值检测：TNR 下限 (dB)、频谱图上标注文字的峰数、声谱图每帧保留的峰数
+PEAK_MIN_TNR = 10.0
+PEAK_LABELS = 10
+PEAK_MAX_PER_FRAME = 5
+PEAK_MAX_MARKERS = 5000
+
+def level_label(weighting):
+    """声级坐标轴标签，如 声级 (dBFS)、声级 (dB(A))"""
+    return "声级 (dBFS)" if weighting is None else f"声级 (dB({weighting}))"
+
+
 class AnalysisPanel(QWidget):
+    compare_requested = pyqtSignal()  # 请求对比文件列表中所选的文件
+
     def __init__(self):
         super().__init__()
 
@@ -30,15 +84,54 @@ class AnalysisPanel(QWidget):
             "FFT(single)","FFT(average)","FFT(peak hold)",
             "波形分析 (Waveform)",
             "colormap",
-            "Level vs Time"
+            "时间瀑布图",
+            "Level vs Time",
+            "功率谱密度 (PSD)", *CROSS_ANALYSES,
+            "1/1 倍频程", "1/3 倍频程", "1/3 倍频程 vs Time",
+            *ORDER_ANALYSES
         ])
+        self.time_weighting_combo = QComboBox()
+        self.time_weighting_combo.addItems(list(TIME_WEIGHTING_OPTIONS))
+        self.freq_weighting_combo = QComboBox()
+        self.freq_weighting_combo.addItems(list(FREQ_WEIGHTING_OPTIONS))
+        self.fft_window_combo = QComboBox()
+        self.fft_window_combo.addItems(list(FFT_WINDOW_OPTIONS))
+        self.fft_backend_combo = QComboBox()
+        self.fft_backend_combo.addItems(list(FFT_BACKEND_OPTIONS))
+        self.fft_pad_check = QCheckBox("补零到快速 FFT 长度")
+        # 阶次分析：转速曲线与切片阶次
+        self.rpm_button = QPushButton("加载转速曲线 (CSV)")
+        self.tacho_button = QPushButton("从转速脉冲通道提取")
+        self.rpm_label = QLabel("转速曲线：未加载")
+        self.order_input = QLineEdit("1,2,4")
+        self.order_input.setPlaceholderText("阶次切片，如 2,4,6")
+        # 瀑布图：台阶范围与颜色范围
+        self.waterfall_range_input = QLineEdit()
+        self.waterfall_range_input.setPlaceholderText("起,止,步长（秒或 rpm），留空为全部")
+        self.color_range_input = QLineEdit()
+        self.color_range_input.setPlaceholderText("颜色动态范围 (dB)，如 80")
         self.analysis_button = QPushButton("开始分析")
+        # 多文件对比：对文件列表中所选的文件执行当前分析
+        self.compare_mode_combo = QComboBox()
+        self.compare_mode_combo.addItems(list(COMPARE_MODES))
+        self.compare_button = QPushButton("对比所选文件")
+        # 音调峰值：FFT / PSD / 声谱图分析后自动检测并标注
+        self.peak_check = QCheckBox("检测并标注音调峰值")
+        self.export_peaks_button = QPushButton("导出峰值表 (CSV)")
+        # 多通道：勾选需要同时显示的通道
+        self.channel_list = QListWidget()
+        self.channel_list.setMaximumHeight(90)
         # 播放控件
         self.play_pause_button = QPushButton("播放")
         self.stop_button = QPushButton("停止")
+        self.loop_check = QCheckBox("循环播放")
         self.export_button = QPushButton("导出滤波音频")
         self.progress_bar = QProgressBar()
         self.progress_bar.setFormat("0.00 / 0.00 s")
+        # 实时监测
+        self.live_source_combo = QComboBox()
+        self.live_source_combo.addItems(list(LIVE_SOURCES))
+        self.live_button = QPushButton("实时监测")
 
         # 布局
         layout = QVBoxLayout()
@@ -49,11 +142,37 @@ class AnalysisPanel(QWidget):
         layout.addWidget(self.apply_button)
         layout.addWidget(self.play_pause_button)
         layout.addWidget(self.stop_button)
+        layout.addWidget(self.loop_check)
         layout.addWidget(self.export_button)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(QLabel("实时监测输入"))
+        layout.addWidget(self.live_source_combo)
+        layout.addWidget(self.live_button)
         layout.addWidget(QLabel("分析方式"))
         layout.addWidget(self.analysis_type_combo)
+        layout.addWidget(QLabel("时间计权 (Level vs Time)"))
+        layout.addWidget(self.time_weighting_combo)
+        layout.addWidget(QLabel("频率计权 (FFT / Level vs Time)"))
+        layout.addWidget(self.freq_weighting_combo)
+        layout.addWidget(QLabel("FFT 窗函数 / 计算后端"))
+        layout.addWidget(self.fft_window_combo)
+        layout.addWidget(self.fft_backend_combo)
+        layout.addWidget(self.fft_pad_check)
+        layout.addWidget(self.rpm_button)
+        layout.addWidget(self.tacho_button)
+        layout.addWidget(self.rpm_label)
+        layout.addWidget(QLabel("阶次切片"))
+        layout.addWidget(self.order_input)
+        layout.addWidget(QLabel("瀑布图台阶"))
+        layout.addWidget(self.waterfall_range_input)
+        layout.addWidget(self.color_range_input)
+        layout.addWidget(QLabel("显示通道"))
+        layout.addWidget(self.channel_list)
         layout.addWidget(self.analysis_button)
+        layout.addWidget(self.compare_mode_combo)
+        layout.addWidget(self.compare_button)
+        layout.addWidget(self.peak_check)
+        layout.addWidget(self.export_peaks_button)
         # 绘图模块
         self.plot_widget = PlotWidget()
         layout.addWidget(self.plot_widget)
@@ -63,53 +182,297 @@ class AnalysisPanel(QWidget):
         self.y = None
         self.sr = None
         self.y_filtered = None
+        self.filtered_channels = None  # y_filtered 对应的通道
+        self.stream_path = None  # 大文件流式分析时的文件路径
+        self.stream_filter_params = None  # 流式模式下的滤波参数 (cutoff, btype)
+        self.playback_filter_params = None  # 播放时实时滤波的参数 (cutoff, btype)
+        self.rpm_profile = None  # 阶次分析用的转速曲线
+        self._waterfall = None  # (键, Waterfall)，信号与转速曲线不变时复用已计算的谱线
+        self._waterfall_peak = None  # 当前瀑布图的最大值 (dB)，颜色范围以它为上限
+        self.live_view = None  # 实时监测窗口
+        self.peak_index = None  # 最近一次分析检测到的音调峰值 (PeakIndex)
+
+        # 分析结果缓存（参数与音频未变化时直接复用）
+        self.cache = ResultCache(max_bytes=512 * 1024 * 1024, disk_dir=CACHE_DIR)
 
         # AudioPlayer
         self.audio_player = AudioPlayer(self.progress_bar)
 
+        # 后台分析任务
+        self._task_id = 0
+        self._task = None  # (task_id, name, on_done, worker)
+        self._workers = []  # 已取消但仍在运行的线程也保留引用，直到结束
+
         # 信号连接
         self.apply_button.clicked.connect(self.apply_filter)
         self.play_pause_button.clicked.connect(self.toggle_play_pause)
         self.stop_button.clicked.connect(self.stop_audio)
+        self.loop_check.toggled.connect(self.set_loop)
         self.analysis_button.clicked.connect(self.perform_analysis)
+        self.compare_button.clicked.connect(self.compare_requested)
+        self.export_peaks_button.clicked.connect(self.export_peaks)
+        self.rpm_button.clicked.connect(self.load_rpm_csv)
+        self.tacho_button.clicked.connect(self.extract_tacho_rpm)
+        self.live_button.clicked.connect(self.open_live_monitor)
+        self.color_range_input.editingFinished.connect(self.update_color_range)
+        # 参数变化时取消尚未完成的分析
+        self.analysis_type_combo.currentIndexChanged.connect(self.cancel_task)
+        self.time_weighting_combo.currentIndexChanged.connect(self.cancel_task)
+        self.freq_weighting_combo.currentIndexChanged.connect(self.cancel_task)
+        self.fft_window_combo.currentIndexChanged.connect(self.cancel_task)
+        self.fft_backend_combo.currentIndexChanged.connect(self.cancel_task)
+        self.fft_pad_check.toggled.connect(self.cancel_task)
+        self.channel_list.itemChanged.connect(self.cancel_task)
+        self.filter_type.currentIndexChanged.connect(self.cancel_task)
+        self.cutoff_input.textChanged.connect(self.cancel_task)
     # -----------------------------
     # 加载音频
     def load_audio(self, y, sr, draw=False):
         logger.debug("load_audio start")
+        self.cancel_task()
         self.y = y
         self.sr = sr
         self.y_filtered = None
+        self.stream_path = None
+        self.playback_filter_params = None
+        self.set_channels(1 if y.ndim == 1 else y.shape[1])
         logger.info(f"音频加载完成: 长度={len(y)}, 采样率={sr}")
 
         if draw:
             self.perform_analysis()
 
+    # -----------------------------
+    # 加载大文件（仅记录路径，分析时按块读取）
+    def load_stream(self, path, sr):
+        self.cancel_task()
+        self.y = None
+        self.sr = sr
+        self.y_filtered = None
+        self.stream_path = path
+        self.stream_filter_params = None
+        self.playback_filter_params = None
+        self.set_channels(0)
+        logger.info(f"流式音频: {path}, 采样率={sr}")
+
+    # -----------------------------
+    # 通道选择
+    def set_channels(self, n_channels):
+        self.channel_list.clear()
+        for i in range(n_channels):
+            item = QListWidgetItem(f"通道 {i + 1}")
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if i == 0 else Qt.CheckState.Unchecked)
+            self.channel_list.addItem(item)
+
+    def selected_channels(self):
+        channels = [i for i in range(self.channel_list.count())
+                    if self.channel_list.item(i).checkState() == Qt.CheckState.Checked]
+        return channels or [0]
+
+    def channel_labels(self):
+        channels = self.selected_channels()
+        return [f"通道 {c + 1}" for c in channels] if len(channels) > 1 else None
+
+    def analysis_data(self):
+        """当前所选通道的数据（已滤波且通道一致时优先使用滤波结果）"""
+        channels = self.selected_channels()
+        if self.y_filtered is not None and self.filtered_channels == channels:
+            return self.y_filtered
+        return select_channels(self.y, channels)
+
+    # -----------------------------
+    # 转速曲线
+    def load_rpm_csv(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择转速曲线", "", "CSV 文件 (*.csv *.txt)")
+        if not path:
+            return
+        try:
+            self.set_rpm_profile(RpmProfile.from_csv(path), os.path.basename(path))
+        except Exception as e:
+            logger.error(f"读取转速曲线失败: {e}")
+            QMessageBox.warning(self, "转速曲线", f"读取失败: {e}")
+
+    def extract_tacho_rpm(self):
+        """从当前音频的转速脉冲通道提取转速曲线（后台执行）"""
+        if self.y is None and self.stream_path is None:
+            QMessageBox.warning(self, "转速脉冲", "请先加载音频")
+            return
+        n_channels = self.channel_list.count() if self.y is not None else 0
+        channel, ok = QInputDialog.getInt(self, "转速脉冲", "脉冲所在通道", n_channels or 1, 1,
+                                          n_channels or 256)
+        if not ok:
+            return
+        pulses, ok = QInputDialog.getInt(self, "转速脉冲", "每转脉冲数", 1, 1, 10000)
+        if not ok:
+            return
+
+        if self.y is not None:
+            data, sr = select_channels(self.y, [channel - 1]), self.sr
+
+            def task(progress):
+                return extract_rpm(data, sr, pulses_per_rev=pulses)
+        else:
+            path = self.stream_path
+
+            def task(progress):
+                return extract_rpm_from_file(path, channel - 1, pulses_per_rev=pulses)
+
+        def on_done(profile):
+            self.set_rpm_profile(profile, f"通道 {channel} 脉冲")
+
+        self.start_task("转速提取", task, on_done)
+
+    def set_rpm_profile(self, profile, source=""):
+        self.cancel_task()
+        self.rpm_profile = profile
+        self.rpm_label.setText(f"转速曲线：{source} {profile.rpm.min():.0f}~{profile.rpm.max():.0f} rpm, "
+                               f"{profile.start:.1f}~{profile.end:.1f} s")
+        logger.info(f"加载转速曲线: {source}, {len(profile.times)} 点")
+
+    def fft_options(self):
+        """FFT 的窗函数、后端与补零设置，作为 compute_fft / stream_fft 的关键字参数"""
+        return dict(window=FFT_WINDOW_OPTIONS[self.fft_window_combo.currentText()],
+                    backend=FFT_BACKEND_OPTIONS[self.fft_backend_combo.currentText()],
+                    pad=self.fft_pad_check.isChecked())
+
+    def order_targets(self):
+        """切片阶次列表"""
+        text = self.order_input.text().replace("，", ",")
+        return tuple(float(v) for v in text.split(",") if v.strip()) or (1.0, 2.0, 4.0)
+
+    # -----------------------------
+    # 带缓存的分析调用（可在后台线程中执行）
+    def compute(self, func, data, sr, disk=True, progress=None, per_channel=True, **params):
+        """per_channel=False 的分析（通道之间相互关联）不按通道分组并行，整体一次计算"""
+        key = self.cache.make_key(func, data, sr, **params)
+        result = self.cache.lookup(key)
+        if result is None:
+            if per_channel:
+                result = run_multichannel(func, data, sr, progress=progress, **params)
+            else:
+                result = func(data, sr, progress=progress, **params)
+            result = self.cache.store(key, result, disk=disk)
+        else:
+            logger.info(f"使用缓存结果: {func.__name__}")
+        return result
+
+    # -----------------------------
+    # 后台任务
+    def start_task(self, name, task, on_done):
+        """
+        在后台线程执行 task(progress)，完成后在主线程调用 on_done(result)
+
+        新任务会取消尚未完成的旧任务，旧任务的结果不再绘制。
+        """
+        self.cancel_task()
+        self._task_id += 1
+        worker = AnalysisWorker(self._task_id, task)
+        worker.progress.connect(self.on_task_progress)
+        worker.result.connect(self.on_task_result)
+        worker.error.connect(self.on_task_error)
+        worker.finished.connect(self.cleanup_workers)
+        self._workers.append(worker)
+        self._task = (self._task_id, name, on_done, worker)
+        self.on_task_progress(self._task_id, 0)
+        worker.start()
+        logger.info(f"开始后台任务 {self._task_id}: {name}")
+
+    def cancel_task(self, *_):
+        """取消当前任务（参数变化时调用，过期结果不会再绘制）"""
+        if self._task is None:
+            return
+        task_id, name, _, worker = self._task
+        self._task = None
+        worker.cancel()
+        self.reset_progress_bar()
+        logger.info(f"取消后台任务 {task_id}: {name}")
+
+    def cleanup_workers(self):
+        self._workers = [w for w in self._workers if not w.isFinished()]
+
+    def on_task_progress(self, task_id, percent):
+        if self._task is None or task_id != self._task[0]:
+            return
+        # 进度条与播放共用，播放时不显示分析进度
+        if self.audio_player.playing_data is None:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(percent)
+            self.progress_bar.setFormat(f"{self._task[1]} {percent}%")
+
+    def on_task_result(self, task_id, result):
+        if self._task is None or task_id != self._task[0]:
+            return
+        _, name, on_done, _ = self._task
+        self._task = None
+        self.reset_progress_bar()
+        try:
+            on_done(result)
+        except Exception as e:
+            logger.error(f"{name}绘图失败: {e}")
+            QMessageBox.warning(self, "绘图失败", str(e))
+
+    def on_task_error(self, task_id, error_msg):
+        if self._task is None or task_id != self._task[0]:
+            return
+        name = self._task[1]
+        self._task = None
+        self.reset_progress_bar()
+        logger.error(f"{name}失败: {error_msg}")
+        QMessageBox.warning(self, f"{name}失败", error_msg)
+
+    def reset_progress_bar(self):
+        if self.audio_player.playing_data is None:
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("0.00 / 0.00 s")
+
     # -----------------------------
     # 应用滤波
     def apply_filter(self):
-        if self.y is None:
+        if self.y is None and self.stream_path is None:
             return
         btype_map = {"低通": "low", "高通": "high", "带通": "bandpass"}
         btype = btype_map[self.filter_type.currentText()]
         try:
             cutoff = [float(x) for x in self.cutoff_input.text().split(",")] if btype=="bandpass" else float(self.cutoff_input.text())
-            self.y_filtered = butter_filter(self.y, self.sr, cutoff=cutoff, btype=btype, order=6)
-            freqs, fft_result = compute_fft(self.y_filtered, self.sr)
-            self.plot_widget.plot(freqs, fft_result, title="滤波后频谱")
-            logger.info(f"应用滤波器：{btype}, cutoff={cutoff}")
+            if self.y is None:
+                # 流式模式：记录参数，分析时逐块因果滤波
+                StreamingFilter(self.sr, cutoff, btype=btype, order=6)  # 提前校验参数
+                self.stream_filter_params = (cutoff, btype)
+                self.set_playback_filter(cutoff, btype)
+                logger.info(f"流式模式滤波器：{btype}, cutoff={cutoff}")
+                return
         except Exception as e:
             logger.error(f"滤波失败: {e}")
             QMessageBox.warning(self, "滤波失败", str(e))
+            return
+
+        channels = self.selected_channels()
+        data = select_channels(self.y, channels)
+        labels = self.channel_labels()
+        sr = self.sr
+
+        def task(progress):
+            y_filtered = self.compute(butter_filter, data, sr, disk=False, cutoff=cutoff, btype=btype, order=6)
+            return y_filtered, self.compute(compute_fft, y_filtered, sr, progress=progress)
+
+        def on_done(result):
+            self.y_filtered, (freqs, fft_result) = result
+            self.filtered_channels = channels
+            self.set_playback_filter(cutoff, btype)
+            self.plot_widget.plot(freqs, fft_result, title="滤波后频谱", labels=labels)
+            logger.info(f"应用滤波器：{btype}, cutoff={cutoff}")
+
+        self.start_task("滤波", task, on_done)
 
     # -----------------------------
     # 播放/暂停切换
     def toggle_play_pause(self):
         if self.audio_player.playing_data is None:
-            # 当前没有播放 → 播放音频
-            if self.y_filtered is not None:
-                self.audio_player.play(self.y_filtered, self.sr)
-            elif self.y is not None:
-                self.audio_player.play(self.y, self.sr)
+            # 当前没有播放 → 播放原始音频（第一个所选通道），滤波在播放时逐块进行
+            if self.y is not None:
+                data = select_channels(self.y, self.selected_channels()[:1])
+                self.audio_player.loop = self.loop_check.isChecked()
+                self.audio_player.play(data, self.sr, audio_filter=self.playback_filter())
             self.play_pause_button.setText("暂停")
         else:
             # 已经在播放 → 切换暂停/恢复
@@ -119,6 +482,55 @@ class AnalysisPanel(QWidget):
             else:
                 self.play_pause_button.setText("暂停")
 
+    def playback_filter(self):
+        """按最近一次应用的滤波参数创建播放用的流式滤波器，未滤波时为 None"""
+        if self.playback_filter_params is None:
+            return None
+        cutoff, btype = self.playback_filter_params
+        return StreamingFilter(self.sr, cutoff, btype=btype, order=6)
+
+    def set_playback_filter(self, cutoff, btype):
+        """记录滤波参数；正在播放时立即切换为新的滤波器"""
+        self.playback_filter_params = (cutoff, btype)
+        if self.audio_player.playing_data is not None:
+            self.audio_player.set_filter(self.playback_filter())
+
+    def set_loop(self, checked):
+        self.audio_player.loop = checked
+
+    # -----------------------------
+    # 实时监测
+    def open_live_monitor(self):
+        """打开实时监测窗口（声卡输入、模拟信号或当前音频按实时速率回放）"""
+        source = self.live_source_combo.currentText()
+        sr = LIVE_SAMPLE_RATE
+        channels = len(self.selected_channels())
+        factory = None
+        if source == "模拟信号":
+            factory = SyntheticInputStream
+        elif source == "当前音频回放":
+            if self.y is not None:
+                factory = functools.partial(ArrayInputStream, select_channels(self.y, self.selected_channels()))
+            elif self.stream_path is not None:
+                factory = functools.partial(FileInputStream, self.stream_path)
+                channels = 1
+            else:
+                QMessageBox.information(self, "无音频", "请先加载音频")
+                return
+            sr = self.sr
+
+        if self.live_view is not None:
+            self.live_view.close()
+        try:
+            monitor = LiveMonitor(sr, channels=channels, stream_factory=factory, window=self.fft_options()["window"])
+            self.live_view = LiveView(monitor, title=f"实时监测 - {source}")
+            self.live_view.start()
+        except Exception as e:
+            logger.error(f"实时监测启动失败: {e}")
+            QMessageBox.warning(self, "实时监测失败", str(e))
+            return
+        self.live_view.show()
+
     # -----------------------------
     # 停止播放
     def stop_audio(self):
@@ -126,12 +538,19 @@ class AnalysisPanel(QWidget):
         self.play_pause_button.setText("播放")
 
     def perform_analysis(self):
+        self.cancel_task()
+        if self.y is None and self.stream_path is not None:
+            self.perform_stream_analysis()
+            return
         if self.y is None:
             logger.warning("没有音频可分析")
             return
 
         choice = self.analysis_type_combo.currentText()
-        data = self.y_filtered if self.y_filtered is not None else self.y  # 统一放在最前面
+        data = self.analysis_data()  # 统一放在最前面
+        labels = self.channel_labels()
+        sr = self.sr
+        weighting = FREQ_WEIGHTING_OPTIONS[self.freq_weighting_combo.currentText()]
 
         mode_map = {
             "FFT(single)": "single",
@@ -140,26 +559,404 @@ class AnalysisPanel(QWidget):
         }
 
         if choice in mode_map:
-            freqs, fft_result = compute_fft(data, self.sr, mode=mode_map[choice])
-            self.plot_widget.plot(freqs, np.abs(fft_result), title=f"{choice} 频谱分析")
-            logger.info(f"完成 {choice} 绘图")
+            mode = mode_map[choice]
+
+            def on_done(result):
+                freqs, fft_result = result
+                self.plot_widget.plot(freqs, np.abs(fft_result), title=f"{choice} 频谱分析", labels=labels)
+                self.show_spectrum_peaks(freqs, fft_result, "amplitude")
+                logger.info(f"完成 {choice} 绘图")
+
+            fft_options = self.fft_options()
+            self.start_task("FFT 分析", lambda progress: self.compute(
+                compute_fft, data, sr, progress=progress, mode=mode, weighting=weighting, **fft_options), on_done)
 
         elif choice == "波形分析 (Waveform)":
-            t = np.arange(len(data)) / self.sr
-            self.plot_widget.plot(t, data, title="波形分析")
-            logger.info("完成波形分析绘图")
+            def on_done(pyramid):
+                self.plot_widget.plot_uniform(data, 0.0, 1 / sr, title="波形分析", labels=labels, pyramid=pyramid)
+                logger.info("完成波形分析绘图")
+
+            pyramid = self.plot_widget.pyramid_for(data)
+            if pyramid is not None:
+                on_done(pyramid)
+            else:
+                # 包络金字塔需要读一遍整段信号，在后台线程中构建
+                self.start_task("波形分析", lambda progress: EnvelopePyramid(data, progress=progress), on_done)
 
         elif choice == "colormap":
-            self.plot_widget.plot_spectrogram(data, self.sr)  # ✅ 用滤波后的
+            if data.ndim > 1:
+                data = select_channels(data, [0])  # 声谱图只显示第一个所选通道
+
+            # 分块声谱图只计算可见区域，开销受屏幕像素限制，直接在主线程绘制
+            self.plot_widget.plot_spectrogram(data, sr, nperseg=1024)  # ✅ 用滤波后的
             logger.info("绘制声谱图完成")
+            if self.peak_check.isChecked():
+                self.index_spectrogram_peaks(data, sr)
+
+        elif choice == "时间瀑布图":
+            if data.ndim > 1:
+                data = select_channels(data, [0])  # 只显示第一个所选通道
+            self.perform_waterfall(choice, data, sr)
 
         elif choice == "Level vs Time":
-            data = self.y_filtered if self.y_filtered is not None else self.y
-            times, levels = compute_level_vs_time(data, self.sr, frame_length=0.125, p0=1.0)
-            self.plot_widget.plot(times, levels, title="Level vs Time")
-            self.plot_widget.ax.set_xlabel("时间 (s)")
-            self.plot_widget.ax.set_ylabel("声级 (dBFS)")
-            logger.info("完成 Level vs Time 绘图")
+            time_weighting = TIME_WEIGHTING_OPTIONS[self.time_weighting_combo.currentText()]
+
+            def task(progress):
+                times, levels = self.compute(compute_level_vs_time, data, sr, progress=progress, frame_length=0.125,
+                                             p0=1.0, time_weighting=time_weighting, weighting=weighting)
+                return times, levels, EnvelopePyramid(levels)
+
+            def on_done(result):
+                times, levels, pyramid = result
+                x0 = times[0] if len(times) else 0.0
+                self.plot_widget.plot_uniform(levels, x0, 0.125, title="Level vs Time", labels=labels,
+                                              pyramid=pyramid)
+                self.plot_widget.ax.set_ylabel(level_label(weighting))
+                logger.info("完成 Level vs Time 绘图")
+
+            self.start_task("Level vs Time", task, on_done)
+
+        elif choice in ORDER_ANALYSES:
+            self.perform_order_analysis(choice, data, sr, labels)
+
+        elif choice == "功率谱密度 (PSD)":
+            options = self.fft_options()
+            options.pop("pad")
+
+            def on_done(result):
+                freqs, psd = result
+                self.plot_widget.plot(freqs, 10 * np.log10(psd + 1e-30), title="功率谱密度 (Welch)", labels=labels,
+                                      ylabel="PSD (dB/Hz)")
+                self.show_spectrum_peaks(freqs, psd, "power")
+                logger.info("完成 PSD 绘图")
+
+            self.start_task(choice, lambda progress: self.compute(
+                compute_psd, data, sr, progress=progress, **options), on_done)
+
+        elif choice in CROSS_ANALYSES:
+            self.perform_cross_analysis(choice, data, sr)
+
+        elif choice in ("1/1 倍频程", "1/3 倍频程"):
+            fraction = 1 if choice == "1/1 倍频程" else 3
+
+            def on_done(result):
+                nominal, levels = result
+                self.plot_widget.plot_bands(nominal, levels, title=f"{choice} 频带声级", labels=labels)
+                logger.info(f"完成 {choice} 绘图")
+
+            self.start_task(choice, lambda progress: self.compute(
+                compute_octave_levels, data, sr, progress=progress, fraction=fraction, p0=1.0), on_done)
+
+        elif choice == "1/3 倍频程 vs Time":
+            if data.ndim > 1:
+                data = select_channels(data, [0])  # 只显示第一个所选通道
+
+            def on_done(result):
+                times, nominal, levels = result
+                self.plot_widget.plot_band_levels_vs_time(times, nominal, levels, 0.125, title=choice)
+                logger.info(f"完成 {choice} 绘图")
+
+            self.start_task(choice, lambda progress: self.compute(
+                compute_octave_level_vs_time, data, sr, progress=progress, fraction=3, frame_length=0.125,
+                p0=1.0), on_done)
 
         else:
             logger.warning(f"未知分析类型: {choice}")
+
+    # -----------------------------
+    # 音调峰值
+    def show_spectrum_peaks(self, freqs, spectrum, scale):
+        """检测频谱的音调峰值并在图上标注 TNR 最大的几个（幅值谱按线性纵轴，功率谱按 dB 纵轴）"""
+        if not self.peak_check.isChecked():
+            return
+        self.peak_index = PeakIndex.from_spectrum(freqs, spectrum, scale=scale, min_tnr=PEAK_MIN_TNR)
+        top = self.peak_index.strongest(PEAK_LABELS)
+        y = 10 ** (top.level / 20) if scale == "amplitude" else top.level
+        texts = [f"{f:.1f} Hz\nTNR {tnr:.0f} dB" for f, tnr in zip(top.frequency, top.tnr)]
+        self.plot_widget.mark_peaks(top.frequency, y, texts)
+        logger.info(f"音调峰值: 共 {len(self.peak_index)} 个 (TNR ≥ {PEAK_MIN_TNR} dB)")
+
+    def index_spectrogram_peaks(self, data, sr):
+        """对整段信号的声谱图检测全部帧的音调峰值，并在声谱图上标出"""
+        def task(progress):
+            # 按帧分块计算声谱图并检测，内存占用与信号长度无关（data 可为内存映射视图）
+            parts = []
+            for f, t, sxx_db in iter_spectrogram_blocks(data, sr, nperseg=1024):
+                parts.append(PeakIndex.from_spectrogram(f, t, sxx_db, min_tnr=PEAK_MIN_TNR,
+                                                        max_peaks=PEAK_MAX_PER_FRAME))
+                progress(min(1.0, t[-1] / (len(data) / sr)))
+            index = PeakIndex.concatenate(parts)
+            logger.info(f"声谱图峰值检测: 信号时长={len(data) / sr:.1f} s, 峰={len(index)}")
+            return index
+
+        def on_done(index):
+            self.peak_index = index
+            top = index.strongest(PEAK_MAX_MARKERS)  # 只标出最突出的峰，全部峰可导出
+            self.plot_widget.mark_peaks(top.time, top.frequency)
+
+        self.start_task("声谱图峰值检测", task, on_done)
+
+    def export_peaks(self):
+        if self.peak_index is None:
+            QMessageBox.information(self, "导出峰值表", "请先勾选「检测并标注音调峰值」并执行 FFT、PSD 或声谱图分析")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出峰值表", "peaks.csv", "CSV 文件 (*.csv)")
+        if not path:
+            return
+        try:
+            self.peak_index.to_csv(path)
+        except OSError as e:
+            logger.error(f"导出峰值表失败: {e}")
+            QMessageBox.warning(self, "导出峰值表", f"导出失败: {e}")
+
+    # -----------------------------
+    # 多文件对比
+    def comparison_setup(self, choice):
+        """
+        当前分析方式的对比设置：(func, 参数, 转为显示单位的函数, x 轴标签, y 轴标签, 对数 x 轴)，
+        不支持对比时返回 None
+        """
+        weighting = FREQ_WEIGHTING_OPTIONS[self.freq_weighting_combo.currentText()]
+        fft_modes = {"FFT(single)": "single", "FFT(average)": "average", "FFT(peak hold)": "peak"}
+        amplitude_db = lambda v: 20 * np.log10(np.abs(v) + 1e-12)
+        if choice in fft_modes:
+            return (compute_fft, dict(mode=fft_modes[choice], weighting=weighting, **self.fft_options()),
+                    amplitude_db, "频率 (Hz)", "幅值 (dB)", False)
+        if choice == "功率谱密度 (PSD)":
+            options = self.fft_options()
+            options.pop("pad")
+            return compute_psd, options, lambda v: 10 * np.log10(v + 1e-30), "频率 (Hz)", "PSD (dB/Hz)", False
+        if choice == "Level vs Time":
+            time_weighting = TIME_WEIGHTING_OPTIONS[self.time_weighting_combo.currentText()]
+            return (compute_level_vs_time, dict(frame_length=0.125, p0=1.0, time_weighting=time_weighting,
+                                                weighting=weighting),
+                    np.asarray, "时间 [s]", level_label(weighting), False)
+        if choice in ("1/1 倍频程", "1/3 倍频程"):
+            return (compute_octave_levels, dict(fraction=1 if choice == "1/1 倍频程" else 3, p0=1.0),
+                    np.asarray, "中心频率 (Hz)", "声级 (dB)", True)
+        return None
+
+    def compare_files(self, paths, load_entry):
+        """
+        对多个文件执行当前分析并叠加 / 统计显示
+
+        每个文件取第一个所选通道（超出该文件通道数时取最后一个通道）；各文件的结果
+        经 ResultCache 缓存，与单文件分析共用，线程池并行计算，统计为一次向量化归约。
+
+        Parameters
+        ----------
+        paths : list of str
+            文件路径
+        load_entry : callable
+            load_entry(path) -> AudioEntry（如 AudioStore.load）
+        """
+        choice = self.analysis_type_combo.currentText()
+        setup = self.comparison_setup(choice)
+        if setup is None:
+            QMessageBox.information(self, "多文件对比", f"「{choice}」不支持多文件对比，"
+                                                    "请选择 FFT、PSD、Level vs Time 或倍频程分析")
+            return
+        if len(paths) < 2:
+            QMessageBox.information(self, "多文件对比", "请在文件列表中选择至少两个文件（Ctrl / Shift 多选）")
+            return
+        func, params, to_display, xlabel, ylabel, logx = setup
+        channel = self.selected_channels()[0]
+        show_stats = self.compare_mode_combo.currentText() != COMPARE_MODES[0]
+
+        def load(path):
+            entry = load_entry(path)
+            if entry.streaming:
+                logger.warning(f"文件过大（流式模式），不参与对比: {path}")
+                return None
+            return select_channels(entry.y, [min(channel, entry.y.shape[1] - 1)]), entry.sr
+
+        def compute(y, sr):
+            result = self.compute(func, y, sr, **params)
+            return result[0], to_display(result[-1])
+
+        def task(progress):
+            results = batch_compute(paths, load, compute, progress=progress)
+            axis, stack = align_results(results.values())
+            return list(results), axis, stack, compare_statistics(stack) if show_stats else None
+
+        def on_done(result):
+            names, axis, stack, stats = result
+            labels = [os.path.basename(p) for p in names]
+            self.plot_widget.plot_comparison(axis, stack, labels=labels, stats=stats, xlabel=xlabel, ylabel=ylabel,
+                                             title=f"{choice} 多文件对比 ({len(names)} 个文件)", logx=logx)
+            logger.info(f"完成多文件对比: {choice}, 文件数={len(names)}")
+
+        self.start_task(f"多文件对比: {choice}", task, on_done)
+
+    # -----------------------------
+    # 阶次分析（需要转速曲线）
+    def perform_order_analysis(self, choice, data, sr, labels):
+        profile = self.rpm_profile
+        if profile is None:
+            QMessageBox.information(self, "阶次分析", "请先加载转速曲线")
+            return
+        try:
+            targets = self.order_targets()
+        except ValueError:
+            QMessageBox.warning(self, "阶次分析", "阶次格式错误，请输入如 2,4,6")
+            return
+
+        if choice == "阶次谱":
+            def on_done(result):
+                orders, spectrum = result
+                self.plot_widget.plot(orders, spectrum, title="阶次谱", labels=labels, xlabel="阶次")
+                logger.info("完成阶次谱绘图")
+
+            self.start_task(choice, lambda progress: self.compute(
+                compute_order_spectrum, data, sr, progress=progress, profile=profile, max_order=MAX_ORDER,
+                revs_per_frame=REVS_PER_FRAME), on_done)
+            return
+
+        if data.ndim > 1:
+            data = select_channels(data, [0])  # 只显示第一个所选通道
+
+        if choice == "阶次切片":
+            def on_done(result):
+                frame_rpm, cuts = result
+                cuts_db = 20 * np.log10(np.asarray(cuts) + 1e-12)
+                self.plot_widget.plot(frame_rpm, cuts_db, title="阶次切片", labels=[f"{o:g} 阶" for o in targets],
+                                      xlabel="转速 (rpm)", ylabel="幅值 (dB)")
+                logger.info("完成阶次切片绘图")
+
+            self.start_task(choice, lambda progress: self.compute(
+                compute_order_cuts, data, sr, progress=progress, profile=profile, targets=targets,
+                max_order=MAX_ORDER, revs_per_frame=REVS_PER_FRAME), on_done)
+
+        else:
+            self.perform_waterfall(choice, data, sr, profile=profile, orders=targets)
+
+    # -----------------------------
+    # 双通道分析：一次计算参考通道对各通道的自谱 / 互谱，四种结果共用同一缓存
+    def perform_cross_analysis(self, choice, data, sr):
+        channels = self.selected_channels()
+        if len(channels) < 2:
+            QMessageBox.information(self, choice, "请至少勾选两个通道，第一个所选通道作为参考（输入）通道")
+            return
+        options = self.fft_options()
+        options.pop("pad")
+        names = [f"通道 {c + 1}" for c in channels]
+        labels = [f"{name} / {names[0]}" for name in names[1:]]
+
+        def on_done(result):
+            freqs, auto, cross = result
+            if choice == "互功率谱 (CSD)":
+                values, ylabel = 10 * np.log10(np.abs(cross[:, 1:]) + 1e-30), "|CSD| (dB/Hz)"
+            elif choice == "相干函数":
+                values, ylabel = frequency_response(auto, cross)[1][:, 1:], "相干函数"
+            else:
+                frf, _ = frequency_response(auto, cross, estimator=choice[-2:])
+                values, ylabel = 20 * np.log10(np.abs(frf[:, 1:]) + 1e-30), "|H| (dB)"
+            self.plot_widget.plot(freqs, values, title=f"{choice}（参考 {names[0]}）", labels=labels, ylabel=ylabel)
+            logger.info(f"完成 {choice} 绘图")
+
+        self.start_task(choice, lambda progress: self.compute(
+            compute_cross_spectra, data, sr, progress=progress, per_channel=False, reference=0, **options), on_done)
+
+    # -----------------------------
+    # 瀑布图（按时间或转速台阶增量计算）
+    def perform_waterfall(self, choice, data, sr, profile=None, orders=()):
+        try:
+            start, stop, step = self.waterfall_steps()
+        except ValueError:
+            QMessageBox.warning(self, choice, "台阶格式错误，请输入如 1000,6000,50")
+            return
+        by_rpm = choice == "转速瀑布图"
+
+        def task(progress):
+            # 信号哈希需要读一遍整段数据，放在后台线程中计算
+            key = (self.cache.signal_digest(data), sr, repr(profile))
+            current = self._waterfall
+            if current is None or current[0] != key:
+                current = self._waterfall = (key, Waterfall(data, sr, WATERFALL_FRAME, profile=profile))
+            waterfall = current[1]
+            if by_rpm:
+                return waterfall, waterfall.rpm_slices(start, stop, step or RPM_STEP, progress=progress)
+            return waterfall, waterfall.time_slices(start, stop, step, progress=progress)
+
+        def on_done(result):
+            waterfall, (steps, spectra) = result
+            spectra_db = 20 * np.log10(spectra + 1e-12)
+            self._waterfall_peak = float(spectra_db.max())
+            vmin, vmax = self.color_range()
+            self.plot_widget.plot_waterfall(waterfall.freqs, steps, spectra_db, orders=orders if by_rpm else (),
+                                            title=choice, ylabel="转速 [rpm]" if by_rpm else "时间 [s]",
+                                            vmin=vmin, vmax=vmax)
+            logger.info(f"完成{choice}绘图: {len(steps)} 条谱线, 累计计算 {waterfall.computed} 帧")
+
+        self.start_task(choice, task, on_done)
+
+    def waterfall_steps(self):
+        """瀑布图台阶 (起, 止, 步长)，未填写的项为 None"""
+        text = self.waterfall_range_input.text().replace("，", ",")
+        values = [float(v) if v.strip() else None for v in text.split(",")] if text.strip() else []
+        if len(values) > 3:
+            raise ValueError(text)
+        return tuple(values + [None] * (3 - len(values)))
+
+    def color_range(self):
+        """按动态范围输入计算的颜色范围 (vmin, vmax)，未填写时为 (None, None)"""
+        try:
+            dynamic = float(self.color_range_input.text())
+        except ValueError:
+            return None, None
+        if self._waterfall_peak is None or dynamic <= 0:
+            return None, None
+        return self._waterfall_peak - dynamic, self._waterfall_peak
+
+    def update_color_range(self):
+        """修改颜色范围只更新当前瀑布图的色标，不重新计算"""
+        vmin, vmax = self.color_range()
+        if vmin is not None:
+            self.plot_widget.set_color_range(vmin, vmax)
+
+    # -----------------------------
+    # 流式分析（文件不整体载入内存）
+    def perform_stream_analysis(self):
+        choice = self.analysis_type_combo.currentText()
+        stream_modes = {"FFT(average)": "average", "FFT(peak hold)": "peak"}
+        path = self.stream_path
+        weighting = FREQ_WEIGHTING_OPTIONS[self.freq_weighting_combo.currentText()]
+        audio_filter = None
+        if self.stream_filter_params is not None:
+            cutoff, btype = self.stream_filter_params
+            audio_filter = StreamingFilter(self.sr, cutoff, btype=btype, order=6)
+
+        if choice in stream_modes:
+            mode = stream_modes[choice]
+
+            def on_done(result):
+                freqs, spectrum = result
+                self.plot_widget.plot(freqs, spectrum, title=f"{choice} 频谱分析")
+                logger.info(f"完成流式 {choice} 绘图")
+
+            fft_options = self.fft_options()
+            self.start_task("流式 FFT", lambda progress: stream_fft(
+                path, mode=mode, audio_filter=audio_filter, weighting=weighting, progress=progress, **fft_options),
+                on_done)
+
+        elif choice == "Level vs Time":
+            time_weighting = TIME_WEIGHTING_OPTIONS[self.time_weighting_combo.currentText()]
+
+            def task(progress):
+                times, levels = stream_level_vs_time(path, frame_length=0.125, p0=1.0, audio_filter=audio_filter,
+                                                     time_weighting=time_weighting, weighting=weighting,
+                                                     progress=progress)
+                return times, levels, EnvelopePyramid(levels)
+
+            def on_done(result):
+                times, levels, pyramid = result
+                x0 = times[0] if len(times) else 0.0
+                self.plot_widget.plot_uniform(levels, x0, 0.125, title="Level vs Time", pyramid=pyramid)
+                self.plot_widget.ax.set_ylabel(level_label(weighting))
+                logger.info("完成流式 Level vs Time 绘图")
+
+            self.start_task("流式 Level vs Time", task, on_done)
+
+        else:
+            logger.warning(f"大文件流式模式不支持: {choice}")
+            QMessageBox.information(self, "流式模式", f"文件过大，流式模式下不支持 {choice}")
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCancelled(Exception):
+    """分析任务已被取消"""
+
+
+# -----------------------------
+# 后台分析线程
+class AnalysisWorker(QThread):
+    """
+    在后台线程中执行分析任务
+
+    task 形如 task(progress) -> result。任务内部周期性调用 progress(fraction)
+    （0~1）汇报进度；任务被取消后再调用 progress 会抛出 AnalysisCancelled，
+    从而尽快结束。无法中断的计算（如 filtfilt）会执行完毕，但结果不再发出。
+    """
+    progress = pyqtSignal(int, int)  # task_id, 百分比
+    result = pyqtSignal(int, object)  # task_id, 结果
+    error = pyqtSignal(int, str)  # task_id, 错误信息
+
+    def __init__(self, task_id, task):
+        super().__init__()
+        self.task_id = task_id
+        self.task = task
+        self._cancelled = False
+        self._last_percent = -1
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def report(self, fraction):
+        """供任务调用的进度回调"""
+        if self._cancelled:
+            raise AnalysisCancelled()
+        percent = int(min(max(fraction, 0.0), 1.0) * 100)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.progress.emit(self.task_id, percent)
+
+    def run(self):
+        try:
+            result = self.task(self.report)
+        except AnalysisCancelled:
+            logger.info(f"分析任务 {self.task_id} 已取消")
+            return
+        except Exception as e:
+            if not self._cancelled:
+                self.error.emit(self.task_id, str(e))
+            return
+        if not self._cancelled:
+            self.result.emit(self.task_id, result)
@@ -3,27 +3,65 @@ import sounddevice as sd
 from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QProgressBar
 import logging
-import time
+import threading
 
 logger = logging.getLogger(__name__)
 
+# 输出流每次回调的采样数
+PLAYBACK_BLOCK_SIZE = 1024
+
+
 class AudioPlayer:
-    def __init__(self, progress_bar: QProgressBar):
+    """
+    基于 sounddevice.OutputStream 回调的流式播放
+
+    回调每次只从原始数据（数组或内存映射的懒加载视图）读取一个块写入输出缓冲区，
+    不复制整段信号；滤波器逐块实时处理。播放位置由流的时钟换算得到，
+    暂停 / 恢复、跳转与循环只修改读取位置，不重新分配数据。
+
+    Parameters
+    ----------
+    progress_bar : QProgressBar
+        显示播放进度的进度条
+    stream_factory : callable
+        创建输出流的工厂，默认 sd.OutputStream；需接受 samplerate、channels、dtype、
+        blocksize、callback 关键字参数，返回的对象提供 start()、abort()、close()
+        以及 time、active 属性（无声卡的环境可传入模拟流）
+    blocksize : int
+        每次回调的采样数
+    """
+
+    def __init__(self, progress_bar: QProgressBar, stream_factory=None, blocksize=PLAYBACK_BLOCK_SIZE):
         self.progress_bar = progress_bar
+        self.stream_factory = stream_factory or sd.OutputStream
+        self.blocksize = blocksize
         self.timer = QTimer()
         self.timer.setInterval(100)  # 每 100ms 更新一次
         self.timer.timeout.connect(self.update_progress)
 
         self.playing_data = None
         self.playing_sr = None
-        self.play_pos = 0
+        self.total_duration = 0.0
         self.is_paused = False
-        self.start_time = None
         self.finished_flag = False
+        self.loop = False
+
+        self._stream = None
+        self._filter = None
+        self._lock = threading.Lock()
+        self._pos = 0  # 下一个送入输出缓冲区的采样
+        self._clock = None  # (该块开始播放的流时刻, 块起点采样)，由回调更新
+        self._ended = False  # 回调已送出最后一块
 
     # -----------------------------
     # 播放音频
-    def play(self, data, sr):
+    def play(self, data, sr, audio_filter=None, start=0):
+        """
+        开始播放
+
+        data 为一维或 (n_samples, n_channels) 的数组 / 懒加载视图，多通道时播放第一个通道；
+        audio_filter 为可选的 StreamingFilter，播放时逐块滤波。
+        """
         # 如果已经在播放，先停止
         self.stop()
 
@@ -31,17 +69,16 @@ class AudioPlayer:
             logger.warning("播放失败：音频为空")
             return
 
-        # 确保数据类型和单声道
-        data = np.asarray(data, dtype=np.float32).copy()
         if data.ndim > 1:
-            data = data[:, 0]
+            data = data.select(0) if hasattr(data, "select") else data[:, 0]  # 视图，不复制
 
         self.playing_data = data
         self.playing_sr = sr
-        self.play_pos = 0
-        self.is_paused = False
         self.total_duration = len(data) / sr
+        self.is_paused = False
         self.finished_flag = False
+        self._filter = audio_filter
+        self._seek_to(start)
 
         # 初始化进度条
         self.progress_bar.setRange(0, int(self.total_duration * 1000))
@@ -50,46 +87,128 @@ class AudioPlayer:
 
         # 开始播放
         try:
-            sd.play(self.playing_data, self.playing_sr, blocking=False)
-            self.start_time = time.time()
+            self._stream = self.stream_factory(samplerate=sr, channels=1, dtype="float32", blocksize=self.blocksize,
+                                               callback=self._callback)
+            self._stream.start()
             self.timer.start()
             logger.info(f"开始播放音频，总时长 {self.total_duration:.2f}s")
         except Exception as e:
             logger.error(f"播放失败: {e}")
+            self.stop()
+
+    # -----------------------------
+    # 输出流回调（音频线程）
+    def _callback(self, outdata, frames, time_info, status):
+        if status:
+            logger.debug(f"播放回调状态: {status}")
+        out = outdata[:, 0]
+        with self._lock:
+            n_samples = len(self.playing_data)
+            self._clock = (getattr(time_info, "outputBufferDacTime", None), self._pos)
+            filled = 0
+            while filled < frames:
+                n = min(frames - filled, n_samples - self._pos)
+                if n <= 0:
+                    if not self.loop:
+                        break
+                    self._pos = 0  # 循环：回到开头，滤波器状态连续
+                    continue
+                block = np.asarray(self.playing_data[self._pos:self._pos + n], dtype=np.float32)
+                if self._filter is not None:
+                    block = self._filter.process(block)
+                out[filled:filled + n] = block
+                filled += n
+                self._pos += n
+            out[filled:] = 0
+            if filled < frames:
+                self._ended = True
+                raise sd.CallbackStop
+
+    def _seek_to(self, sample):
+        """移动读取位置（调用方持有锁或回调尚未运行）"""
+        self._pos = int(np.clip(sample, 0, len(self.playing_data)))
+        self._clock = None
+        self._ended = False
+        self._reset_filter()
+
+    def _reset_filter(self):
+        """以读取位置的采样值稳态初始化滤波器，避免跳转 / 更换滤波器后的瞬态（调用方持有锁）"""
+        if self._filter is not None:
+            first = self.playing_data[self._pos:self._pos + 1]
+            self._filter.reset(np.asarray(first, dtype=np.float64)[0] if len(first) else None)
+
+    # -----------------------------
+    # 播放位置
+    def position(self):
+        """
+        当前正在播放的采样位置
+
+        由最近一次回调记录的「块起点采样 ↔ 该块开始输出的流时刻」与流的当前时刻换算，
+        不受定时器抖动影响；没有时钟信息时返回已送出的采样数。
+        """
+        with self._lock:
+            pos, clock = self._pos, self._clock
+        if self.is_paused or self._stream is None or clock is None or clock[0] is None:
+            return pos
+        dac_time, block_start = clock
+        played = block_start + int(round((self._stream.time - dac_time) * self.playing_sr))
+        if pos < block_start:
+            # 循环播放时该块跨过了结尾
+            return played % len(self.playing_data)
+        return int(np.clip(played, 0, pos))
 
     # -----------------------------
     # 暂停 / 恢复
     def pause(self):
-        if self.playing_data is None:
+        if self.playing_data is None or self._stream is None:
             return
 
         if not self.is_paused:
-            # 暂停
+            # 暂停：读取位置退回到实际听到的位置，输出缓冲区中尚未播放的数据丢弃
+            pos = self.position()
+            self._stream.abort()
+            with self._lock:
+                self._seek_to(pos)
             self.is_paused = True
-            self.play_pos += int((time.time() - self.start_time) * self.playing_sr)
-            sd.stop()
             self.timer.stop()
-            logger.info(f"暂停播放 at sample {self.play_pos}")
+            logger.info(f"暂停播放 at sample {pos}")
         else:
             # 恢复
             self.is_paused = False
-            remaining_data = self.playing_data[self.play_pos:]
-            self.start_time = time.time()
-            sd.play(remaining_data, self.playing_sr, blocking=False)
+            self._stream.start()
             self.timer.start()
-            logger.info(f"恢复播放 from sample {self.play_pos}")
+            logger.info(f"恢复播放 from sample {self._pos}")
+
+    def seek(self, seconds):
+        """跳转到指定时刻 (秒)，播放与暂停状态下都可用"""
+        if self.playing_data is None:
+            return
+        with self._lock:
+            self._seek_to(seconds * self.playing_sr)
+        self.update_progress()
+
+    def set_filter(self, audio_filter):
+        """更换播放时的滤波器（下一块生效），None 为不滤波；播放位置与时钟不变"""
+        with self._lock:
+            self._filter = audio_filter
+            if self.playing_data is not None:
+                self._reset_filter()
 
     # -----------------------------
     # 停止播放
     def stop(self):
         self.timer.stop()
-        if self.playing_data is not None:
+        if self._stream is not None:
             try:
-                sd.stop()
+                self._stream.abort()
+                self._stream.close()
             except Exception as e:
                 logger.warning(f"停止播放异常: {e}")
+            self._stream = None
         self.playing_data = None
-        self.play_pos = 0
+        self._pos = 0
+        self._clock = None
+        self._ended = False
         self.is_paused = False
         self.finished_flag = False
         self.progress_bar.setValue(0)
@@ -102,16 +221,13 @@ class AudioPlayer:
         if self.playing_data is None or self.playing_sr is None:
             return
 
-        elapsed = self.play_pos / self.playing_sr + (time.time() - self.start_time if not self.is_paused else 0)
-
-        # 更新进度条
-        elapsed = min(elapsed, self.total_duration)
+        elapsed = min(self.position() / self.playing_sr, self.total_duration)
         self.progress_bar.setValue(int(elapsed * 1000))
         self.progress_bar.setFormat(f"{elapsed:.2f} / {self.total_duration:.2f} s")
         logger.debug(f"播放进度: {elapsed:.2f}s / {self.total_duration:.2f}s")
 
-        # 播放完成
-        if elapsed >= self.total_duration:
+        # 播放完成（回调已送出最后一块且流已停止）
+        if self._ended and not (self._stream is not None and self._stream.active):
             self.stop()
             self.finished_flag = True
             logger.info("播放完成")
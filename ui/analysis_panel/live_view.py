@@ -0,0 +1,125 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+from PyQt6.QtCore import QTimer
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 界面刷新间隔 (ms)，与输入流回调无关
+LIVE_REFRESH_MS = 50
+
+
+class LiveView(QWidget):
+    """
+    实时监测窗口：滚动平均 / 峰值保持频谱、Level vs Time 曲线与滚动声谱图
+
+    定时器以固定帧率调用 monitor.poll() 并只更新曲线与图像数据，
+    不重建坐标轴；输入流回调只写环形缓冲区，界面偶尔卡顿不会丢块。
+    """
+
+    def __init__(self, monitor, title="实时监测", refresh_ms=LIVE_REFRESH_MS):
+        super().__init__()
+        self.monitor = monitor
+        self.setWindowTitle(title)
+        self.resize(900, 700)
+
+        self.figure = Figure(figsize=(8, 7))
+        self.canvas = FigureCanvas(self.figure)
+        self.ax_spectrum, self.ax_level, self.ax_spec = self.figure.subplots(3, 1)
+        self.status_label = QLabel()
+        self.start_button = QPushButton("停止")
+        self.reset_peak_button = QPushButton("重置峰值保持")
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.start_button)
+        buttons.addWidget(self.reset_peak_button)
+        buttons.addWidget(self.status_label)
+        layout = QVBoxLayout()
+        layout.addLayout(buttons)
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+        self._init_axes()
+        self.timer = QTimer(self)
+        self.timer.setInterval(refresh_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.start_button.clicked.connect(self.toggle)
+        self.reset_peak_button.clicked.connect(self.monitor.reset_peak)
+
+    def _init_axes(self):
+        m = self.monitor
+        freqs = m.freqs
+        zeros = np.full(len(freqs), np.nan)
+        self._avg_lines = [self.ax_spectrum.plot(freqs, zeros, lw=1, label=f"平均 通道 {c + 1}")[0]
+                           for c in range(m.channels)]
+        self._peak_line = self.ax_spectrum.plot(freqs, zeros, lw=0.8, ls="--", color="gray",
+                                                label="峰值保持 通道 1")[0]
+        self.ax_spectrum.set_xlim(freqs[1], freqs[-1])
+        self.ax_spectrum.set_xscale("log")
+        self.ax_spectrum.set_ylim(-120, 0)
+        self.ax_spectrum.set_xlabel("频率 [Hz]")
+        self.ax_spectrum.set_ylabel("幅值 [dB]")
+        self.ax_spectrum.grid(True, which="both", alpha=0.3)
+        self.ax_spectrum.legend(loc="upper right", fontsize="small")
+
+        times, levels = m.level_history()
+        self._level_lines = [self.ax_level.plot(times, levels[:, c], lw=1)[0] for c in range(m.channels)]
+        self.ax_level.set_xlim(times[0], 0)
+        self.ax_level.set_ylim(-100, 0)
+        self.ax_level.set_xlabel("时间 [s]")
+        self.ax_level.set_ylabel("声级 (dBFS)")
+        self.ax_level.grid(True, alpha=0.3)
+
+        image = m.spectrogram()
+        duration = image.shape[0] * m.hop_size / m.sr
+        self._image = self.ax_spec.imshow(image.T, origin="lower", aspect="auto", cmap="magma", vmin=-120, vmax=0,
+                                          extent=(-duration, 0, freqs[0], freqs[-1]), interpolation="nearest")
+        self.ax_spec.set_xlabel("时间 [s]")
+        self.ax_spec.set_ylabel("频率 [Hz]")
+        self.figure.tight_layout()
+
+    # -----------------------------
+    # 开始 / 停止
+    def start(self):
+        self.monitor.start()
+        self.timer.start()
+        self.start_button.setText("停止")
+
+    def stop(self):
+        self.timer.stop()
+        self.monitor.stop()
+        self.start_button.setText("开始")
+
+    def toggle(self):
+        if self.monitor.running:
+            self.stop()
+        else:
+            self.start()
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
+
+    # -----------------------------
+    # 定时刷新
+    def refresh(self):
+        m = self.monitor
+        try:
+            m.poll()
+        except Exception as e:
+            logger.error(f"实时监测出错: {e}")
+            self.stop()
+            return
+
+        average = 20 * np.log10(m.average_spectrum() + 1e-12)
+        for c, line in enumerate(self._avg_lines):
+            line.set_ydata(average[:, c])
+        self._peak_line.set_ydata(20 * np.log10(m.peak_spectrum()[:, 0] + 1e-12))
+        _, levels = m.level_history()
+        for c, line in enumerate(self._level_lines):
+            line.set_ydata(levels[:, c])
+        self._image.set_data(m.spectrogram().T)
+        self.status_label.setText(f"已采集 {m.buffer.written / m.sr:.1f} s，丢失 {m.dropped} 个采样")
+        self.canvas.draw_idle()
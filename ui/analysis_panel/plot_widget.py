@@ -4,11 +4,27 @@ from matplotlib.figure import Figure
 from matplotlib import rcParams
 import numpy as np
 import logging
-from scipy.signal import spectrogram
+from analysis.spectrogram import TiledSpectrogram
+from analysis.envelope import EnvelopePyramid
+from analysis.octave import band_label
+from analysis.audio_io import ChannelView
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 logger = logging.getLogger(__name__)
 
+
+def _same_signal(a, b):
+    """判断两个信号是否为同一份数据（用于复用包络金字塔）"""
+    if a is b:
+        return True
+    if isinstance(a, ChannelView) and isinstance(b, ChannelView):
+        return a.wav is b.wav and a.index == b.index
+    if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
+        return (a.__array_interface__["data"][0] == b.__array_interface__["data"][0]
+                and a.shape == b.shape and a.strides == b.strides and a.dtype == b.dtype)
+    return False
+
+
 class PlotWidget(QWidget):
     def __init__(self):
         super().__init__()
@@ -24,6 +40,13 @@ class PlotWidget(QWidget):
         self.connect_interaction()
         # 连接双击事件
         self.canvas.mpl_connect("button_press_event", self.on_double_click)
+        # 分级绘制（LOD）状态：包络金字塔与对应曲线
+        self._pyramid = None
+        self._lod = None
+        # 分块声谱图状态
+        self._spec_engine = None
+        self._tiled = None
+        self._colorbar = None
         # 用户自定义的坐标轴范围
         self.user_xlim = None
         self.user_ylim = None
@@ -64,12 +87,15 @@ class PlotWidget(QWidget):
         self.figure.clear()
         self.canvas.draw()
     # 绘图方法
-    def plot(self, x, y, title=""):
-        self.ax.clear()
-        self.ax.plot(x, y)
+    def plot(self, x, y, title="", labels=None, xlabel="频率 (Hz)", ylabel="幅值"):
+        """y 可为 (n, n_channels)，每列一条曲线；labels 为各通道图例"""
+        self._reset_axes()
+        self.ax.plot(x, y, label=labels)
+        if labels:
+            self.ax.legend(loc="upper right")
         self.ax.set_title(title)
-        self.ax.set_xlabel("频率 (Hz)")
-        self.ax.set_ylabel("幅值")
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
         # ✅ 如果用户设置了坐标轴范围，应用它
         if self.user_xlim is not None:
             self.ax.set_xlim(*self.user_xlim)
@@ -78,6 +104,229 @@ class PlotWidget(QWidget):
         self.canvas.draw()
         logger.info(f"绘制图像: {title}")
 
+    # -----------------------------
+    # 音调峰值标注（叠加在当前图上，不清空坐标轴）
+    def mark_peaks(self, x, y, texts=None):
+        """在 (x, y) 处标注峰值；texts 为各点的说明文字，None 时只画标记"""
+        self.ax.scatter(x, y, marker="v" if texts else ".", s=30 if texts else 6, color="C3", zorder=5,
+                        label="音调峰值")
+        for xi, yi, text in zip(x, y, texts or ()):
+            self.ax.annotate(text, (xi, yi), xytext=(0, 8), textcoords="offset points", ha="center",
+                             fontsize="x-small", color="C3")
+        self.canvas.draw()
+
+    # -----------------------------
+    # 多文件对比
+    def plot_comparison(self, x, stack, labels=None, stats=None, title="", xlabel="频率 (Hz)", ylabel="幅值 (dB)",
+                        logx=False):
+        """
+        多个文件的结果对比，stack 形状为 (n_files, n_points)
+
+        stats 为 None 时叠加显示每个文件的曲线；为 compare_statistics 的结果时显示
+        均值、最小/最大包络与分位数带。
+        """
+        self._reset_axes()
+        if stats is None:
+            lines = self.ax.plot(x, np.asarray(stack).T, lw=0.8)
+            if labels and len(labels) <= 12:
+                for line, label in zip(lines, labels):
+                    line.set_label(label)
+                self.ax.legend(loc="upper right", fontsize="small")
+        else:
+            pct, levels = stats["percentiles"], stats["levels"]
+            self.ax.fill_between(x, stats["min"], stats["max"], color="C0", alpha=0.15, lw=0, label="最小 / 最大")
+            if len(levels) >= 2:
+                self.ax.fill_between(x, pct[0], pct[-1], color="C0", alpha=0.3, lw=0,
+                                     label=f"P{levels[0]:g} – P{levels[-1]:g}")
+            for p, values in zip(levels[1:-1], pct[1:-1]):
+                self.ax.plot(x, values, color="C0", lw=0.8, ls="--", label=f"P{p:g}")
+            self.ax.plot(x, stats["mean"], color="C3", lw=1.2, label=f"均值 (n={len(stack)})")
+            self.ax.legend(loc="upper right", fontsize="small")
+        if logx:
+            self.ax.set_xscale("log")
+        self.ax.set_title(title)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        if self.user_xlim is not None:
+            self.ax.set_xlim(*self.user_xlim)
+        if self.user_ylim is not None:
+            self.ax.set_ylim(*self.user_ylim)
+        self.canvas.draw()
+        logger.info(f"绘制图像: {title}")
+
+    # -----------------------------
+    # 倍频程频带
+    def plot_bands(self, nominal, levels, title="", labels=None):
+        """
+        绘制频带声级柱状图
+
+        levels 为 (n_bands,) 或 (n_bands, n_channels)，多通道时各通道的柱并排显示
+        """
+        self._reset_axes()
+        levels = np.asarray(levels).reshape(len(nominal), -1)
+        n_channels = levels.shape[1]
+        width = 0.8 / n_channels
+        positions = np.arange(len(nominal))
+        # 柱从图底部画起，dB 值可能为负
+        bottom = np.floor(levels.min() / 10) * 10 - 10
+        for c in range(n_channels):
+            self.ax.bar(positions + (c - (n_channels - 1) / 2) * width, levels[:, c] - bottom, width,
+                        bottom=bottom, label=labels[c] if labels else None)
+        if labels:
+            self.ax.legend(loc="upper right")
+        self.ax.set_xticks(positions)
+        self.ax.set_xticklabels([band_label(f) for f in nominal], rotation=90)
+        self.ax.set_title(title)
+        self.ax.set_xlabel("中心频率 (Hz)")
+        self.ax.set_ylabel("声级 (dB)")
+        if self.user_ylim is not None:
+            self.ax.set_ylim(*self.user_ylim)
+        self.canvas.draw()
+        logger.info(f"绘制图像: {title}")
+
+    def plot_band_levels_vs_time(self, times, nominal, levels, frame_length, title=""):
+        """绘制频带声级随时间的变化，levels 形状为 (n_frames, n_bands)"""
+        self._reset_axes()
+        im = self.ax.imshow(np.asarray(levels).T, origin="lower", aspect="auto", cmap="magma",
+                            interpolation="nearest",
+                            extent=(times[0] if len(times) else 0.0, (times[-1] if len(times) else 0.0) + frame_length,
+                                    -0.5, len(nominal) - 0.5))
+        step = max(1, len(nominal) // 12)
+        self.ax.set_yticks(np.arange(0, len(nominal), step))
+        self.ax.set_yticklabels([band_label(f) for f in nominal[::step]])
+        self.ax.set_title(title)
+        self.ax.set_xlabel("时间 [s]")
+        self.ax.set_ylabel("中心频率 [Hz]")
+        self._set_colorbar(im, label="声级 [dB]")
+        self.canvas.draw()
+        logger.info(f"绘制图像: {title}")
+
+    # -----------------------------
+    # 阶次分析
+    def plot_waterfall(self, freqs, steps, spectra_db, orders=(), title="转速瀑布图", ylabel="转速 [rpm]",
+                       vmin=None, vmax=None):
+        """
+        绘制瀑布图（转速或时间-频率图），spectra_db 形状为 (n_steps, n_freqs)
+
+        orders 中的阶次以 f = order × rpm / 60 的斜线叠加显示（仅转速瀑布图）
+        """
+        self._reset_axes()
+        mesh = self.ax.pcolormesh(freqs, steps, spectra_db, shading="nearest", cmap="magma", vmin=vmin, vmax=vmax)
+        for order in orders:
+            self.ax.plot(order * np.asarray(steps) / 60, steps, "w--", linewidth=0.6)
+            self.ax.annotate(f"{order:g}", (order * steps[-1] / 60, steps[-1]), color="w", fontsize=8)
+        self.ax.set_xlim(freqs[0], freqs[-1])
+        self.ax.set_ylim(steps[0], steps[-1])
+        self.ax.set_title(title)
+        self.ax.set_xlabel("频率 [Hz]")
+        self.ax.set_ylabel(ylabel)
+        self._set_colorbar(mesh, label="幅值 [dB]")
+        self.canvas.draw()
+        logger.info(f"绘制图像: {title}")
+
+    def set_color_range(self, vmin, vmax):
+        """修改当前色图的颜色范围（不重新计算、不重建图像）"""
+        if self._colorbar is None:
+            return
+        self._colorbar.mappable.set_clim(vmin, vmax)
+        self.canvas.draw_idle()
+
+    # -----------------------------
+    # 均匀采样信号（波形 / Level vs Time）的分级绘制
+    def pyramid_for(self, y):
+        """已为该信号构建的包络金字塔，没有时返回 None"""
+        if self._pyramid is not None and _same_signal(self._pyramid.y, y):
+            return self._pyramid
+        return None
+
+    def plot_uniform(self, y, x0=0.0, dx=1.0, title="", labels=None, pyramid=None):
+        """
+        绘制第 i 个点位于 x0 + i * dx 的长信号
+
+        只绘制可见范围内按像素宽度抽取的最小/最大值包络，缩放时重新抽取，
+        绘制开销与信号长度无关。y 可为 (n, n_channels) 或内存映射的懒加载视图。
+        pyramid 为在后台线程中预先构建的 EnvelopePyramid(y)；未给出且没有可复用的
+        金字塔时在调用线程中构建（长信号应由调用方在后台构建后传入）。
+        """
+        self._reset_axes()
+        if pyramid is not None:
+            self._pyramid = pyramid
+        elif self.pyramid_for(y) is None:
+            self._pyramid = EnvelopePyramid(y)
+            logger.debug(f"构建包络金字塔: {len(y)} 点, {self._pyramid.nbytes / 1e6:.1f} MB")
+
+        n_lines = 1 if y.ndim == 1 else y.shape[1]
+        lines = self.ax.plot(np.zeros((0, n_lines)), np.zeros((0, n_lines)), label=labels)
+        if labels:
+            self.ax.legend(loc="upper right")
+        self.ax.set_title(title)
+        self.ax.set_xlabel("时间 (s)")
+        self.ax.set_ylabel("幅值")
+
+        self.ax.set_xlim(x0, x0 + max(len(y) - 1, 1) * dx)
+        vmin, vmax = self._pyramid.global_range()
+        margin = 0.05 * (vmax - vmin) or 1.0
+        self.ax.set_ylim(vmin - margin, vmax + margin)
+        if self.user_xlim is not None:
+            self.ax.set_xlim(*self.user_xlim)
+        if self.user_ylim is not None:
+            self.ax.set_ylim(*self.user_ylim)
+
+        self._lod = {"x0": x0, "dx": dx, "lines": lines, "key": None}
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self.refresh_lod())
+        self.refresh_lod()
+        self.canvas.draw()
+        logger.info(f"绘制图像: {title}")
+
+    def _reset_axes(self):
+        """清空坐标轴、色条及分级绘制状态"""
+        self._lod = None
+        self._tiled = None
+        if self._colorbar is not None:
+            # 须在 ax.clear() 之前移除，色条需要借助原图像恢复坐标轴位置
+            self._colorbar.remove()
+            self._colorbar = None
+        self.ax.clear()
+
+    def _set_colorbar(self, mappable, label="功率 [dB]"):
+        """添加色条；_reset_axes 会移除旧色条，重复绘制时始终只有一个"""
+        self._colorbar = self.canvas.figure.colorbar(mappable, ax=self.ax, label=label)
+
+    def refresh_view(self):
+        """坐标范围变化后，按新的可见区域重新抽取波形或声谱图"""
+        self.refresh_lod()
+        self.refresh_tiles()
+
+    def refresh_lod(self):
+        """按当前 X 范围与像素宽度重新抽取包络"""
+        if self._lod is None:
+            return
+        x0, dx = self._lod["x0"], self._lod["dx"]
+        xmin, xmax = self.ax.get_xlim()
+        width = max(int(self.ax.bbox.width), 100)
+        start = max(int(np.floor((xmin - x0) / dx)), 0)
+        stop = int(np.ceil((xmax - x0) / dx)) + 1
+        key = (start, stop, width)
+        if key == self._lod["key"]:
+            return
+        self._lod["key"] = key
+
+        positions, mins, maxs = self._pyramid.query(start, stop, width)
+        x = x0 + positions * dx
+        is_raw = mins is maxs  # 区间足够短时 query 直接返回原始采样
+        mins = mins.reshape(len(mins), -1)
+        if not is_raw:
+            # 每个块画一条从最小值到最大值的竖线，相邻块首尾相连
+            maxs = maxs.reshape(len(maxs), -1)
+            x = np.repeat(x, 2)
+            ys = np.empty((len(x), mins.shape[1]), dtype=mins.dtype)
+            ys[0::2] = mins
+            ys[1::2] = maxs
+        else:
+            ys = mins
+        for i, line in enumerate(self._lod["lines"]):
+            line.set_data(x, ys[:, i])
+
     # -----------------------------
     # 应用坐标轴范围
     def apply_limits(self):
@@ -100,21 +349,60 @@ class PlotWidget(QWidget):
         except Exception as e:
             logger.error(f"应用坐标轴范围失败: {e}")
 
-    def plot_spectrogram(self, y, sr):
-        """绘制声谱图"""
-        self.ax.clear()
-        f, t, Sxx = spectrogram(y, fs=sr, nperseg=1024)
+    def plot_spectrogram(self, y, sr, nperseg=1024):
+        """
+        绘制声谱图
 
-        pcm = self.ax.pcolormesh(
-            t, f, 10 * np.log10(Sxx + 1e-10),
-            shading="gouraud", cmap="magma"
-        )
+        使用分块多分辨率引擎，只计算并用 imshow 绘制覆盖可见区域的块，
+        缩放时按新的可见范围重新渲染。同一信号重复绘制时复用已计算的块。
+        """
+        engine = self._spec_engine
+        if (engine is None or engine.sr != sr or engine.nperseg != nperseg
+                or not _same_signal(engine.y, y)):
+            engine = self._spec_engine = TiledSpectrogram(y, sr, nperseg=nperseg)
+
+        self._reset_axes()
+
+        duration = len(y) / sr
+        width, height = self._axes_pixels()
+        image, extent = engine.render(0, duration, width, height=height)
+        vmin, vmax = np.percentile(image, [5, 100])
+        im = self.ax.imshow(image, origin="lower", aspect="auto", extent=extent,
+                            cmap="magma", interpolation="nearest", vmin=vmin, vmax=vmax)
+        self.ax.set_xlim(0, duration)
+        self.ax.set_ylim(0, sr / 2)
         self.ax.set_ylabel("频率 [Hz]")
         self.ax.set_xlabel("时间 [s]")
         self.ax.set_title("声谱图")
-        self.canvas.figure.colorbar(pcm, ax=self.ax, label="功率 [dB]")
+        self._set_colorbar(im)
+
+        self._tiled = {"engine": engine, "image": im, "key": None}
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self.refresh_tiles())
+        self.ax.callbacks.connect("ylim_changed", lambda ax: self.refresh_tiles())
+        self.refresh_tiles()
         self.canvas.draw()
 
+    def refresh_tiles(self):
+        """按当前可见时间/频率范围重新渲染声谱图"""
+        if self._tiled is None:
+            return
+        xmin, xmax = self.ax.get_xlim()
+        ymin, ymax = self.ax.get_ylim()
+        width, height = self._axes_pixels()
+        key = (xmin, xmax, ymin, ymax, width, height)
+        if key == self._tiled["key"]:
+            return
+        self._tiled["key"] = key
+
+        image, extent = self._tiled["engine"].render(xmin, xmax, width, f0=ymin, f1=ymax, height=height)
+        im = self._tiled["image"]
+        im.set_data(image)
+        im.set_extent(extent)
+
+    def _axes_pixels(self):
+        bbox = self.ax.bbox
+        return max(int(bbox.width), 100), max(int(bbox.height), 100)
+
     def connect_interaction(self):
         """添加鼠标滚轮缩放功能"""
 
@@ -141,6 +429,8 @@ class PlotWidget(QWidget):
                 y_center + (ylim[1] - y_center) * scale_factor
             ])
 
+            # 波形 / 声谱图按新的可见范围重新抽取
+            self.refresh_view()
             self.canvas.draw_idle()
 
         # 绑定事件
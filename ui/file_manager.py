@@ -1,46 +1,75 @@
 import os
 import logging
-import soundfile as sf
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, QFileDialog, QMessageBox, QMenu
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton, QFileDialog, QMessageBox, QMenu, QAbstractItemView
 from PyQt6.QtCore import QThread, pyqtSignal,Qt
 from PyQt6.QtGui import QAction
 
+from analysis.audio_io import AUDIO_EXTENSIONS
+from analysis.audio_store import AudioStore
+from analysis.metadata import MetadataIndex, AudioMetadata, find_audio_files
+
 logger = logging.getLogger(__name__)
 
+# 已解码音频的内存预算 (字节)，超出时按最久未使用淘汰
+AUDIO_STORE_MAX_BYTES = 2 * 1024 ** 3
+
+
 # -----------------------------
 # 音频加载线程
 class AudioLoaderThread(QThread):
-    finished = pyqtSignal(object, int, float)  # data, sr, duration
+    finished = pyqtSignal(object)  # AudioEntry
     error = pyqtSignal(str)
 
-    def __init__(self, file_path):
+    def __init__(self, store, file_path):
         super().__init__()
+        self.store = store
         self.file_path = file_path
 
     def run(self):
         try:
-            data, sr = sf.read(self.file_path, dtype='float32')
-            if data.ndim > 1:
-                data = data[:, 0]  # 取第一声道
-            duration = len(data) / sr
-            self.finished.emit(data, sr, duration)
+            # PCM WAV 内存映射；其它格式解码（或映射之前转存的解码结果）；过大的文件流式
+            self.finished.emit(self.store.load(self.file_path))
         except Exception as e:
             self.error.emit(str(e))
 
 
+# -----------------------------
+# 元数据扫描线程：先并行读取全部文件头，再在后台补全概览
+class MetadataScanThread(QThread):
+    found = pyqtSignal(str, object)  # path, AudioMetadata 或错误信息 (str)
+
+    def __init__(self, index, paths):
+        super().__init__()
+        self.index = index
+        self.paths = paths
+
+    def run(self):
+        for overview in (False, True):
+            for path, meta in self.index.iter_scan(self.paths, overview=overview):
+                if self.isInterruptionRequested():
+                    return
+                self.found.emit(path, meta if isinstance(meta, AudioMetadata) else str(meta))
+
+
 # -----------------------------
 # FileManager UI
 class FileManager(QWidget):
+    audio_ready = pyqtSignal(object)  # 所点击的列表项已加载完成，参数为该项
+
     def __init__(self):
         super().__init__()
         self.audio_list = QListWidget()
         self.audio_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.audio_list.customContextMenuRequested.connect(self.show_context_menu)
+        # Ctrl / Shift 多选，用于多文件对比
+        self.audio_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.info_label = QLabel("未加载音频")
         self.import_button = QPushButton("导入音频文件")
+        self.import_folder_button = QPushButton("导入文件夹")
 
         layout = QVBoxLayout()
         layout.addWidget(self.import_button)
+        layout.addWidget(self.import_folder_button)
         layout.addWidget(QLabel("音频文件列表"))
         layout.addWidget(self.audio_list)
         layout.addWidget(QLabel("文件信息"))
@@ -48,47 +77,166 @@ class FileManager(QWidget):
         self.setLayout(layout)
 
         self.import_button.clicked.connect(self.import_audio)
+        self.import_folder_button.clicked.connect(self.import_folder)
+        self.audio_list.itemClicked.connect(self.open_item)
 
-        # 状态
+        # 状态（当前打开的文件）
         self.audio_path = None
-        self.y = None
+        self.source = None  # MappedWav 或 (n_samples, n_channels) 数组
+        self.y = None  # 全部通道 (n_samples, n_channels)，内存映射文件为懒加载视图
         self.sr = None
+        self.streaming = False
         self.loader_thread = None
+        self._loading_item = None
+        # 已打开的文件，按路径保存；切换列表项时直接取用
+        self.store = AudioStore(max_bytes=AUDIO_STORE_MAX_BYTES)
+        self._loaders = []  # 已被新请求取代但仍在运行的加载线程
+
+        # 元数据索引：列表只需文件头即可显示，解码推迟到打开文件时
+        self.index = MetadataIndex()
+        self.metadata = {}  # path -> AudioMetadata
+        self._scanners = []
 
     # -----------------------------
-    # 异步导入音频
+    # 导入音频
     def import_audio(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "选择音频文件", "", "音频文件 (*.wav *.mp3 *.flac)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择音频文件", "", f"音频文件 ({' '.join('*' + ext for ext in AUDIO_EXTENSIONS)})")
         if not file_path:
             return
+        item = self.add_files([file_path])[0]
+        self.audio_list.setCurrentItem(item)
+        self.open_item(item)
+
+    def import_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, "选择音频文件夹")
+        if not directory:
+            return
+        paths = find_audio_files(directory)
+        self.add_files(paths)
+        logger.info(f"导入文件夹: {directory}, 文件数={len(paths)}")
+
+    def add_files(self, paths):
+        """
+        把文件加入列表并在后台读取元数据（已缓存的直接使用索引），返回对应的列表项
+
+        已在列表中的文件不重复添加。
+        """
+        existing = {self.item_path(self.audio_list.item(i)): self.audio_list.item(i)
+                    for i in range(self.audio_list.count())}
+        items, new_paths = [], []
+        for path in paths:
+            path = os.path.abspath(path)
+            if path not in existing:
+                item = QListWidgetItem(os.path.basename(path))
+                item.setData(Qt.ItemDataRole.UserRole, path)
+                item.setToolTip(path)
+                self.audio_list.addItem(item)
+                existing[path] = item
+                new_paths.append(path)
+            items.append(existing[path])
+        if new_paths:
+            scanner = MetadataScanThread(self.index, new_paths)
+            scanner.found.connect(self.on_metadata)
+            scanner.finished.connect(lambda: self._scanners.remove(scanner))
+            self._scanners.append(scanner)
+            scanner.start()
+        return items
 
-        filename = os.path.basename(file_path)
-        self.audio_list.addItem(filename)
-        self.info_label.setText("加载中...")
+    @staticmethod
+    def item_path(item):
+        return item.data(Qt.ItemDataRole.UserRole)
 
-        # 创建线程加载音频
-        self.loader_thread = AudioLoaderThread(file_path)
-        self.loader_thread.finished.connect(self.on_audio_loaded)
-        self.loader_thread.error.connect(self.on_audio_load_error)
-        self.loader_thread.start()
-        self.audio_path = file_path
+    def selected_paths(self):
+        """列表中所选文件的路径（按列表顺序）"""
+        return [self.item_path(self.audio_list.item(i)) for i in range(self.audio_list.count())
+                if self.audio_list.item(i).isSelected()]
+
+    def on_metadata(self, path, meta):
+        current = self.audio_list.currentItem()
+        is_current = current is not None and self.item_path(current) == path
+        if isinstance(meta, str):
+            logger.warning(f"无法读取文件信息: {path}: {meta}")
+            if is_current:
+                self.info_label.setText(f"无法读取文件信息：{meta}")
+            return
+        self.metadata[path] = meta
+        for i in range(self.audio_list.count()):
+            item = self.audio_list.item(i)
+            if self.item_path(item) == path:
+                item.setToolTip(f"{path}\n{meta.summary()}")
+        if is_current and self.loader_thread is None:
+            self.info_label.setText(meta.summary())
 
     # -----------------------------
-    # 加载完成
-    def on_audio_loaded(self, data, sr, duration):
-        self.y = data
-        self.sr = sr
-        self.info_label.setText(f"采样率：{sr} Hz\n时长：{duration:.2f} 秒\n通道：单声道")
-        logger.info(f"成功加载音频：{self.audio_path}, 采样率={sr}, 时长={duration:.2f}s")
+    # 打开列表项（解码 / 内存映射在后台线程进行）
+    def open_item(self, item):
+        path = self.item_path(item)
+        if self.loader_thread is not None:
+            self._loaders.append(self.loader_thread)
+            self.loader_thread = None
+        entry = self.store.get(path)
+        if entry is not None:
+            # 已在存储中：立即切换
+            self.set_current(item, entry)
+            return
+
+        meta = self.metadata.get(path)
+        self.info_label.setText("加载中..." if meta is None else f"{meta.summary()}\n加载中...")
+        thread = AudioLoaderThread(self.store, path)
+        thread.finished.connect(lambda entry: self.on_audio_loaded(entry, thread=thread))
+        thread.error.connect(lambda msg: self.on_audio_load_error(msg, thread=thread))
+        self.loader_thread = thread
+        self._loading_item = item
+        thread.start()
+
+    def entry(self, item):
+        """列表项对应的已加载音频（AudioEntry），未加载时为 None"""
+        return self.store.get(self.item_path(item))
+
+    def _release_loader(self, thread):
+        """线程结束后释放引用；返回它是否仍是最新的加载请求"""
+        if thread in self._loaders:
+            self._loaders.remove(thread)
+            return False
         self.loader_thread = None
+        return True
+
+    # -----------------------------
+    # 加载完成
+    def on_audio_loaded(self, entry, thread=None):
+        if thread is not None and not self._release_loader(thread):
+            return  # 用户已点击了其它文件
+        item, self._loading_item = self._loading_item, None
+        if item is None or self.audio_list.row(item) < 0:
+            return  # 加载期间该项已被移除
+        logger.info(f"成功加载音频：{entry.path}, 采样率={entry.sr}, 时长={entry.duration:.2f}s, "
+                    f"存储占用 {self.store.nbytes / 1e6:.0f} MB")
+        self.set_current(item, entry)
+
+    def set_current(self, item, entry):
+        """把列表项设为当前文件并通知分析模块"""
+        self.audio_path = entry.path
+        self.source = entry.source
+        self.y = entry.y
+        self.sr = entry.sr
+        self.streaming = entry.streaming
+
+        meta = self.metadata.get(entry.path)
+        info = f"采样率：{entry.sr} Hz\n时长：{entry.duration:.2f} 秒\n通道：{entry.mode()}"
+        if meta is not None and meta.has_overview:
+            info += "\n" + meta.summary().splitlines()[-1]
+        self.info_label.setText(info)
+        self.audio_ready.emit(item)
 
     # -----------------------------
     # 加载失败
-    def on_audio_load_error(self, error_msg):
+    def on_audio_load_error(self, error_msg, thread=None):
+        if thread is not None and not self._release_loader(thread):
+            return
+        self._loading_item = None
         self.info_label.setText(f"加载失败：{error_msg}")
         logger.error(f"音频加载失败：{error_msg}")
         QMessageBox.warning(self, "加载失败", error_msg)
-        self.loader_thread = None
 
     def show_context_menu(self, pos):
         item = self.audio_list.itemAt(pos)
@@ -103,11 +251,18 @@ class FileManager(QWidget):
 
     def remove_audio(self, item):
         row = self.audio_list.row(item)
+        path = self.item_path(item)
         self.audio_list.takeItem(row)
-        logger.info(f"音频已移除: {item.text()}")
+        self.metadata.pop(path, None)
 
-        # 如果当前移除的音频是正在播放的
-        if getattr(self, 'y', None) is not None and self.audio_list.count() == 0:
+        # 如果移除的是当前已加载的音频；先释放对数据（内存映射）的引用，转存文件才能删除
+        if path == self.audio_path or self.audio_list.count() == 0:
+            self.audio_path = None
+            self.source = None
             self.y = None
             self.sr = None
-            logger.info("已清空当前音频数据")
\ No newline at end of file
+            self.streaming = False
+            logger.info("已清空当前音频数据")
+
+        self.store.remove(path)
+        logger.info(f"音频已移除: {item.text()}")
\ No newline at end of file
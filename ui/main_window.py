@@ -2,6 +2,7 @@ from PyQt6.QtWidgets import QWidget, QHBoxLayout, QSplitter
 from PyQt6.QtCore import Qt
 from .file_manager import FileManager
 from ui.analysis_panel.analysis_panel import AnalysisPanel
+from analysis.parallel import shutdown_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,12 +28,26 @@ class MainWindow(QWidget):
         self.setLayout(layout)
 
         # 信号连接
-        self.file_manager.audio_list.itemClicked.connect(self.sync_audio)
-
-    def sync_audio(self):
-        """文件导入后，同步音频到分析面板"""
-        y = self.file_manager.y
-        sr = self.file_manager.sr
-        if y is not None and sr is not None:
-            logger.info("同步音频到分析模块")
-            self.analysis_panel.load_audio(y, sr,draw=False)
+        self.file_manager.audio_ready.connect(self.sync_audio)
+        self.analysis_panel.compare_requested.connect(self.compare_selected)
+
+    def sync_audio(self, item):
+        """列表项加载完成后，把该项的音频同步到分析面板"""
+        entry = self.file_manager.entry(item)
+        if entry is None:
+            return
+        if entry.y is not None:
+            logger.info(f"同步音频到分析模块: {entry.path}")
+            self.analysis_panel.load_audio(entry.y, entry.sr, draw=False)
+        elif entry.streaming:
+            logger.info(f"同步流式音频到分析模块: {entry.path}")
+            self.analysis_panel.load_stream(entry.path, entry.sr)
+
+    def compare_selected(self):
+        """对文件列表中所选的文件执行多文件对比"""
+        self.analysis_panel.compare_files(self.file_manager.selected_paths(), self.file_manager.store.load)
+
+    def closeEvent(self, event):
+        # 关闭多通道并行计算的进程池
+        shutdown_pool(wait=False)
+        super().closeEvent(event)